@@ -0,0 +1,308 @@
+"""Analítica de repeticiones en streaming: tempo, rango de movimiento y simetría.
+
+Cada frame real alimenta con sus ángulos estándar (rasgos "angulos_estandar")
+a un segmentador por movimiento: una señal angular (p. ej. la media de las dos
+rodillas) con histéresis entre un umbral bajo y uno alto marca el inicio, el
+punto más bajo y el final de cada repetición. Por repetición se obtiene la
+duración (bajada y subida), el ángulo mínimo, el rango de movimiento y la
+simetría izquierda/derecha. Las estadísticas se acumulan en ventanas circulares
+de tamaño fijo (últimas N repeticiones) y en acumuladores de toda la sesión,
+todos con actualización O(1): el coste por frame es constante y la memoria no
+crece en sesiones de horas.
+"""
+import collections
+import math
+
+import cv2
+
+from sprites import dibujar_texto, panel_translucido
+from utils import mascara_indices, NOMBRES_TRIPLETAS, TRIPLETAS
+
+# Movimientos analizados. Con "alterno" cada lado cuenta sus propias repeticiones;
+# si no, la señal es la media de los dos lados y la simetría se mide en cada repetición
+MOVIMIENTOS = {
+    "sentadilla": {"angulos": ("rodilla_izquierda", "rodilla_derecha"), "bajo": 110.0, "alto": 150.0},
+    "elevacion_rodilla": {"angulos": ("cadera_izquierda", "cadera_derecha"), "bajo": 120.0, "alto": 150.0,
+                          "alterno": True},
+    "flexion_codos": {"angulos": ("codo_izquierdo", "codo_derecho"), "bajo": 70.0, "alto": 140.0},
+}
+
+METRICAS_REPETICION = ("duracion", "bajada", "subida", "minimo", "rom", "simetria")
+
+
+class Estadistica:
+    """Media, varianza (Welford), mínimo y máximo acumulados de toda la sesión."""
+
+    __slots__ = ("n", "media", "_m2", "minimo", "maximo")
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def agregar(self, valor):
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self._m2 += delta * (valor - self.media)
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    @property
+    def varianza(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+class VentanaMovil:
+    """Últimos `capacidad` valores en un buffer circular con media, varianza, mínimo y máximo O(1).
+
+    Media y varianza se actualizan con Welford al entrar y salir cada valor; mínimo
+    y máximo, con colas monótonas (coste amortizado constante).
+    """
+
+    __slots__ = ("valores", "total", "media", "_m2", "_minimos", "_maximos")
+
+    def __init__(self, capacidad=20):
+        self.valores = [0.0] * capacidad
+        self.total = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self._minimos = collections.deque()  # (índice, valor) con valores crecientes
+        self._maximos = collections.deque()  # (índice, valor) con valores decrecientes
+
+    def __len__(self):
+        return min(self.total, len(self.valores))
+
+    def agregar(self, valor):
+        capacidad = len(self.valores)
+        posicion = self.total % capacidad
+        if self.total >= capacidad:
+            # Sale el valor más antiguo
+            saliente = self.valores[posicion]
+            n = capacidad - 1
+            if n:
+                delta = saliente - self.media
+                self.media -= delta / n
+                self._m2 -= delta * (saliente - self.media)
+            else:
+                self.media = self._m2 = 0.0
+        else:
+            n = self.total
+        self.valores[posicion] = valor
+        n += 1
+        delta = valor - self.media
+        self.media += delta / n
+        self._m2 += delta * (valor - self.media)
+
+        indice = self.total
+        self.total += 1
+        while self._minimos and self._minimos[-1][1] >= valor:
+            self._minimos.pop()
+        self._minimos.append((indice, valor))
+        while self._maximos and self._maximos[-1][1] <= valor:
+            self._maximos.pop()
+        self._maximos.append((indice, valor))
+        for cola in (self._minimos, self._maximos):
+            if cola[0][0] <= indice - capacidad:
+                cola.popleft()
+
+    @property
+    def varianza(self):
+        n = len(self)
+        return max(self._m2, 0.0) / (n - 1) if n > 1 else 0.0
+
+    @property
+    def minimo(self):
+        return self._minimos[0][1] if self._minimos else None
+
+    @property
+    def maximo(self):
+        return self._maximos[0][1] if self._maximos else None
+
+
+class SegmentadorRepeticiones:
+    """Repeticiones de una señal angular por histéresis: arriba (>= alto) -> abajo (< bajo) -> arriba.
+
+    La duración va del último frame arriba al primero de vuelta arriba; el rango
+    de movimiento, del máximo de la fase arriba previa al mínimo de la repetición.
+    lados: ángulos de cada lado que se siguen durante la repetición para medir la simetría.
+    """
+
+    def __init__(self, bajo, alto):
+        self.bajo = bajo
+        self.alto = alto
+        self.abajo = False
+        self.inicio = None  # Último instante arriba antes de bajar
+        self.referencia = None  # Máximo de la señal y de cada lado en la fase arriba
+        self.referencias = None
+        self.minimo = None
+        self.t_minimo = None
+        self.minimos = None
+
+    def actualizar(self, tiempo, senal, lados):
+        """Devuelve las medidas de la repetición si termina en este frame, o None."""
+        if not self.abajo:
+            if senal >= self.alto:
+                self.inicio = tiempo
+                if self.referencia is None:
+                    self.referencia, self.referencias = senal, lados
+                else:
+                    self.referencia = max(self.referencia, senal)
+                    self.referencias = tuple(max(r, v) for r, v in zip(self.referencias, lados))
+            elif senal < self.bajo and self.inicio is not None:
+                self.abajo = True
+                self.minimo, self.t_minimo, self.minimos = senal, tiempo, lados
+            return None
+
+        if senal < self.minimo:
+            self.minimo, self.t_minimo = senal, tiempo
+        self.minimos = tuple(min(m, v) for m, v in zip(self.minimos, lados))
+        if senal < self.alto:
+            return None
+
+        self.abajo = False
+        rangos = [max(r, v) - m for r, v, m in zip(self.referencias, lados, self.minimos)]
+        repeticion = {
+            "tiempo": tiempo,
+            "duracion": tiempo - self.inicio,
+            "bajada": self.t_minimo - self.inicio,
+            "subida": tiempo - self.t_minimo,
+            "minimo": self.minimo,
+            "rom": max(self.referencia, senal) - self.minimo,
+            "simetria": simetria(*rangos) if len(rangos) == 2 else None,
+        }
+        self.inicio, self.referencia, self.referencias = tiempo, senal, lados
+        return repeticion
+
+
+def simetria(a, b):
+    """1.0 si los dos lados recorren el mismo rango; tiende a 0 cuanto más descompensados."""
+    mayor = max(a, b)
+    return min(a, b) / mayor if mayor > 0 else 1.0
+
+
+class AnalisisMovimiento:
+    """Segmentación y estadísticas (ventana y sesión) de un movimiento."""
+
+    def __init__(self, nombre, spec, ventana=20):
+        self.nombre = nombre
+        self.alterno = spec.get("alterno", False)
+        self.columnas = [NOMBRES_TRIPLETAS.index(angulo) for angulo in spec["angulos"]]
+        self.mascara = mascara_indices({i for angulo in spec["angulos"] for i in TRIPLETAS[angulo]})
+        self.spec = spec
+        self.reiniciar_segmentacion()
+        self.repeticiones = 0
+        self.ultima = None
+        self.ventana = {metrica: VentanaMovil(ventana) for metrica in METRICAS_REPETICION}
+        self.sesion = {metrica: Estadistica() for metrica in METRICAS_REPETICION}
+        # Alterno: rango de movimiento reciente de cada lado, para la simetría
+        self.rom_lados = [VentanaMovil(ventana) for _ in self.segmentadores] if self.alterno else None
+
+    def reiniciar_segmentacion(self):
+        """Descarta la repetición a medias (las estadísticas se conservan)."""
+        lados = len(self.columnas) if self.alterno else 1
+        self.segmentadores = [SegmentadorRepeticiones(self.spec["bajo"], self.spec["alto"]) for _ in range(lados)]
+
+    def actualizar(self, tiempo, angulos):
+        """Procesa los ángulos estándar del frame; devuelve la lista de repeticiones terminadas."""
+        valores = [angulos[c] for c in self.columnas]
+        if any(v != v for v in valores):  # NaN: segmento degenerado
+            return []
+        if self.alterno:
+            terminadas = []
+            for lado, (segmentador, valor) in enumerate(zip(self.segmentadores, valores)):
+                repeticion = segmentador.actualizar(tiempo, valor, (valor,))
+                if repeticion is not None:
+                    repeticion["lado"] = lado
+                    self.rom_lados[lado].agregar(repeticion["rom"])
+                    if all(len(v) for v in self.rom_lados):
+                        repeticion["simetria"] = simetria(*(v.media for v in self.rom_lados))
+                    terminadas.append(self._registrar(repeticion))
+            return terminadas
+        repeticion = self.segmentadores[0].actualizar(tiempo, sum(valores) / len(valores), tuple(valores))
+        return [] if repeticion is None else [self._registrar(repeticion)]
+
+    def _registrar(self, repeticion):
+        repeticion["movimiento"] = self.nombre
+        self.repeticiones += 1
+        self.ultima = repeticion
+        for metrica in METRICAS_REPETICION:
+            valor = repeticion.get(metrica)
+            if valor is not None:
+                self.ventana[metrica].agregar(valor)
+                self.sesion[metrica].agregar(valor)
+        return repeticion
+
+
+class AnaliticaRepeticiones:
+    """Etapa de analítica del bucle: el movimiento del nivel actual con los ángulos de cada frame.
+
+    al_evento: función opcional (tipo, datos) que recibe cada repetición como
+    evento "repeticion" (p. ej. historial.RegistroSesion).
+    """
+
+    def __init__(self, movimientos=MOVIMIENTOS, ventana=20, al_evento=None):
+        self.movimientos = {nombre: AnalisisMovimiento(nombre, spec, ventana) for nombre, spec in movimientos.items()}
+        self.al_evento = al_evento
+        self.activo = None  # Movimiento que se está segmentando
+
+    def actualizar(self, rasgos, tiempo, nombre):
+        """Alimenta el movimiento `nombre` (campo "movimiento" del nivel) con el RasgosFrame de un frame real.
+
+        Solo se segmenta el ejercicio que pide el nivel: los demás no cuentan
+        repeticiones ni llegan al historial. Al cambiar de movimiento se descarta
+        la repetición que hubiera quedado a medias.
+        """
+        movimiento = self.movimientos.get(nombre)
+        if movimiento is not self.activo:
+            if movimiento is not None:
+                movimiento.reiniciar_segmentacion()
+            self.activo = movimiento
+        if movimiento is None:
+            return
+        visibles = int(rasgos["visibles"])
+        if visibles & movimiento.mascara != movimiento.mascara:
+            return
+        for repeticion in movimiento.actualizar(tiempo, rasgos["angulos_estandar"].tolist()):
+            if self.al_evento is not None:
+                self.al_evento("repeticion", repeticion)
+
+    def dibujar(self, frame, nombre):
+        """Panel con la última repetición del movimiento `nombre` (campo "movimiento" del nivel)."""
+        movimiento = self.movimientos.get(nombre)
+        if movimiento is None or movimiento.ultima is None:
+            return
+        h, w = frame.shape[:2]
+        ultima = movimiento.ultima
+        rom = movimiento.ventana["rom"]
+        lineas = [
+            f"{movimiento.nombre.replace('_', ' ').upper()}  x{movimiento.repeticiones}",
+            f"Tempo {ultima['duracion']:.1f}s (baja {ultima['bajada']:.1f} / sube {ultima['subida']:.1f})",
+            f"Rango {ultima['rom']:.0f} grados, minimo {ultima['minimo']:.0f}",
+            f"Media {rom.media:.0f} +/- {math.sqrt(rom.varianza):.0f} grados ({len(rom)} reps)",
+        ]
+        if ultima["simetria"] is not None:
+            lineas.append(f"Simetria {ultima['simetria']:.0%}")
+        x0, y1 = 10, h - 40
+        y0 = y1 - 22 * len(lineas) - 10
+        panel_translucido(frame, x0, y0, x0 + 330, y1, (30, 20, 10), 0.6)
+        for i, linea in enumerate(lineas):
+            dibujar_texto(frame, linea, (x0 + 10, y0 + 24 + 22 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                          (255, 230, 180), 1)
+
+    def resumen(self):
+        """Líneas con las estadísticas de sesión de cada movimiento con repeticiones."""
+        lineas = []
+        for movimiento in self.movimientos.values():
+            if not movimiento.repeticiones:
+                continue
+            sesion = movimiento.sesion
+            linea = (f"{movimiento.nombre}: {movimiento.repeticiones} reps, tempo {sesion['duracion'].media:.1f}s, "
+                     f"rango {sesion['rom'].media:.0f} +/- {math.sqrt(sesion['rom'].varianza):.0f} grados, "
+                     f"minimo {sesion['minimo'].minimo:.0f}")
+            if sesion["simetria"].n:
+                linea += f", simetria {sesion['simetria'].media:.0%}"
+            lineas.append(linea)
+        return lineas
@@ -1,208 +1,645 @@
+import argparse
+import signal
 import cv2
 import time
 import mediapipe as mp
 import numpy as np
 
 # Importar las funciones de gestos extendidas
-from gestures import (
-    brazo_derecho_arriba,
-    rodilla_izquierda_flexionada,
-    equilibrio_estable,
-    extension_adelante,
-    inclinacion_lateral,
-    elevacion_rodilla,
-    postura_ergonomica,
-    sentadilla,
-    brazos_en_cruz,
-    postura_guerrero,
-    postura_guerrero_3d,
-    salto_detectado
-)
+from gestures import detectar_gesto
+from analitica import AnaliticaRepeticiones
+from fuentes import abrir_fuente, EscritorFrames
+from buffers import PoolBuffers, a_rgb, espejar, leer
+from calidad import ControladorCalidad, NIVELES_CALIDAD, NIVELES_CALIDAD_ALTA
+from extrapolacion import ExtrapoladorLandmarks
 from game_logic import Game
-
-
-def dibujar_skeleton_mejorado(frame, landmarks, connections, mp_pose):
+from grabacion import GrabadorLandmarks
+from historial import AlmacenSesiones
+from metricas import Metricas
+from multipersona import PartidaMultiple, PoseMultiple
+from perfilador import PerfiladorMuestreo
+from rasgos import RasgosFrame
+from pipeline import Pipeline
+from seguimiento import SeguimientoROI
+from sprites import dibujar_texto, panel_translucido
+from utils import BITS_LANDMARKS, landmarks_a_array, mascara_visibilidad, NUM_LANDMARKS, X, Y, Z
+
+
+# Tono de OpenCV (0-179) -> color BGR con saturación 255 y brillo 200
+_COLOR_TONO = [tuple(map(int, c)) for c in cv2.cvtColor(
+    np.array([[(tono, 255, 200) for tono in range(180)]], dtype=np.uint8), cv2.COLOR_HSV2BGR)[0]]
+_conexiones = {}  # id(connections) -> (connections, array (N, 2) de índices)
+DIFICULTADES_TECLA = {ord("1"): "facil", ord("2"): "normal", ord("3"): "dificil"}
+
+
+def _indices_conexiones(connections):
+    """Convierte una vez las conexiones de MediaPipe en un array de índices (N, 2)."""
+    entrada = _conexiones.get(id(connections))
+    if entrada is None or entrada[0] is not connections:
+        entrada = (connections, np.array([tuple(c) for c in connections], dtype=np.intp).reshape(-1, 2))
+        _conexiones[id(connections)] = entrada
+    return entrada[1]
+
+
+def dibujar_skeleton_mejorado(frame, puntos, visibles, connections, mp_pose):
     """Dibuja el esqueleto con colores dinámicos y efectos."""
-    tiempo_actual = time.time()
     # Color dinámico
-    hue = int((tiempo_actual * 50) % 180)
-    color_base = cv2.cvtColor(np.uint8([[[hue, 255, 200]]]), cv2.COLOR_HSV2BGR)[0][0]
-    color_landmark = tuple(map(int, color_base))
+    color_landmark = _COLOR_TONO[int((time.time() * 50) % 180)]
+    
+    h, w = frame.shape[:2]
+    # Todos los landmarks a píxeles de una vez (int() trunca hacia cero, igual que astype)
+    pixeles = (puntos[:, [X, Y]] * np.array([w, h], dtype=puntos.dtype)).astype(np.int32)
+    visible = (int(visibles) & BITS_LANDMARKS) != 0
+    
+    # Líneas: todas las conexiones visibles en una sola llamada
+    conexiones = _indices_conexiones(connections)
+    conexiones = conexiones[visible[conexiones].all(axis=1)]
+    if len(conexiones):
+        cv2.polylines(frame, pixeles[conexiones], False, (100, 255, 100), 3, cv2.LINE_AA)
     
-    for connection in connections:
-        start_idx = connection[0]
-        end_idx = connection[1]
-        
-        start_point = landmarks[start_idx]
-        end_point = landmarks[end_idx]
-        
-        if start_point.visibility > 0.5 and end_point.visibility > 0.5:
-            h, w = frame.shape[:2]
-            start = (int(start_point.x * w), int(start_point.y * h))
-            end = (int(end_point.x * w), int(end_point.y * h))
-            
-                # Línea
-            cv2.line(frame, start, end, (100, 255, 100), 3, cv2.LINE_AA)
+    # Dibujar landmarks
+    for centro in pixeles[visible].tolist():
+        cv2.circle(frame, centro, 8, color_landmark, -1)
+        # Círculo interior
+        cv2.circle(frame, centro, 4, (255, 255, 255), -1)
+
+
+def _guia_brazo_arriba(frame, rasgos, world):
+    """Flecha hacia arriba sobre el hombro derecho."""
+    h, w = frame.shape[:2]
+    puntos = rasgos.puntos
+    hombro = puntos[12]
+    hombro_pos = (int(hombro[X] * w), int(hombro[Y] * h))
+    cv2.arrowedLine(frame, hombro_pos, (hombro_pos[0], hombro_pos[1] - 150), 
+                   (0, 255, 255), 3, tipLength=0.3)
+    dibujar_texto(frame, "ARRIBA", (hombro_pos[0] - 40, hombro_pos[1] - 160), 
+                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+
+def _guia_extension(frame, rasgos, world):
+    """Círculo en el centro de los hombros para extender los brazos."""
+    h, w = frame.shape[:2]
+    centro = rasgos["centro_hombros"]
+    centro_x = int(centro[X] * w)
+    centro_y = int(centro[Y] * h)
     
-            # Dibujar landmarks
-    for idx, landmark in enumerate(landmarks):
-        if landmark.visibility > 0.5:
-            h, w = frame.shape[:2]
-            cx, cy = int(landmark.x * w), int(landmark.y * h)
-            
-            cv2.circle(frame, (cx, cy), 8, color_landmark, -1)
-            # Círculo interior
-            cv2.circle(frame, (cx, cy), 4, (255, 255, 255), -1)
-
-
-def dibujar_guias_visuales(frame, game, landmarks, world_landmarks=None):
-    """Dibuja guías visuales según el nivel actual."""
+    cv2.circle(frame, (centro_x, centro_y), 60, (255, 200, 0), 3)
+    dibujar_texto(frame, "EXTIENDE", (centro_x - 60, centro_y - 80), 
+                 cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 200, 0), 2)
+
+
+def _guia_sentadilla(frame, rasgos, world):
+    """Flecha hacia abajo sobre las rodillas."""
+    h, w = frame.shape[:2]
+    centro = rasgos["centro_rodillas"]
+    centro_x = int(centro[X] * w)
+    centro_y = int(centro[Y] * h)
+
+    cv2.arrowedLine(frame, (centro_x, centro_y - 50), (centro_x, centro_y + 50), 
+                   (100, 255, 255), 3, tipLength=0.3)
+    dibujar_texto(frame, "BAJA", (centro_x - 40, centro_y + 80), 
+                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (100, 255, 255), 2)
+
+
+def _guia_guerrero(frame, rasgos, world):
+    """Pierna adelantada, brazos, torso y panel tutorial de la postura del guerrero."""
     h, w = frame.shape[:2]
+    puntos = rasgos.puntos
+    # Landmarks relevantes
+    hombro_i = puntos[11]
+    hombro_d = puntos[12]
+    cadera_i = puntos[23]
+    cadera_d = puntos[24]
+    rodilla_i = puntos[25]
+    rodilla_d = puntos[26]
+    tobillo_i = puntos[27]
+    tobillo_d = puntos[28]
+
+    # Determinar qué pierna está delante (usar Z si está disponible)
+    if world is not None:
+        frente_izq = world[25, Z] < world[26, Z]
+    else:
+        frente_izq = rodilla_i[Z] < rodilla_d[Z]
+
+    # Resaltar la pierna adelante
+    if frente_izq:
+        hip = (int(cadera_i[X] * w), int(cadera_i[Y] * h))
+        knee = (int(rodilla_i[X] * w), int(rodilla_i[Y] * h))
+        ankle = (int(tobillo_i[X] * w), int(tobillo_i[Y] * h))
+    else:
+        hip = (int(cadera_d[X] * w), int(cadera_d[Y] * h))
+        knee = (int(rodilla_d[X] * w), int(rodilla_d[Y] * h))
+        ankle = (int(tobillo_d[X] * w), int(tobillo_d[Y] * h))
+
+    # Pierna adelante: líneas resaltadas
+    cv2.line(frame, hip, knee, (0, 200, 255), 4, cv2.LINE_AA)
+    cv2.line(frame, knee, ankle, (0, 200, 255), 4, cv2.LINE_AA)
+    cv2.circle(frame, ankle, 8, (0, 200, 255), -1)
+    dibujar_texto(frame, "Pierna adelante", (knee[0] - 60, knee[1] - 18),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
+
+    # Brazos: guía horizontal a la altura de hombros
+    left_sh = (int(hombro_i[X] * w), int(hombro_i[Y] * h))
+    right_sh = (int(hombro_d[X] * w), int(hombro_d[Y] * h))
+    cv2.line(frame, (left_sh[0] - 80, left_sh[1]), (right_sh[0] + 80, right_sh[1]), (200, 200, 0), 3, cv2.LINE_AA)
+    dibujar_texto(frame, "Extiende los brazos", (left_sh[0] - 80, left_sh[1] - 12),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 0), 2)
+
+    # Torso: recta guía cadera->hombro
+    centro_caderas = rasgos["centro_caderas"]
+    centro_hombros = rasgos["centro_hombros"]
+    mid_hip = (int(centro_caderas[X] * w), int(centro_caderas[Y] * h))
+    mid_sh = (int(centro_hombros[X] * w), int(centro_hombros[Y] * h))
+    cv2.line(frame, mid_hip, mid_sh, (150, 255, 150), 2, cv2.LINE_AA)
+    dibujar_texto(frame, "Torso erguido", (mid_sh[0] - 40, mid_sh[1] - 12),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.55, (150, 255, 150), 2)
+
+    # Panel tutorial (izquierda, abajo)
+    panel_w, panel_h = 340, 140
+    panel_x, panel_y = 20, h - panel_h - 20
+    panel_translucido(frame, panel_x, panel_y, panel_x + panel_w, panel_y + panel_h, (20, 30, 40), 0.6)
+    cv2.rectangle(frame, (panel_x, panel_y), (panel_x + panel_w, panel_y + panel_h), (100, 200, 255), 2)
+
+    pasos = [
+        "1) Da un paso delantero con la pierna que elijas.",
+        "2) Dobla la rodilla delantera ~90° (rodilla alineada).",
+        "3) Mantén la pierna trasera recta y el talón apoyado.",
+        "4) Extiende los brazos a la altura de los hombros.",
+        "5) Mantén el torso erguido y mirada al frente."
+    ]
+
+    for i, texto in enumerate(pasos):
+        y = panel_y + 25 + i * 22
+        dibujar_texto(frame, texto, (panel_x + 12, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (230, 230, 230), 1)
+
+    # Sugerencia adicional (si detecta profundidad prominente)
+    if world is not None:
+        depth_diff = abs(world[25, Z] - world[26, Z])
+    else:
+        depth_diff = abs(rodilla_i[Z] - rodilla_d[Z])
+
+    if depth_diff > 0.18:
+        hint = "Consejo: asegurate de que la rodilla delantera no sobrepase los dedos del pie."
+        dibujar_texto(frame, hint, (20, h - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 120), 1)
+
+
+# Guías visuales por nombre (campo "guia" de niveles.NIVELES)
+GUIAS = {
+    "brazo_arriba": _guia_brazo_arriba,
+    "extension": _guia_extension,
+    "sentadilla": _guia_sentadilla,
+    "guerrero": _guia_guerrero,
+}
+
+
+def dibujar_guias_visuales(frame, game, rasgos, world=None):
+    """Dibuja la guía visual del nivel actual (rasgos: RasgosFrame del frame)."""
+    programa = game.programa
+    guia = GUIAS.get(programa.guia) if programa is not None else None
+    if guia is not None:
+        guia(frame, rasgos, world)
+
+
+class EstadoApp:
+    """Estado de la interfaz que comparten las etapas del bucle principal."""
+
+    def __init__(self, mp_pose, modo_espejo=True):
+        self.mp_pose = mp_pose
+        self.modo_espejo = modo_espejo
+        self.pantalla_completa = False
+        self.mostrar_guias = True
+        self.window_name = "Home trainer 1.0"
+        self.grabador = None  # GrabadorLandmarks opcional (--grabar)
+        self.headless = False  # Sin ventana ni teclado (--headless)
+        self.escritor = None  # EscritorFrames opcional para los frames anotados (--salida)
+        self.inferir_cada = 1  # Inferencia solo en uno de cada N frames (--inferir-cada)
+        self.metricas = Metricas()  # Latencia por etapa (overlay con T, exportación con --metricas)
+        self.perfilador = PerfiladorMuestreo()  # Perfil por muestreo bajo demanda (tecla P o SIGUSR1)
+        self.buffers = PoolBuffers()  # Frames reutilizados entre iteraciones (lectura, espejo, RGB)
+        self.analitica = AnaliticaRepeticiones()  # Tempo, rango y simetría de cada repetición
+        self.duracion_perfil = 10.0
+        self.alternar_perfil = False  # Petición de SIGUSR1, atendida en el siguiente frame
+
+
+def procesar_frame(frame, puntos, visibles, world, tiempo, game, app, extrapolado=False):
+    """Dibuja esqueleto y guías, detecta el gesto del nivel y actualiza juego y HUD.
+
+    extrapolado: los landmarks no salen del modelo sino de la extrapolación entre
+    frames clave; se dibujan y se evalúan, pero no se graban ni completan niveles.
+    """
+    metricas = app.metricas
+    t = time.perf_counter()
+    if app.grabador is not None and not extrapolado:
+        app.grabador.grabar(tiempo, puntos, world)
+        t = metricas.medir("grabacion", t)
+
+    if puntos is not None:
+        # Rasgos derivados del frame, compartidos por guías y detector
+        rasgos = RasgosFrame(puntos, visibles)
+
+        # Dibujar esqueleto mejorado
+        dibujar_skeleton_mejorado(frame, puntos, visibles, app.mp_pose.POSE_CONNECTIONS, app.mp_pose)
+        t = metricas.medir("esqueleto", t)
+
+        # Solo detectar gestos si estamos jugando o mostrando instrucciones
+        if game.estado in ["jugando", "mostrando_instruccion"]:
+            # Dibujar guías visuales si están activadas
+            if app.mostrar_guias:
+                dibujar_guias_visuales(frame, game, rasgos, world)
+                t = metricas.medir("guias", t)
+
+            # === DETECCIÓN DE GESTOS POR NIVEL ===
+            gesto_ok, checks_debug = detectar_gesto(game, rasgos, visibles, world, espejo=app.modo_espejo,
+                                                    extrapolado=extrapolado)
+            t = metricas.medir("detector", t)
+
+            # Mostrar debug de la postura del guerrero 3D en pantalla
+            if checks_debug:
+                debug_y = 200
+                for check_name, (check_ok, check_val) in checks_debug.items():
+                    color = (0, 255, 0) if check_ok else (0, 0, 255)
+                    cv2.putText(frame, f"{check_name}: {check_val}", (20, debug_y), 
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+                    debug_y += 20
+
+            # Actualizar el juego
+            t = time.perf_counter()
+            game.actualizar(gesto_ok, tiempo, extrapolado)
+            t = metricas.medir("actualizar", t)
+
+            # Analítica de repeticiones: solo con landmarks reales del modelo
+            if game.estado == "jugando" and not extrapolado:
+                app.analitica.actualizar(rasgos, tiempo, game.programa.movimiento)
+                t = metricas.medir("analitica", t)
+
+    # Mostrar interfaz del juego
+    game.dibujar_hud(frame)
+    if game.estado == "jugando":
+        app.analitica.dibujar(frame, game.programa.movimiento)
+    t = metricas.medir("hud", t)
+    game.mostrar_instrucciones(frame)
+    metricas.medir("instrucciones", t)
+
+    # Indicador de guías visuales
+    if game.estado == "jugando" and app.mostrar_guias:
+        dibujar_texto(frame, "Guias: ON", (10, frame.shape[0] - 20), 
+                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 255, 100), 1)
+
+    metricas.dibujar(frame)
+
+
+def manejar_tecla(key, game, app):
+    """Aplica los controles de teclado. Devuelve False si hay que salir."""
+    # Salir
+    if key in [ord("q"), 27]:
+        return False
     
-    # Nivel 1: brazo derecho arriba
-    if game.nivel == 1:
-        hombro = landmarks[12]
-        hombro_pos = (int(hombro.x * w), int(hombro.y * h))
-        cv2.arrowedLine(frame, hombro_pos, (hombro_pos[0], hombro_pos[1] - 150), 
-                       (0, 255, 255), 3, tipLength=0.3)
-        cv2.putText(frame, "ARRIBA", (hombro_pos[0] - 40, hombro_pos[1] - 160), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+    # Comenzar juego desde menú
+    if key == ord(" ") and game.estado == "menu":
+        game.iniciar_juego()
     
-    # Nivel 4: extensión adelante
-    elif game.nivel == 4:
-        hombro_i = landmarks[11]
-        hombro_d = landmarks[12]
-        centro_x = int((hombro_i.x + hombro_d.x) / 2 * w)
-        centro_y = int((hombro_i.y + hombro_d.y) / 2 * h)
-        
-        cv2.circle(frame, (centro_x, centro_y), 60, (255, 200, 0), 3)
-        cv2.putText(frame, "EXTIENDE", (centro_x - 60, centro_y - 80), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 200, 0), 2)
+    # Cambiar dificultad en menú
+    if game.estado == "menu":
+        if key == ord("1"):
+            game.cambiar_dificultad("facil")
+            print("Dificultad: FÁCIL")
+        elif key == ord("2"):
+            game.cambiar_dificultad("normal")
+            print("Dificultad: NORMAL")
+        elif key == ord("3"):
+            game.cambiar_dificultad("dificil")
+            print("Dificultad: DIFÍCIL")
     
-    # Nivel 8: sentadilla
-    elif game.nivel == 8:
-        rodilla_i = landmarks[25]
-        rodilla_d = landmarks[26]
-        centro_x = int((rodilla_i.x + rodilla_d.x) / 2 * w)
-        centro_y = int((rodilla_i.y + rodilla_d.y) / 2 * h)
-
-        cv2.arrowedLine(frame, (centro_x, centro_y - 50), (centro_x, centro_y + 50), 
-                       (100, 255, 255), 3, tipLength=0.3)
-        cv2.putText(frame, "BAJA", (centro_x - 40, centro_y + 80), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (100, 255, 255), 2)
-
-    # Nivel 10: Postura del Guerrero
-    elif game.nivel == 10:
-        # Landmarks relevantes
-        hombro_i = landmarks[11]
-        hombro_d = landmarks[12]
-        cadera_i = landmarks[23]
-        cadera_d = landmarks[24]
-        rodilla_i = landmarks[25]
-        rodilla_d = landmarks[26]
-        tobillo_i = landmarks[27]
-        tobillo_d = landmarks[28]
-        muneca_i = landmarks[15]
-        muneca_d = landmarks[16]
-
-        # Determinar qué pierna está delante (usar Z si está disponible)
-        if world_landmarks is not None:
-            try:
-                frente_izq = world_landmarks[25].z < world_landmarks[26].z
-            except Exception:
-                frente_izq = rodilla_i.x < rodilla_d.x
-        else:
-            try:
-                frente_izq = rodilla_i.z < rodilla_d.z
-            except Exception:
-                frente_izq = rodilla_i.x < rodilla_d.x
-
-        # Resaltar la pierna adelante
-        if frente_izq:
-            hip = (int(cadera_i.x * w), int(cadera_i.y * h))
-            knee = (int(rodilla_i.x * w), int(rodilla_i.y * h))
-            ankle = (int(tobillo_i.x * w), int(tobillo_i.y * h))
-        else:
-            hip = (int(cadera_d.x * w), int(cadera_d.y * h))
-            knee = (int(rodilla_d.x * w), int(rodilla_d.y * h))
-            ankle = (int(tobillo_d.x * w), int(tobillo_d.y * h))
-
-        # Pierna adelante: líneas resaltadas
-        cv2.line(frame, hip, knee, (0, 200, 255), 4, cv2.LINE_AA)
-        cv2.line(frame, knee, ankle, (0, 200, 255), 4, cv2.LINE_AA)
-        cv2.circle(frame, ankle, 8, (0, 200, 255), -1)
-        cv2.putText(frame, "Pierna adelante", (knee[0] - 60, knee[1] - 18),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
-
-        # Brazos: guía horizontal a la altura de hombros
-        left_sh = (int(hombro_i.x * w), int(hombro_i.y * h))
-        right_sh = (int(hombro_d.x * w), int(hombro_d.y * h))
-        cv2.line(frame, (left_sh[0] - 80, left_sh[1]), (right_sh[0] + 80, right_sh[1]), (200, 200, 0), 3, cv2.LINE_AA)
-        cv2.putText(frame, "Extiende los brazos", (left_sh[0] - 80, left_sh[1] - 12),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 0), 2)
-
-        # Torso: recta guía cadera->hombro
-        mid_hip = (int((cadera_i.x + cadera_d.x) / 2 * w), int((cadera_i.y + cadera_d.y) / 2 * h))
-        mid_sh = (int((hombro_i.x + hombro_d.x) / 2 * w), int((hombro_i.y + hombro_d.y) / 2 * h))
-        cv2.line(frame, mid_hip, mid_sh, (150, 255, 150), 2, cv2.LINE_AA)
-        cv2.putText(frame, "Torso erguido", (mid_sh[0] - 40, mid_sh[1] - 12),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.55, (150, 255, 150), 2)
-
-        # Panel tutorial (izquierda, abajo)
-        panel_w, panel_h = 340, 140
-        panel_x, panel_y = 20, h - panel_h - 20
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (panel_x, panel_y), (panel_x + panel_w, panel_y + panel_h), (20, 30, 40), -1)
-        cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
-        cv2.rectangle(frame, (panel_x, panel_y), (panel_x + panel_w, panel_y + panel_h), (100, 200, 255), 2)
-
-        pasos = [
-            "1) Da un paso delantero con la pierna que elijas.",
-            "2) Dobla la rodilla delantera ~90° (rodilla alineada).",
-            "3) Mantén la pierna trasera recta y el talón apoyado.",
-            "4) Extiende los brazos a la altura de los hombros.",
-            "5) Mantén el torso erguido y mirada al frente."
-        ]
-
-        for i, texto in enumerate(pasos):
-            y = panel_y + 25 + i * 22
-            cv2.putText(frame, texto, (panel_x + 12, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (230, 230, 230), 1)
-
-        # Sugerencia adicional (si detecta profundidad prominente)
-        depth_diff = None
-        if world_landmarks is not None:
-            try:
-                depth_diff = abs(world_landmarks[25].z - world_landmarks[26].z)
-            except Exception:
-                depth_diff = abs(rodilla_i.z - rodilla_d.z)
+    # Reiniciar juego
+    if key == ord("r") and game.estado == "completado":
+        game.reiniciar()
+    
+    # Volver al menú
+    if key == ord("m") and game.estado == "completado":
+        game.volver_al_menu()
+    
+    # Alternar pantalla completa
+    if key in [ord("f"), ord("F")]:
+        app.pantalla_completa = not app.pantalla_completa
+        if app.pantalla_completa:
+            cv2.setWindowProperty(app.window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+            print("Modo pantalla completa activado")
         else:
-            depth_diff = abs(rodilla_i.z - rodilla_d.z)
+            cv2.setWindowProperty(app.window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
+            print("Modo ventana normal activado")
+    
+    # Perfil por muestreo durante app.duracion_perfil segundos (P de nuevo lo detiene antes)
+    if key in [ord("p"), ord("P")] or app.alternar_perfil:
+        app.alternar_perfil = False
+        app.perfilador.alternar(app.duracion_perfil)
+
+    # Mostrar/ocultar latencias por etapa
+    if key in [ord("t"), ord("T")]:
+        app.metricas.visible = not app.metricas.visible
+
+    # Alternar guías visuales
+    if key == ord("g") or key == ord("G"):
+        app.mostrar_guias = not app.mostrar_guias
+        print(f"Guías visuales: {'ON' if app.mostrar_guias else 'OFF'}")
+
+    return True
+
+
+def mostrar_frame(frame, app):
+    """Muestra (y/o guarda) el frame anotado. Devuelve la tecla pulsada (255 si ninguna)."""
+    if app.escritor is not None:
+        app.escritor.escribir(frame)
+    if app.headless:
+        return 255
+    t = time.perf_counter()
+    cv2.imshow(app.window_name, frame)
+    t = app.metricas.medir("imshow", t)
+    key = cv2.waitKey(1) & 0xFF
+    app.metricas.medir("waitkey", t)
+    return key
+
+
+def bucle_serie(cap, pose, game, app, al_frame=None):
+    """Bucle clásico: captura, inferencia y render uno tras otro en el hilo principal.
+
+    al_frame: función opcional llamada con el juego tras cada frame (p. ej. para informar del estado).
+    """
+    # Buffers reutilizados para la instantánea de landmarks de cada frame
+    buffer_puntos = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    buffer_world = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    extrapolador = ExtrapoladorLandmarks() if app.inferir_cada > 1 else None
+    n_frame = 0
+
+    metricas = app.metricas
+    pool = app.buffers
+    forma = None  # Forma de los frames de la fuente, conocida tras la primera lectura
+    frame = None
+    while cap.isOpened():
+        # El frame anterior ya se mostró: su buffer vuelve al pool
+        pool.devolver(frame)
+        metricas.fin_frame()
+        t = time.perf_counter()
+        ret, frame = leer(cap, pool, forma)
+        if not ret:
+            break
+        forma = frame.shape
+        t = metricas.medir("lectura", t)
+
+        if app.modo_espejo:
+            frame = espejar(frame, pool)
+            t = metricas.medir("espejo", t)
+
+        # Entre frames clave los landmarks se extrapolan sin ejecutar el modelo
+        n_frame += 1
+        if extrapolador is not None and n_frame % app.inferir_cada != 1:
+            tiempo = time.time()
+            prediccion = extrapolador.predecir(tiempo)
+            puntos, visibles, world = prediccion if prediccion is not None else (None, None, None)
+            metricas.medir("extrapolacion", t)
+            procesar_frame(frame, puntos, visibles, world, tiempo, game, app, extrapolado=True)
+            if al_frame is not None:
+                al_frame(game)
+            if not manejar_tecla(mostrar_frame(frame, app), game, app):
+                break
+            continue
+
+        frame_rgb = a_rgb(frame, pool)
+        t = metricas.medir("cvtcolor", t)
+        result = pose.process(frame_rgb)
+        pool.devolver(frame_rgb)
+        t = metricas.medir("pose", t)
+        tiempo = time.time()
+
+        puntos = visibles = world = None
+        if result.pose_landmarks:
+            # Instantánea única del frame: (33, 4) float32 + máscara de visibilidad
+            puntos = landmarks_a_array(result.pose_landmarks.landmark, buffer_puntos)
+            visibles = mascara_visibilidad(puntos)
+
+            # Extraer world landmarks 3D si están disponibles
+            if hasattr(result, 'pose_world_landmarks') and result.pose_world_landmarks:
+                world = landmarks_a_array(result.pose_world_landmarks.landmark, buffer_world)
+            metricas.medir("landmarks", t)
 
-        if depth_diff > 0.18:
-            hint = "Consejo: asegurate de que la rodilla delantera no sobrepase los dedos del pie."
-            cv2.putText(frame, hint, (20, h - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 120), 1)
+        if extrapolador is not None:
+            extrapolador.actualizar(tiempo, puntos, visibles, world)
 
+        procesar_frame(frame, puntos, visibles, world, tiempo, game, app)
+        if al_frame is not None:
+            al_frame(game)
 
-def main():
-    # === CONFIGURACIÓN ===
-    modo_espejo = True
-    pantalla_completa = False
-    cap = cv2.VideoCapture(0)
+        # Ventana de cámara
+        key = mostrar_frame(frame, app)
+
+        # === CONTROLES ===
+        if not manejar_tecla(key, game, app):
+            break
 
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
 
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(
+def bucle_pipeline(cap, pose, game, app, intervalo_informe=5.0, al_frame=None):
+    """Bucle con captura e inferencia en hilos; el render se queda en el hilo principal."""
+    pipeline = Pipeline(cap, pose, app.modo_espejo, metricas=app.metricas, buffers=app.buffers)
+    pipeline.iniciar()
+    ultimo_informe = time.time()
+
+    try:
+        while not pipeline.terminado():
+            item = pipeline.siguiente()
+            if item is not None:
+                frame, puntos, visibles, world, tiempo = item
+                app.metricas.fin_frame()
+                procesar_frame(frame, puntos, visibles, world, tiempo, game, app)
+                if al_frame is not None:
+                    al_frame(game)
+                key = mostrar_frame(frame, app)
+                app.buffers.devolver(frame)
+                pipeline.render.marcar()
+            elif not app.headless:
+                # Los controles se atienden aunque no haya frame nuevo
+                key = cv2.waitKey(1) & 0xFF
+            else:
+                continue
+
+            if not manejar_tecla(key, game, app):
+                break
+
+            if time.time() - ultimo_informe >= intervalo_informe:
+                print(pipeline.resumen())
+                ultimo_informe = time.time()
+    finally:
+        pipeline.parar()
+        print(pipeline.resumen())
+
+
+def bucle_multipersona(cap, pose, partida, game, app, al_frame=None):
+    """Bucle serie con varias personas: una inferencia por frame y una partida por persona.
+
+    game: juego de un solo jugador, que solo sirve para las teclas generales. Las
+    teclas 1, 2 y 3 cambian en cualquier momento la dificultad de todos los jugadores.
+    """
+    metricas = app.metricas
+    pool = app.buffers
+    forma = None
+    frame = None
+    while cap.isOpened():
+        pool.devolver(frame)
+        metricas.fin_frame()
+        t = time.perf_counter()
+        ret, frame = leer(cap, pool, forma)
+        if not ret:
+            break
+        forma = frame.shape
+        t = metricas.medir("lectura", t)
+
+        if app.modo_espejo:
+            frame = espejar(frame, pool)
+            t = metricas.medir("espejo", t)
+
+        frame_rgb = a_rgb(frame, pool)
+        t = metricas.medir("cvtcolor", t)
+        puntos, world = pose.detectar(frame_rgb)
+        pool.devolver(frame_rgb)
+        t = metricas.medir("pose", t)
+        tiempo = time.time()
+
+        # Todas las personas en una pasada: identidades, detectores y partidas
+        visibles = mascara_visibilidad(puntos)
+        partida.actualizar(puntos, visibles, world, tiempo, espejo=app.modo_espejo)
+        t = metricas.medir("detector", t)
+
+        for persona, visibles_persona in zip(puntos, visibles):
+            dibujar_skeleton_mejorado(frame, persona, visibles_persona, app.mp_pose.POSE_CONNECTIONS, app.mp_pose)
+        t = metricas.medir("esqueleto", t)
+        partida.dibujar(frame, puntos)
+        metricas.medir("hud", t)
+        metricas.dibujar(frame)
+
+        if al_frame is not None:
+            al_frame(game)
+        key = mostrar_frame(frame, app)
+        dificultad = DIFICULTADES_TECLA.get(key)
+        if dificultad is not None and dificultad != partida.dificultad:
+            partida.cambiar_dificultad(dificultad)
+            print(f"Dificultad de todos los jugadores: {dificultad.upper()}")
+        if not manejar_tecla(key, game, app):
+            break
+
+
+def crear_pose(mp_pose, complejidad=1):
+    """Modelo de pose de MediaPipe con la configuración del juego."""
+    return mp_pose.Pose(
         min_detection_confidence=0.5,
         min_tracking_confidence=0.5,
-        model_complexity=1
+        model_complexity=complejidad
     )
-    drawing = mp.solutions.drawing_utils
-    game = Game()
 
-    window_name = "Home trainer 1.0"
-    cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+
+def crear_pose_adaptativa(mp_pose, presupuesto_ms, complejidad_2=False):
+    """Pose que adapta complejidad y resolución al presupuesto (ms); fija si presupuesto_ms <= 0.
+
+    Sin complejidad_2 nunca supera la configuración clásica (complexity 1, resolución completa).
+    """
+    if presupuesto_ms <= 0:
+        return crear_pose(mp_pose)
+    return ControladorCalidad(lambda complejidad: crear_pose(mp_pose, complejidad),
+                              presupuesto=presupuesto_ms / 1000,
+                              niveles=NIVELES_CALIDAD_ALTA if complejidad_2 else NIVELES_CALIDAD)
+
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Home Trainer 1.0")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="captura e inferencia en hilos separados del render (menor latencia)")
+    parser.add_argument("--grabar", metavar="RUTA",
+                        help="graba los landmarks de cada frame para reproducirlos con grabacion.py")
+    parser.add_argument("--fuente", metavar="ORIGEN",
+                        help="índice de cámara, fichero de vídeo, directorio de imágenes "
+                             "o 'sintetica[:N]' (por defecto, la cámara 0)")
+    parser.add_argument("--headless", action="store_true",
+                        help="sin ventana: el juego arranca solo y termina al agotarse la fuente")
+    parser.add_argument("--salida", metavar="RUTA",
+                        help="guarda los frames anotados en un vídeo (.avi/.mp4) o en un directorio")
+    parser.add_argument("--sin-espejo", action="store_true", help="no reflejar horizontalmente la imagen")
+    parser.add_argument("--presupuesto", type=float, default=33.0, metavar="MS",
+                        help="latencia objetivo de la inferencia en ms: se ajustan model_complexity "
+                             "y la resolución de entrada para cumplirla (0 = modelo fijo)")
+    parser.add_argument("--complejidad-2", action="store_true",
+                        help="con --presupuesto, permite subir a model_complexity=2 cuando sobra margen")
+    parser.add_argument("--inferir-cada", type=int, default=1, metavar="N",
+                        help="ejecuta el modelo solo en uno de cada N frames y extrapola los "
+                             "landmarks en los demás (modo serie)")
+    parser.add_argument("--metricas", metavar="RUTA",
+                        help="exporta periódicamente la latencia por etapa (p50/p95/p99) a RUTA: "
+                             "JSON si termina en .json, texto de Prometheus en otro caso")
+    parser.add_argument("--intervalo-metricas", type=float, default=5.0, metavar="S",
+                        help="segundos entre exportaciones de --metricas")
+    parser.add_argument("--perfil-segundos", type=float, default=10.0, metavar="S",
+                        help="duración de cada perfil por muestreo (tecla P o señal SIGUSR1)")
+    parser.add_argument("--perfil-dir", default=".", metavar="DIR",
+                        help="directorio donde se guardan los perfiles (pilas colapsadas)")
+    parser.add_argument("--seguimiento", action="store_true",
+                        help="inferencia sobre un recorte alrededor de la persona detectada en el "
+                             "frame anterior (frame completo cuando se pierde)")
+    parser.add_argument("--personas", type=int, default=1, metavar="N",
+                        help="modo multijugador: hasta N personas a la vez, cada una con su "
+                             "partida (necesita --modelo-pose)")
+    parser.add_argument("--modelo-pose", metavar="RUTA",
+                        help="fichero .task del pose landmarker de MediaPipe para --personas")
+    parser.add_argument("--usuario", default="invitado",
+                        help="nombre con el que se guardan las partidas en el historial")
+    parser.add_argument("--historial", default="historial.db", metavar="RUTA",
+                        help="base de datos SQLite del historial de partidas (por defecto historial.db)")
+    parser.add_argument("--sin-historial", action="store_true", help="no guardar las partidas")
+    args = parser.parse_args(argv)
+    if args.personas > 1 and not args.modelo_pose:
+        parser.error("--personas necesita --modelo-pose (fichero .task del pose landmarker)")
+    return args
+
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+
+    # === CONFIGURACIÓN ===
+    cap = abrir_fuente(args.fuente, 1280, 720)
+
+    mp_pose = mp.solutions.pose
+    # Historial: los eventos se guardan desde un hilo aparte, sin esperas en el bucle
+    almacen = None if args.sin_historial else AlmacenSesiones(args.historial)
+    partida = None
+    if args.personas > 1:
+        pose = PoseMultiple(args.modelo_pose, args.personas)
+        partida = PartidaMultiple(almacen=almacen, usuario=args.usuario)
+    else:
+        pose = crear_pose_adaptativa(mp_pose, args.presupuesto, args.complejidad_2)
+        if args.seguimiento:
+            pose = SeguimientoROI(pose)
+    drawing = mp.solutions.drawing_utils
+    registro = None
+    if almacen is not None and partida is None:
+        registro = almacen.sesion(args.usuario)
+    game = Game(al_evento=registro)
+    app = EstadoApp(mp_pose, modo_espejo=not args.sin_espejo)
+    app.headless = args.headless
+    app.inferir_cada = max(args.inferir_cada, 1)
+    app.metricas = Metricas(args.metricas, args.intervalo_metricas)
+    app.perfilador = PerfiladorMuestreo(directorio=args.perfil_dir)
+    app.duracion_perfil = args.perfil_segundos
+    app.analitica = AnaliticaRepeticiones(al_evento=registro)
+    if hasattr(signal, "SIGUSR1"):
+        # kill -USR1 <pid> arranca (o detiene) un perfil sin tocar la partida. El manejador
+        # solo marca la petición: parar el perfil espera al hilo, y eso se hace en el bucle
+        signal.signal(signal.SIGUSR1, lambda *_: setattr(app, "alternar_perfil", True))
+    if args.grabar:
+        app.grabador = GrabadorLandmarks(args.grabar)
+        print(f"Grabando landmarks en {args.grabar}")
+    if args.salida:
+        app.escritor = EscritorFrames(args.salida)
+
+    if app.headless:
+        # Sin teclado no se puede salir del menú: el juego arranca directamente
+        game.iniciar_juego()
+    else:
+        cv2.namedWindow(app.window_name, cv2.WINDOW_NORMAL)
 
     print("=" * 50)
     print("     Home Trainer 1.0 - Entrenamiento Postural Avanzado")
@@ -214,177 +651,78 @@ def main():
     print("  R          = Reiniciar (cuando termines)")
     print("  M          = Volver al menú")
     print("  G          = Activar/desactivar guías visuales")
+    print("  T          = Mostrar/ocultar latencias por etapa")
+    print("  P          = Perfil por muestreo (también con SIGUSR1)")
     print("  Q o ESC    = Salir")
     print("\nNUEVOS NIVELES:")
-    print("  • 11 niveles de ejercicios variados")
+    print(f"  • {game.total_niveles} niveles de ejercicios variados")
     print("  • Sistema de estrellas (1-3 por nivel)")
     print("  • Múltiples dificultades")
     print("  • Logros desbloqueables")
     print("  • Efectos visuales mejorados")
     print("=" * 50)
 
-    mostrar_guias = True
-    altura_referencia_tobillo = None
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if modo_espejo:
-            frame = cv2.flip(frame, 1)
-
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = pose.process(frame_rgb)
-        tiempo = time.time()
-
-        if result.pose_landmarks:
-            landmarks = result.pose_landmarks.landmark
-
-            # Dibujar esqueleto mejorado
-            dibujar_skeleton_mejorado(frame, landmarks, mp_pose.POSE_CONNECTIONS, mp_pose)
-
-            # Extraer world landmarks 3D si están disponibles
-            world_landmarks = None
-            if hasattr(result, 'pose_world_landmarks') and result.pose_world_landmarks:
-                world_landmarks = result.pose_world_landmarks.landmark
-
-            # Calcular altura de referencia para saltos (nivel 11)
-            if game.nivel == 11 and altura_referencia_tobillo is None:
-                altura_referencia_tobillo = (landmarks[27].y + landmarks[28].y) / 2
-
-            gesto_ok = False
-            nueva_pierna = game.ultima_pierna
-            nuevo_lado = game.ultimo_lado
-
-            # Solo detectar gestos si estamos jugando o mostrando instrucciones
-            if game.estado in ["jugando", "mostrando_instruccion"]:
-                # Dibujar guías visuales si están activadas
-                if mostrar_guias:
-                    dibujar_guias_visuales(frame, game, landmarks, world_landmarks)
-
-                # === DETECCIÓN DE GESTOS POR NIVEL ===
-                if game.nivel == 1:
-                    gesto_ok = brazo_derecho_arriba(landmarks, espejo=modo_espejo)
-
-                elif game.nivel == 2:
-                    gesto_ok = rodilla_izquierda_flexionada(landmarks, espejo=modo_espejo)
-
-                elif game.nivel == 3:
-                    gesto_ok = equilibrio_estable(landmarks)
-
-                elif game.nivel == 4:
-                    gesto_ok = extension_adelante(landmarks)
-
-                elif game.nivel == 5:
-                    gesto_ok = inclinacion_lateral(landmarks)
-
-                elif game.nivel == 6:
-                    gesto_ok, nueva_pierna = elevacion_rodilla(landmarks, game.ultima_pierna)
-                    if gesto_ok:
-                        game.ultima_pierna = nueva_pierna
-
-                elif game.nivel == 7:
-                    gesto_ok = postura_ergonomica(landmarks)
-
-                elif game.nivel == 8:
-                    gesto_ok = sentadilla(landmarks)
-
-                elif game.nivel == 9:
-                    gesto_ok = brazos_en_cruz(landmarks)
-
-                elif game.nivel == 10:
-                    # Usar detección 3D si hay world_landmarks
-                    if world_landmarks is not None:
-                        gesto_ok, checks_debug = postura_guerrero_3d(world_landmarks, debug=True)
-                        # Mostrar debug en pantalla
-                        debug_y = 200
-                        for check_name, (check_ok, check_val) in checks_debug.items():
-                            color = (0, 255, 0) if check_ok else (0, 0, 255)
-                            cv2.putText(frame, f"{check_name}: {check_val}", (20, debug_y), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-                            debug_y += 20
-                    else:
-                        gesto_ok = postura_guerrero(landmarks)
-
-                elif game.nivel == 11:
-                    if altura_referencia_tobillo:
-                        gesto_ok = salto_detectado(landmarks, altura_referencia_tobillo)
-
-                # Actualizar el juego
-                game.actualizar(gesto_ok, tiempo)
-                
-                # Resetear altura de referencia si cambiamos de nivel (fuera del nivel 11)
-                if game.nivel != 11:
-                    altura_referencia_tobillo = None
-
-        # Mostrar interfaz del juego
-        game.dibujar_hud(frame)
-        game.mostrar_instrucciones(frame)
-
-        # Indicador de guías visuales
-        if game.estado == "jugando" and mostrar_guias:
-            cv2.putText(frame, "Guias: ON", (10, frame.shape[0] - 20), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 255, 100), 1)
-
-        # Ventana de cámara
-        cv2.imshow(window_name, frame)
-
-        # === CONTROLES ===
-        key = cv2.waitKey(1) & 0xFF
-        
-        # Salir
-        if key in [ord("q"), 27]:
-            break
-        
-        # Comenzar juego desde menú
-        if key == ord(" ") and game.estado == "menu":
-            game.iniciar_juego()
-        
-        # Cambiar dificultad en menú
-        if game.estado == "menu":
-            if key == ord("1"):
-                game.cambiar_dificultad("facil")
-                print("Dificultad: FÁCIL")
-            elif key == ord("2"):
-                game.cambiar_dificultad("normal")
-                print("Dificultad: NORMAL")
-            elif key == ord("3"):
-                game.cambiar_dificultad("dificil")
-                print("Dificultad: DIFÍCIL")
-        
-        # Reiniciar juego
-        if key == ord("r") and game.estado == "completado":
-            game.reiniciar()
-            altura_referencia_tobillo = None
-        
-        # Volver al menú
-        if key == ord("m") and game.estado == "completado":
-            game.__init__()
-            altura_referencia_tobillo = None
-        
-        # Alternar pantalla completa
-        if key in [ord("f"), ord("F")]:
-            pantalla_completa = not pantalla_completa
-            if pantalla_completa:
-                cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-                print("Modo pantalla completa activado")
+    frames = [0]
+
+    def contar_frame(game):
+        frames[0] += 1
+
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        if partida is not None:
+            print(f"Modo multijugador: hasta {args.personas} personas "
+                  "(--pipeline, --seguimiento e --inferir-cada no se aplican)")
+            bucle_multipersona(cap, pose, partida, game, app, al_frame=contar_frame)
+        elif args.pipeline:
+            print("Modo pipeline activado (captura | inferencia | render)")
+            if app.inferir_cada > 1:
+                print("--inferir-cada no se aplica en modo pipeline: se infiere cada frame")
+            bucle_pipeline(cap, pose, game, app, al_frame=contar_frame)
+        else:
+            bucle_serie(cap, pose, game, app, al_frame=contar_frame)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # También si el bucle falla: se cierran ficheros y se vuelca el historial pendiente
+        duracion = time.perf_counter() - inicio
+        duracion_cpu = time.process_time() - inicio_cpu
+
+        cap.release()
+        if not app.headless:
+            cv2.destroyAllWindows()
+        if app.escritor is not None:
+            app.escritor.cerrar()
+        if app.perfilador.activo:
+            app.perfilador.parar()
+        if app.metricas.ruta is not None:
+            app.metricas.exportar()
+        if almacen is not None:
+            if partida is not None:
+                partida.terminar()
             else:
-                cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_NORMAL)
-                print("Modo ventana normal activado")
-        
-        # Alternar guías visuales
-        if key == ord("g") or key == ord("G"):
-            mostrar_guias = not mostrar_guias
-            print(f"Guías visuales: {'ON' if mostrar_guias else 'OFF'}")
-
-    cap.release()
-    cv2.destroyAllWindows()
+                game.terminar_partida()
+            almacen.cerrar()
+            print(f"Historial: {almacen.escritos} eventos guardados en {almacen.ruta} ({almacen.lotes} lotes)")
+        if app.grabador is not None:
+            app.grabador.cerrar()
+            print(f"Grabación guardada: {app.grabador.frames} frames en {app.grabador.ruta}")
     
     print("\n¡Gracias por jugar Home Trainer!")
-    print(f"Puntuación final: {game.puntos}")
-    print(f"Racha máxima: {game.racha_maxima}")
-    print(f"Logros desbloqueados: {len(game.logros)}")
+    if partida is not None:
+        print("\n".join(partida.resumen()))
+    else:
+        print(f"Puntuación final: {game.puntos}")
+        print(f"Racha máxima: {game.racha_maxima}")
+        print(f"Logros desbloqueados: {len(game.logros)}")
+        for linea in app.analitica.resumen():
+            print(f"Repeticiones - {linea}")
+    if app.headless and duracion > 0:
+        # fps por núcleo: frames por segundo de CPU consumido por el proceso
+        print(f"Frames: {frames[0]} en {duracion:.1f}s  ({frames[0] / duracion:.1f} fps, "
+              f"{frames[0] / max(duracion_cpu, 1e-9):.1f} fps por núcleo)")
+        if hasattr(pose, "descripcion"):
+            print(f"Inferencia: {pose.descripcion()}")
+        print("\n".join(app.metricas.tabla()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+"""Pool de buffers de imagen reutilizables.
+
+Las operaciones por frame (lectura, espejo, conversión a RGB) escriben con
+dst= en buffers que se toman del pool y se devuelven al terminar con ellos,
+así que en régimen estable no se reserva memoria de imagen en cada frame.
+Los buffers libres se agrupan por (forma, dtype); cuando cambia la
+resolución se liberan los de la forma anterior. Es seguro entre hilos: el
+pipeline se pasa los buffers de una etapa a otra y los devuelve al final.
+"""
+import threading
+
+import cv2
+import numpy as np
+
+
+class PoolBuffers:
+    """Listas de buffers libres por (forma, dtype), con un máximo por lista."""
+
+    def __init__(self, maximo_libres=8):
+        self.maximo_libres = maximo_libres
+        self.asignaciones = 0  # Buffers creados desde el inicio (estable = no crece)
+        self._libres = {}
+        self._actual = None  # Clave de la resolución en uso
+        self._lock = threading.Lock()
+
+    def tomar(self, forma, dtype=np.uint8):
+        """Devuelve un buffer (sin inicializar) de la forma y tipo pedidos."""
+        clave = (tuple(forma), np.dtype(dtype))
+        with self._lock:
+            if clave != self._actual:
+                # Cambio de resolución: los buffers de la anterior ya no sirven
+                self._libres.clear()
+                self._actual = clave
+            libres = self._libres.get(clave)
+            if libres:
+                return libres.pop()
+            self.asignaciones += 1
+        return np.empty(clave[0], dtype=clave[1])
+
+    def devolver(self, buffer):
+        """Devuelve un buffer al pool (también acepta arrays que no salieron de él)."""
+        if buffer is None or not buffer.flags.c_contiguous or buffer.base is not None:
+            return
+        clave = (buffer.shape, buffer.dtype)
+        with self._lock:
+            if clave != self._actual:
+                return
+            libres = self._libres.setdefault(clave, [])
+            if len(libres) < self.maximo_libres and not any(b is buffer for b in libres):
+                libres.append(buffer)
+
+
+def leer(cap, pool, forma=None):
+    """cap.read() sobre un buffer del pool cuando ya se conoce la forma de los frames."""
+    if forma is None:
+        return cap.read()
+    buffer = pool.tomar(forma)
+    ret, frame = cap.read(buffer)
+    if frame is not buffer:
+        # La fuente no admite buffer de destino (o cambió de resolución)
+        pool.devolver(buffer)
+    return ret, frame
+
+
+def espejar(frame, pool):
+    """Refleja horizontalmente el frame en un buffer del pool y devuelve el original al pool."""
+    destino = cv2.flip(frame, 1, pool.tomar(frame.shape, frame.dtype))
+    pool.devolver(frame)
+    return destino
+
+
+def a_rgb(frame, pool):
+    """Convierte BGR -> RGB en un buffer del pool (hay que devolverlo tras usarlo)."""
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, pool.tomar(frame.shape, frame.dtype))
@@ -0,0 +1,142 @@
+"""Control adaptativo de la calidad de la inferencia de pose.
+
+ControladorCalidad imita la interfaz de mp.solutions.pose.Pose (process,
+close), así que los bucles de apli.py, el pipeline y las estaciones lo usan
+sin cambios. Mide la latencia de cada inferencia frente a un presupuesto por
+frame y recorre una escalera de niveles (model_complexity, escala de la
+imagen de entrada) con histéresis: baja de nivel cuando la latencia media
+supera el presupuesto de forma sostenida y sube cuando sobra margen durante
+bastante más tiempo; cada vez que un nivel al que se subió resulta demasiado
+lento, la espera para volver a él se duplica, así que no oscila entre dos
+niveles. Por defecto el nivel más alto es la configuración clásica (complexity
+1 a resolución completa): el controlador solo la rebaja en equipos lentos y
+nunca cambia el modelo por defecto en los rápidos. Los landmarks son
+coordenadas normalizadas, así que el HUD y las guías se siguen dibujando a la
+resolución completa del frame.
+"""
+import time
+
+import cv2
+
+# (model_complexity, escala de la entrada), de más a menos calidad
+CALIDAD_CLASICA = (1, 1.0)  # complexity 1 a resolución completa: nivel inicial
+NIVELES_CALIDAD = [
+    CALIDAD_CLASICA,
+    (1, 0.75),
+    (0, 0.75),
+    (0, 0.5),
+]
+# Con complexity 2 permitida (apli.py --complejidad-2) se puede subir por encima de la clásica
+NIVELES_CALIDAD_ALTA = [(2, 1.0)] + NIVELES_CALIDAD
+
+
+class ControladorCalidad:
+    """Pose con model_complexity y resolución de entrada adaptadas a la latencia medida.
+
+    crear_pose(complejidad): crea un Pose con ese model_complexity; los modelos se
+    crean la primera vez que se usan y se conservan para cambios posteriores.
+    presupuesto: latencia objetivo de la inferencia en segundos. nivel: índice
+    inicial en `niveles` (por defecto, el de CALIDAD_CLASICA).
+    """
+
+    def __init__(self, crear_pose, presupuesto=1 / 30, nivel=None, niveles=NIVELES_CALIDAD,
+                 margen_subida=0.6, frames_bajada=15, frames_subida=90, suavizado=0.1, espera_maxima=32):
+        self.crear_pose = crear_pose
+        self.presupuesto = presupuesto
+        self.niveles = niveles
+        self.nivel = niveles.index(CALIDAD_CLASICA) if nivel is None else nivel
+        self.margen_subida = margen_subida
+        self.frames_bajada = frames_bajada
+        self.frames_subida = frames_subida
+        self.suavizado = suavizado
+        self.espera_maxima = espera_maxima  # Máximo multiplicador de frames_subida
+        self._esperas = {}  # nivel -> frames rápidos necesarios para volver a subir a él
+        self._subido = False  # El nivel actual se alcanzó subiendo (y no es el inicial)
+        self.latencia = None  # Media móvil exponencial (s)
+        self.cambios = 0
+        self._poses = {}
+        self._lentos = 0
+        self._rapidos = 0
+        self._entrada = None  # Buffer reutilizado para la imagen reducida
+        self._calentamiento = 0
+
+    @property
+    def complejidad(self):
+        return self.niveles[self.nivel][0]
+
+    @property
+    def escala(self):
+        return self.niveles[self.nivel][1]
+
+    def descripcion(self):
+        """Nivel actual en texto, p. ej. 'calidad 3/5 (complexity 1, 75%, 21.4 ms), 2 cambios'."""
+        latencia = "" if self.latencia is None else f", {self.latencia * 1000:.1f} ms"
+        return (f"calidad {len(self.niveles) - self.nivel}/{len(self.niveles)} "
+                f"(complexity {self.complejidad}, {self.escala:.0%}{latencia}), {self.cambios} cambios")
+
+    def _pose(self):
+        pose = self._poses.get(self.complejidad)
+        if pose is None:
+            pose = self.crear_pose(self.complejidad)
+            self._poses[self.complejidad] = pose
+        return pose
+
+    def process(self, frame_rgb):
+        """Equivalente a Pose.process sobre el frame reducido según el nivel actual."""
+        entrada = frame_rgb
+        if self.escala < 1.0:
+            h, w = frame_rgb.shape[:2]
+            tam = (max(int(w * self.escala), 1), max(int(h * self.escala), 1))
+            if self._entrada is not None and self._entrada.shape[1::-1] != tam:
+                self._entrada = None  # Cambió la resolución de la fuente o el nivel
+            self._entrada = cv2.resize(frame_rgb, tam, dst=self._entrada, interpolation=cv2.INTER_AREA)
+            entrada = self._entrada
+
+        pose = self._pose()
+        inicio = time.perf_counter()
+        result = pose.process(entrada)
+        self._registrar(time.perf_counter() - inicio)
+        return result
+
+    def _registrar(self, latencia):
+        """Actualiza la media de latencia y cambia de nivel con histéresis."""
+        if self._calentamiento:
+            self._calentamiento -= 1
+            return
+        if self.latencia is None:
+            self.latencia = latencia
+        else:
+            self.latencia += self.suavizado * (latencia - self.latencia)
+
+        if self.latencia > self.presupuesto:
+            self._lentos += 1
+            self._rapidos = 0
+        elif self.latencia < self.presupuesto * self.margen_subida:
+            self._rapidos += 1
+            self._lentos = 0
+        else:
+            self._lentos = self._rapidos = 0
+
+        if self._lentos >= self.frames_bajada and self.nivel < len(self.niveles) - 1:
+            if self._subido:
+                # Se subió a este nivel y no cumple el presupuesto: volver a él cuesta el doble de espera
+                espera = self._esperas.get(self.nivel, self.frames_subida) * 2
+                self._esperas[self.nivel] = min(espera, self.frames_subida * self.espera_maxima)
+            self._cambiar(self.nivel + 1)
+        elif self.nivel > 0 and self._rapidos >= self._esperas.get(self.nivel - 1, self.frames_subida):
+            self._cambiar(self.nivel - 1)
+
+    def _cambiar(self, nivel):
+        self._subido = nivel < self.nivel
+        self.nivel = nivel
+        self.cambios += 1
+        # La media se rehace con el nuevo nivel; los primeros frames tras el cambio
+        # (modelo recién creado o que pierde el tracking) no cuentan
+        self.latencia = None
+        self._calentamiento = 5
+        self._lentos = self._rapidos = 0
+
+    def close(self):
+        for pose in self._poses.values():
+            pose.close()
+        self._poses.clear()
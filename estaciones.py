@@ -0,0 +1,178 @@
+"""Modo multi-estación: un proceso por cámara, cada uno con su Pose y su Game.
+
+Cada estación corre en su propio proceso (sin competir por el GIL) fijado a un
+núcleo. El supervisor agrega el estado que envían las estaciones y reinicia las
+que terminan de forma anormal.
+
+Uso:
+    python estaciones.py --camaras 0 1 2
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+
+from apli import EstadoApp, bucle_serie, crear_pose_adaptativa
+from fuentes import abrir_camara
+from game_logic import Game
+from pipeline import MedidorRitmo
+
+
+def fijar_nucleo(nucleo):
+    """Fija el proceso actual a un núcleo (solo en sistemas que lo permiten)."""
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {nucleo})
+        except OSError:
+            pass
+
+
+def ejecutar_estacion(estacion, indice_camara, nucleo, cola_estado, ancho=1280, alto=720,
+                      presupuesto_ms=33.0):
+    """Proceso de una estación: abre su cámara y ejecuta el bucle del juego."""
+    fijar_nucleo(nucleo)
+    # Un único hilo de OpenCV por estación: el paralelismo viene de los procesos
+    cv2.setNumThreads(1)
+
+    cap = abrir_camara(indice_camara, ancho, alto)
+    if not cap.isOpened():
+        print(f"[Estacion {estacion}] No se pudo abrir la cámara {indice_camara}")
+        sys.exit(2)
+
+    mp_pose = mp.solutions.pose
+    # Cada estación adapta su propio modelo: comparten CPU con las demás
+    pose = crear_pose_adaptativa(mp_pose, presupuesto_ms)
+    game = Game()
+    app = EstadoApp(mp_pose, modo_espejo=True)
+    app.window_name = f"Home trainer 1.0 - Estacion {estacion}"
+    cv2.namedWindow(app.window_name, cv2.WINDOW_NORMAL)
+
+    medidor = MedidorRitmo(f"estacion {estacion}")
+    ultimo_envio = [0.0]
+
+    def informar(game):
+        medidor.marcar()
+        ahora = time.time()
+        if ahora - ultimo_envio[0] >= 1.0:
+            ultimo_envio[0] = ahora
+            try:
+                cola_estado.put_nowait({
+                    "estacion": estacion,
+                    "pid": os.getpid(),
+                    "fps": medidor.fps,
+                    "estado": game.estado,
+                    "nivel": game.nivel,
+                    "puntos": game.puntos,
+                    "racha": game.racha_actual,
+                    "calidad": pose.descripcion() if hasattr(pose, "descripcion") else "fija",
+                })
+            except queue.Full:
+                pass
+
+    try:
+        bucle_serie(cap, pose, game, app, al_frame=informar)
+    finally:
+        cap.release()
+        cv2.destroyWindow(app.window_name)
+
+
+class Supervisor:
+    """Lanza una estación por cámara, agrega su estado y reinicia las caídas."""
+
+    def __init__(self, camaras, max_reinicios=5, intervalo_informe=5.0, presupuesto_ms=33.0):
+        self.camaras = camaras
+        self.presupuesto_ms = presupuesto_ms
+        self.max_reinicios = max_reinicios
+        self.intervalo_informe = intervalo_informe
+        self.contexto = multiprocessing.get_context("spawn")
+        self.cola_estado = self.contexto.Queue(maxsize=256)
+        self.procesos = {}
+        self.reinicios = {estacion: 0 for estacion in range(len(camaras))}
+        self.estado = {}
+
+    def _lanzar(self, estacion):
+        nucleo = estacion % (os.cpu_count() or 1)
+        proceso = self.contexto.Process(
+            target=ejecutar_estacion,
+            args=(estacion, self.camaras[estacion], nucleo, self.cola_estado),
+            kwargs={"presupuesto_ms": self.presupuesto_ms},
+            name=f"estacion-{estacion}",
+            daemon=True,
+        )
+        proceso.start()
+        self.procesos[estacion] = proceso
+
+    def _vigilar(self):
+        """Reinicia las estaciones caídas; las que salen con código 0 se dan por cerradas."""
+        for estacion, proceso in list(self.procesos.items()):
+            if proceso.is_alive():
+                continue
+            del self.procesos[estacion]
+            if proceso.exitcode == 0:
+                print(f"[Supervisor] Estacion {estacion} cerrada por el usuario")
+            elif self.reinicios[estacion] < self.max_reinicios:
+                self.reinicios[estacion] += 1
+                print(f"[Supervisor] Estacion {estacion} caída (código {proceso.exitcode}), "
+                      f"reinicio {self.reinicios[estacion]}/{self.max_reinicios}")
+                self._lanzar(estacion)
+            else:
+                print(f"[Supervisor] Estacion {estacion} abandonada tras {self.max_reinicios} reinicios")
+
+    def resumen(self):
+        lineas = []
+        for estacion in sorted(self.estado):
+            e = self.estado[estacion]
+            lineas.append(f"  Estacion {estacion}: {e['fps']:5.1f} fps  {e['estado']:<22} "
+                          f"nivel {e['nivel']:>2}  puntos {e['puntos']:>5}  racha {e['racha']}  "
+                          f"{e['calidad']}")
+        return "\n".join(lineas)
+
+    def ejecutar(self):
+        for estacion in range(len(self.camaras)):
+            self._lanzar(estacion)
+
+        ultimo_informe = time.time()
+        try:
+            while self.procesos:
+                try:
+                    mensaje = self.cola_estado.get(timeout=0.5)
+                    self.estado[mensaje["estacion"]] = mensaje
+                except queue.Empty:
+                    pass
+
+                self._vigilar()
+
+                if time.time() - ultimo_informe >= self.intervalo_informe and self.estado:
+                    print(self.resumen())
+                    ultimo_informe = time.time()
+        except KeyboardInterrupt:
+            print("\n[Supervisor] Deteniendo estaciones...")
+        finally:
+            for proceso in self.procesos.values():
+                proceso.terminate()
+            for proceso in self.procesos.values():
+                proceso.join(timeout=2.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Home Trainer 1.0 - modo multi-estación")
+    parser.add_argument("--camaras", type=int, nargs="+", default=[0],
+                        help="índices de las cámaras, una estación por cámara")
+    parser.add_argument("--max-reinicios", type=int, default=5,
+                        help="reinicios permitidos por estación antes de abandonarla")
+    parser.add_argument("--presupuesto", type=float, default=33.0, metavar="MS",
+                        help="latencia objetivo de la inferencia por estación en ms (0 = modelo fijo)")
+    args = parser.parse_args(argv)
+
+    print(f"Lanzando {len(args.camaras)} estaciones (cámaras {args.camaras})")
+    Supervisor(args.camaras, max_reinicios=args.max_reinicios,
+               presupuesto_ms=args.presupuesto).ejecutar()
+
+
+if __name__ == "__main__":
+    main()
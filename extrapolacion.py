@@ -0,0 +1,74 @@
+"""Extrapolación de landmarks entre frames clave (modo --inferir-cada N).
+
+Con el modelo de pose ejecutándose solo cada N frames, los frames intermedios
+se dibujan y se pasan a los detectores con landmarks extrapolados a velocidad
+constante por articulación a partir de los dos últimos frames clave. Los
+frames extrapolados se marcan como tales: el juego no completa niveles ni
+cuenta repeticiones con ellos.
+"""
+import numpy as np
+
+from utils import NUM_LANDMARKS, VIS
+
+
+class ExtrapoladorLandmarks:
+    """Modelo de velocidad constante por articulación sobre instantáneas (33, 4).
+
+    horizonte: segundos máximos de extrapolación desde el último frame clave; más
+    allá la pose se queda quieta en lugar de seguir desplazándose.
+    """
+
+    def __init__(self, horizonte=0.2):
+        self.horizonte = horizonte
+        self.tiempo = None
+        self.visibles = None
+        self._puntos = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._world = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._vel_puntos = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self._vel_world = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self._hay_world = False
+        self._salida_puntos = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._salida_world = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+
+    def actualizar(self, tiempo, puntos, visibles, world=None):
+        """Registra un frame clave; sin persona (puntos None) se deja de extrapolar."""
+        if puntos is None:
+            self.tiempo = None
+            return
+        dt = None if self.tiempo is None else tiempo - self.tiempo
+        if dt and dt > 0:
+            np.subtract(puntos[:, :VIS], self._puntos[:, :VIS], out=self._vel_puntos)
+            self._vel_puntos /= dt
+            if world is not None and self._hay_world:
+                np.subtract(world[:, :VIS], self._world[:, :VIS], out=self._vel_world)
+                self._vel_world /= dt
+            else:
+                self._vel_world[:] = 0
+        else:
+            self._vel_puntos[:] = 0
+            self._vel_world[:] = 0
+
+        self.tiempo = tiempo
+        self.visibles = visibles
+        self._puntos[:] = puntos
+        self._hay_world = world is not None
+        if world is not None:
+            self._world[:] = world
+
+    def predecir(self, tiempo):
+        """Devuelve (puntos, visibles, world) extrapolados a `tiempo`, o None si no hay frame clave.
+
+        Los arrays devueltos se reutilizan en la siguiente llamada.
+        """
+        if self.tiempo is None:
+            return None
+        dt = min(max(tiempo - self.tiempo, 0.0), self.horizonte)
+        np.copyto(self._salida_puntos, self._puntos)
+        self._salida_puntos[:, :VIS] += self._vel_puntos * dt
+        world = None
+        if self._hay_world:
+            np.copyto(self._salida_world, self._world)
+            self._salida_world[:, :VIS] += self._vel_world * dt
+            world = self._salida_world
+        # La visibilidad se conserva del frame clave
+        return self._salida_puntos, self.visibles, world
@@ -0,0 +1,145 @@
+"""Fuentes de captura y destinos de frames para el bucle principal.
+
+Todas las fuentes imitan la interfaz de cv2.VideoCapture (isOpened, read,
+set, release), así que los bucles de apli.py y el pipeline las usan sin
+cambios: cámara en vivo, fichero de vídeo, directorio de imágenes o un
+generador sintético para pruebas de carga sin cámara.
+"""
+import os
+
+import cv2
+import numpy as np
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def abrir_camara(indice=0, ancho=1280, alto=720):
+    """Abre una cámara configurada para latencia mínima."""
+    cap = cv2.VideoCapture(indice)
+    # MJPG evita la descompresión en el driver de muchas webcams USB a 720p
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, ancho)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, alto)
+    # Un único frame en el buffer del driver: siempre se lee el más reciente
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class FuenteImagenes:
+    """Lee en orden alfabético las imágenes de un directorio."""
+
+    def __init__(self, directorio):
+        self.rutas = sorted(
+            os.path.join(directorio, nombre) for nombre in os.listdir(directorio)
+            if nombre.lower().endswith(EXTENSIONES_IMAGEN)
+        )
+        self.posicion = 0
+
+    def isOpened(self):
+        return self.posicion < len(self.rutas)
+
+    def read(self, frame=None):
+        # imread no admite buffer de destino: `frame` se ignora
+        while self.posicion < len(self.rutas):
+            frame = cv2.imread(self.rutas[self.posicion])
+            self.posicion += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def set(self, propiedad, valor):
+        return False
+
+    def release(self):
+        self.posicion = len(self.rutas)
+
+
+class FuenteSintetica:
+    """Genera frames sintéticos (degradado con un bloque en movimiento).
+
+    No contiene personas, pero ejercita captura, inferencia y render con el
+    mismo tamaño de frame que la cámara. frames=None genera sin límite.
+    """
+
+    def __init__(self, ancho=1280, alto=720, frames=None):
+        self.ancho = ancho
+        self.alto = alto
+        self.frames = frames
+        self.generados = 0
+        degradado = np.linspace(40, 200, ancho, dtype=np.uint8)
+        self._fondo = np.dstack([np.tile(degradado, (alto, 1))] * 3)
+
+    def isOpened(self):
+        return self.frames is None or self.generados < self.frames
+
+    def read(self, frame=None):
+        """Como VideoCapture.read: si `frame` tiene el tamaño correcto se escribe en él."""
+        if not self.isOpened():
+            return False, None
+        if frame is None or frame.shape != self._fondo.shape:
+            # Sin buffer de destino se devuelve un frame nuevo: el consumidor puede quedárselo
+            frame = np.empty_like(self._fondo)
+        np.copyto(frame, self._fondo)
+        lado = self.alto // 4
+        x = (self.generados * 8) % max(self.ancho - lado, 1)
+        y = self.alto // 2 - lado // 2
+        cv2.rectangle(frame, (x, y), (x + lado, y + lado), (60, 180, 240), -1)
+        self.generados += 1
+        return True, frame
+
+    def set(self, propiedad, valor):
+        return False
+
+    def release(self):
+        self.frames = self.generados
+
+
+def abrir_fuente(origen=None, ancho=1280, alto=720):
+    """Abre la fuente indicada por `origen`.
+
+    - None o un número: cámara en vivo con ese índice.
+    - "sintetica" o "sintetica:N": generador sintético (N frames, sin límite si se omite).
+    - Un directorio: secuencia de imágenes.
+    - Cualquier otra ruta o URL: fichero o flujo de vídeo.
+    """
+    if origen is None or str(origen).isdigit():
+        return abrir_camara(int(origen or 0), ancho, alto)
+
+    if origen.startswith("sintetica"):
+        _, _, frames = origen.partition(":")
+        return FuenteSintetica(ancho, alto, int(frames) if frames else None)
+
+    if os.path.isdir(origen):
+        return FuenteImagenes(origen)
+
+    return cv2.VideoCapture(origen)
+
+
+class EscritorFrames:
+    """Guarda los frames anotados en un vídeo (.avi/.mp4) o en un directorio de imágenes."""
+
+    def __init__(self, ruta, fps=30.0):
+        self.ruta = ruta
+        self.fps = fps
+        self.escritos = 0
+        self._video = None
+        self._es_video = ruta.lower().endswith((".avi", ".mp4"))
+        if not self._es_video:
+            os.makedirs(ruta, exist_ok=True)
+
+    def escribir(self, frame):
+        if self._es_video:
+            if self._video is None:
+                h, w = frame.shape[:2]
+                codec = "mp4v" if self.ruta.lower().endswith(".mp4") else "MJPG"
+                self._video = cv2.VideoWriter(self.ruta, cv2.VideoWriter_fourcc(*codec),
+                                              self.fps, (w, h))
+            self._video.write(frame)
+        else:
+            cv2.imwrite(os.path.join(self.ruta, f"frame_{self.escritos:06d}.jpg"), frame)
+        self.escritos += 1
+
+    def cerrar(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
@@ -1,10 +1,45 @@
 import cv2
 import time
 import numpy as np
-import random
+
+from gestures import REGLAS
+from niveles import compilar_programas, NIVELES, REPETICIONES, TEMPORIZADOR
+from particulas import SistemaParticulas
+from sprites import rasterizar, superponer, panel_translucido, SPRITES
+
+
+class CapaEstatica:
+    """Capa pre-renderizada de una pantalla: fondo para mezclar y textos para superponer.
+
+    Los textos se dibujan una vez sobre negro y otra sobre blanco: la primera da el
+    color ya multiplicado por su opacidad y la diferencia, la transmisión del fondo
+    (bordes suavizados y sombras incluidos). En cada frame solo se recorren las
+    franjas de filas que contienen texto.
+    """
+
+    def __init__(self, h, w, clave, dibujar, fondo=None):
+        self.clave = clave
+        self.fondo = fondo
+        self.color, self.transmision = rasterizar(lambda lienzo: dibujar(lienzo, h, w), h, w)
+
+        self.franjas = []
+        filas = np.flatnonzero((self.transmision < 255).any(axis=(1, 2)))
+        if len(filas):
+            cortes = np.flatnonzero(np.diff(filas) > 1)
+            for y0, y1 in zip(filas[np.r_[0, cortes + 1]], filas[np.r_[cortes, len(filas) - 1]] + 1):
+                columnas = np.flatnonzero((self.transmision[y0:y1] < 255).any(axis=(0, 2)))
+                self.franjas.append((y0, y1, columnas[0], columnas[-1] + 1))
+
+    def componer(self, frame, alpha):
+        """Mezcla el fondo con el frame (alpha = peso del fondo) y superpone los textos."""
+        if self.fondo is not None:
+            cv2.addWeighted(self.fondo, alpha, frame, 1 - alpha, 0, frame)
+        for y0, y1, x0, x1 in self.franjas:
+            superponer(frame, self.color[y0:y1, x0:x1], self.transmision[y0:y1, x0:x1], x0, y0)
+
 
 class Game:
-    def __init__(self):
+    def __init__(self, al_evento=None, niveles=None):
         self.puntos = 0
         self.nivel = 1
         self.estado = "menu"
@@ -14,6 +49,7 @@ class Game:
         self.ultima_pierna = "ninguna"
         self.ultimo_lado = "ninguno"
         self.contador_alternos = 0
+        self.altura_referencia_tobillo = None  # Referencia de tobillos para el salto (nivel 11)
         self.juego_completado = False
         
         # Características del juego
@@ -24,7 +60,14 @@ class Game:
         self.racha_actual = 0
         self.racha_maxima = 0
         self.logros = set()
-        self.particulas = []
+        self.particulas = SistemaParticulas()
+        self.tam_frame = (480, 640)  # (alto, ancho) del último frame dibujado
+        # Función opcional al_evento(tipo, datos) para inicio y fin de partida, niveles completados y logros
+        # (ver historial.py)
+        self.al_evento = al_evento
+        self.partida_abierta = False  # Partida empezada cuyo evento "fin" aún no se ha emitido
+        # Registro de niveles del entrenamiento (ver niveles.py), compilado por dificultad
+        self.niveles = niveles if niveles is not None else NIVELES
         
         # Sistema de feedback visual
         self.feedback_texto = ""
@@ -35,59 +78,53 @@ class Game:
         self.trail_puntos = []
         self.max_trail = 15
         
+        # Capas estáticas de menú y pantalla final (ver _capa)
+        self._capas = {}
+        
         # Configuración según dificultad
         self.configurar_dificultad()
 
     def configurar_dificultad(self):
-        """Ajusta los parámetros según la dificultad"""
-        if self.dificultad == "facil":
-            self.tiempo_nivel_3 = 2
-            self.tiempo_nivel_7 = 3
-            self.tiempo_nivel_10 = 1
-            self.repeticiones_nivel_6 = 2
-            self.repeticiones_nivel_9 = 2
-        elif self.dificultad == "normal":
-            self.tiempo_nivel_3 = 3
-            self.tiempo_nivel_7 = 5
-            self.tiempo_nivel_10 = 2
-            self.repeticiones_nivel_6 = 3
-            self.repeticiones_nivel_9 = 3
-        else:  # dificil
-            self.tiempo_nivel_3 = 5
-            self.tiempo_nivel_7 = 8
-            self.tiempo_nivel_10 = 4
-            self.repeticiones_nivel_6 = 5
-            self.repeticiones_nivel_9 = 4
+        """Compila los programas de los niveles con los valores de la dificultad actual"""
+        self.programas = compilar_programas(self.niveles, REGLAS, self.dificultad)
+        self.total_niveles = len(self.programas) - 1
+
+    @property
+    def programa(self):
+        """Programa del nivel actual (None fuera de la partida)"""
+        return self.programas[self.nivel] if 0 < self.nivel <= self.total_niveles else None
 
     def mostrar_menu(self, frame):
         """Pantalla de inicio mejorada"""
-        overlay = frame.copy()
         h, w = frame.shape[:2]
+        clave = (h, w, self.dificultad, self.racha_maxima)
+        self._capa("menu", clave, h, w, self._dibujar_menu, self._fondo_menu).componer(frame, 0.8)
         
-        # Fondo degradado
-        for i in range(h):
-            alpha = i / h
-            color = (
-                int(20 + alpha * 20),
-                int(20 + alpha * 30),
-                int(40 + alpha * 20)
-            )
-            cv2.line(overlay, (0, i), (w, i), color, 1)
-        
-        cv2.addWeighted(overlay, 0.8, frame, 0.2, 0, frame)
-        
+        # Instrucciones
+        y_pos = 460
+        self._texto_parpadeante(frame, "Presiona ESPACIO para comenzar", (w//2, y_pos), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (100, 255, 100), 3, centrado=True)
+
+    def _fondo_menu(self, h, w):
+        """Fondo degradado del menú"""
+        alpha = np.arange(h) / h
+        degradado = np.stack([20 + alpha * 20, 20 + alpha * 30, 40 + alpha * 20], axis=1)
+        return np.ascontiguousarray(np.broadcast_to(degradado.astype(np.uint8)[:, None, :], (h, w, 3)))
+
+    def _dibujar_menu(self, lienzo, h, w):
+        """Textos estáticos del menú"""
         # Título
         titulo = "Home Trainer 1.0"
-        self._texto_con_sombra(frame, titulo, (w//2, 120), 
+        self._texto_con_sombra(lienzo, titulo, (w//2, 120), 
                                cv2.FONT_HERSHEY_DUPLEX, 2.5, (0, 255, 255), 5, centrado=True)
         
         subtitulo = "Entrenamiento Postural Avanzado"
-        self._texto_con_sombra(frame, subtitulo, (w//2, 180), 
+        self._texto_con_sombra(lienzo, subtitulo, (w//2, 180), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.9, (200, 200, 200), 2, centrado=True)
         
         # Selector de dificultad
         y_pos = 250
-        self._texto_con_sombra(frame, "Selecciona Dificultad:", (w//2, y_pos), 
+        self._texto_con_sombra(lienzo, "Selecciona Dificultad:", (w//2, y_pos), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 200, 100), 2, centrado=True)
         
         dificultades = [
@@ -99,114 +136,101 @@ class Game:
         y_pos = 300
         for i, (texto, color) in enumerate(dificultades):
             if self.dificultad == ["facil", "normal", "dificil"][i]:
-                self._texto_con_sombra(frame, f">>> {texto} <<<", (w//2, y_pos), 
+                self._texto_con_sombra(lienzo, f">>> {texto} <<<", (w//2, y_pos), 
                                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 3, centrado=True)
             else:
-                self._texto_con_sombra(frame, texto, (w//2, y_pos), 
+                self._texto_con_sombra(lienzo, texto, (w//2, y_pos), 
                                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (150, 150, 150), 2, centrado=True)
             y_pos += 40
         
-        # Instrucciones
-        y_pos = 460
-        self._texto_parpadeante(frame, "Presiona ESPACIO para comenzar", (w//2, y_pos), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (100, 255, 100), 3, centrado=True)
-        
         # Estadísticas si hay
         if self.racha_maxima > 0:
             y_pos = 520
-            self._texto_con_sombra(frame, f"Racha Maxima: {self.racha_maxima} niveles", 
+            self._texto_con_sombra(lienzo, f"Racha Maxima: {self.racha_maxima} niveles", 
                                    (w//2, y_pos), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
                                    (180, 180, 255), 2, centrado=True)
         
         # Controles
         y_pos = 580
-        self._texto_con_sombra(frame, "F = Pantalla completa  |  Q o ESC = Salir", 
+        self._texto_con_sombra(lienzo, "F = Pantalla completa  |  Q o ESC = Salir", 
                                (w//2, y_pos), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 
                                (150, 150, 150), 2, centrado=True)
 
     def mostrar_pantalla_final(self, frame):
         """Pantalla de finalización mejorada con estadísticas"""
-        overlay = frame.copy()
         h, w = frame.shape[:2]
+        logros = tuple(list(self.logros)[:3])  # Mostrar máximo 3
+        clave = (h, w, self.puntos, sum(self.estrellas_nivel), self.dificultad, len(self.logros), logros)
+        self._capa("final", clave, h, w, self._dibujar_pantalla_final,
+                   self._fondo_pantalla_final).componer(frame, 0.7)
         
-        # Fondo con partículas
-        for i in range(50):
-            x = random.randint(0, w)
-            y = random.randint(0, h)
-            size = random.randint(2, 6)
-            color = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
-            cv2.circle(overlay, (x, y), size, color, -1)
-        
-        cv2.rectangle(overlay, (0, 0), (w, h), (20, 40, 20), -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
-        
+        # Opciones
+        y_pos = h - 120
+        self._texto_parpadeante(frame, "Presiona R para reiniciar", (w//2, y_pos), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 200, 100), 2, centrado=True)
+
+    def _fondo_pantalla_final(self, h, w):
+        """Fondo liso de la pantalla final"""
+        fondo = np.empty((h, w, 3), dtype=np.uint8)
+        fondo[:] = (20, 40, 20)
+        return fondo
+
+    def _dibujar_pantalla_final(self, lienzo, h, w):
+        """Textos estáticos de la pantalla final"""
         # Título
         titulo = "FELICIDADES"
-        self._texto_con_sombra(frame, titulo, (w//2, 80), 
+        self._texto_con_sombra(lienzo, titulo, (w//2, 80), 
                                cv2.FONT_HERSHEY_DUPLEX, 2.8, (50, 255, 50), 6, centrado=True)
         
         # Puntuación
         puntos_texto = f"Puntuacion Final: {self.puntos}"
-        self._texto_con_sombra(frame, puntos_texto, (w//2, 150), 
+        self._texto_con_sombra(lienzo, puntos_texto, (w//2, 150), 
                                cv2.FONT_HERSHEY_DUPLEX, 1.6, (100, 200, 255), 4, centrado=True)
         
         # Estrellas totales
         estrellas_totales = sum(self.estrellas_nivel)
-        estrellas_texto = f"Estrellas: {estrellas_totales}/33"
-        self._texto_con_sombra(frame, estrellas_texto, (w//2, 200), 
+        estrellas_texto = f"Estrellas: {estrellas_totales}/{3 * self.total_niveles}"
+        self._texto_con_sombra(lienzo, estrellas_texto, (w//2, 200), 
                                cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 215, 0), 3, centrado=True)
         
         # Dificultad completada
         dif_texto = f"Dificultad: {self.dificultad.upper()}"
-        self._texto_con_sombra(frame, dif_texto, (w//2, 250), 
+        self._texto_con_sombra(lienzo, dif_texto, (w//2, 250), 
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 150, 100), 2, centrado=True)
         
         # Logros desbloqueados
         if len(self.logros) > 0:
             y_pos = 300
-            self._texto_con_sombra(frame, "Logros Desbloqueados:", (w//2, y_pos), 
+            self._texto_con_sombra(lienzo, "Logros Desbloqueados:", (w//2, y_pos), 
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (200, 200, 100), 2, centrado=True)
             y_pos = 330
             for logro in list(self.logros)[:3]:  # Mostrar máximo 3
-                self._texto_con_sombra(frame, f"* {logro}", (w//2, y_pos), 
+                self._texto_con_sombra(lienzo, f"* {logro}", (w//2, y_pos), 
                                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (180, 255, 180), 2, centrado=True)
                 y_pos += 30
         
-        # Opciones
-        y_pos = h - 120
-        self._texto_parpadeante(frame, "Presiona R para reiniciar", (w//2, y_pos), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 200, 100), 2, centrado=True)
-        
         y_pos = h - 70
-        self._texto_con_sombra(frame, "Presiona M para volver al menu", (w//2, y_pos), 
+        self._texto_con_sombra(lienzo, "Presiona M para volver al menu", (w//2, y_pos), 
                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180, 180, 180), 2, centrado=True)
 
+    def _capa(self, nombre, clave, h, w, dibujar, fondo):
+        """Capa estática `nombre`; solo se redibuja si cambia la clave (resolución o datos mostrados)"""
+        capa = self._capas.get(nombre)
+        if capa is None or capa.clave != clave:
+            capa = CapaEstatica(h, w, clave, dibujar, fondo(h, w))
+            self._capas[nombre] = capa
+        return capa
+
     def mostrar_instrucciones(self, frame):
         """Instrucciones mejoradas con indicador visual"""
-        if self.estado not in ["mostrando_instruccion", "jugando"]:
+        programa = self.programa
+        if self.estado not in ["mostrando_instruccion", "jugando"] or programa is None:
             return
             
-        instrucciones = {
-            1: "Levanta el brazo derecho",
-            2: "Flexiona la rodilla izquierda",
-            3: f"Manten el equilibrio {self.tiempo_nivel_3}s",
-            4: "Extiende los brazos hacia adelante",
-            5: "Inclinate lateralmente",
-            6: f"Eleva las rodillas alternando ({self.repeticiones_nivel_6} veces)",
-            7: f"Manten postura recta {self.tiempo_nivel_7}s",
-            8: "Realiza una sentadilla",
-            9: "Brazos en cruz (T-Pose)",
-            10: f"Postura del guerrero {self.tiempo_nivel_10}s",
-            11: "Salta"
-        }
-        
-        texto = instrucciones.get(self.nivel, "")
         h, w = frame.shape[:2]
         
         # Panel de instrucciones
         altura_cuadro = 120
-        overlay = frame.copy()
-        
         # Color del borde animado
         tiempo_actual = time.time()
         color_borde = (
@@ -215,13 +239,11 @@ class Game:
             255
         )
         
-        cv2.rectangle(overlay, (0, 40), (w, 40 + altura_cuadro), (30, 30, 60), -1)
-        cv2.addWeighted(overlay, 0.75, frame, 0.25, 0, frame)
+        panel_translucido(frame, 0, 40, w, 40 + altura_cuadro, (30, 30, 60), 0.75)
         cv2.rectangle(frame, (5, 45), (w-5, 40 + altura_cuadro - 5), color_borde, 3)
         
         # Nivel y progreso
-        nivel_texto = f"NIVEL {self.nivel}/11"
-        self._texto_con_sombra(frame, nivel_texto, (w//2, 75), 
+        self._texto_con_sombra(frame, programa.titulo, (w//2, 75), 
                                cv2.FONT_HERSHEY_DUPLEX, 1.3, (100, 200, 255), 3, centrado=True)
         
         # Barra de progreso de niveles
@@ -229,7 +251,7 @@ class Game:
         barra_y = 95
         barra_w = w - 100
         barra_h = 8
-        progreso = self.nivel / 11.0
+        progreso = programa.progreso
         
         cv2.rectangle(frame, (barra_x, barra_y), (barra_x + barra_w, barra_y + barra_h), 
                      (50, 50, 50), -1)
@@ -238,11 +260,16 @@ class Game:
                      (100, 255, 100), -1)
         
         # Instrucción
-        self._texto_con_sombra(frame, texto, (w//2, 125), 
+        self._texto_con_sombra(frame, programa.instruccion, (w//2, 125), 
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 100), 2, centrado=True)
 
-    def actualizar(self, gesto_detectado, tiempo):
-        """Lógica actualizada con 11 niveles"""
+    def actualizar(self, gesto_detectado, tiempo, extrapolado=False):
+        """Avanza el nivel actual según el tipo de su programa (ver niveles.py)
+
+        Con extrapolado=True (landmarks extrapolados entre frames clave) el gesto
+        solo mantiene los temporizadores: ningún nivel se completa ni cuenta
+        repeticiones sin un frame real.
+        """
         if self.estado in ["menu", "completado"]:
             return
             
@@ -254,45 +281,35 @@ class Game:
             self.objetivo_activo = False
 
         if self.estado == "jugando":
-            # Niveles instantáneos
-            if self.nivel in [1, 2, 4, 5, 8] and gesto_detectado:
-                self._completar_nivel(tiempo, 100)
+            programa = self.programas[self.nivel]
+
+            # Temporizador: mantener el gesto
+            if programa.tipo == TEMPORIZADOR:
+                self._actualizar_temporizador(gesto_detectado, tiempo, programa.duracion, programa.puntos,
+                                              extrapolado)
+
+            elif not gesto_detectado or extrapolado:
+                return
 
-            # Nivel 6: elevación alterna de rodillas
-            elif self.nivel == 6 and gesto_detectado:
+            # Repeticiones (p. ej. elevación alterna de rodillas)
+            elif programa.tipo == REPETICIONES:
                 self.contador_alternos += 1
                 self.mostrar_feedback("Bien", (100, 255, 100))
-                if self.contador_alternos >= self.repeticiones_nivel_6:
-                    self._completar_nivel(tiempo, 150)
+                if self.contador_alternos >= programa.repeticiones:
+                    self._completar_nivel(tiempo, programa.puntos)
                     self.contador_alternos = 0
 
-            # Nivel 3: equilibrio
-            elif self.nivel == 3:
-                self._actualizar_temporizador(gesto_detectado, tiempo, self.tiempo_nivel_3, 150)
-
-            # Nivel 7: postura erguida
-            elif self.nivel == 7:
-                self._actualizar_temporizador(gesto_detectado, tiempo, self.tiempo_nivel_7, 200)
-
-            # Nivel 9: brazos en cruz (ahora detección instantánea)
-            elif self.nivel == 9 and gesto_detectado:
-                self._completar_nivel(tiempo, 150)
-
-            # Nivel 10: postura guerrero
-            elif self.nivel == 10:
-                self._actualizar_temporizador(gesto_detectado, tiempo, self.tiempo_nivel_10, 200)
-
-            # Nivel 11: Salto (detección instantánea)
-            elif self.nivel == 11 and gesto_detectado:
-                self._completar_nivel(tiempo, 150)
+            # Instantáneo
+            else:
+                self._completar_nivel(tiempo, programa.puntos)
 
-    def _actualizar_temporizador(self, gesto_detectado, tiempo, duracion, puntos):
-        """Maneja niveles con temporizador"""
+    def _actualizar_temporizador(self, gesto_detectado, tiempo, duracion, puntos, extrapolado=False):
+        """Maneja niveles con temporizador (solo se completan en un frame real)"""
         if gesto_detectado:
             if not self.objetivo_activo:
                 self.objetivo_activo = True
                 self.tiempo_gesto = tiempo
-            elif tiempo - self.tiempo_gesto >= duracion:
+            elif tiempo - self.tiempo_gesto >= duracion and not extrapolado:
                 self._completar_nivel(tiempo, puntos)
                 self.objetivo_activo = False
         else:
@@ -319,6 +336,9 @@ class Game:
         self.estrellas_nivel.append(estrellas)
         puntos_ganados = int(puntos_base * multiplicador)
         self.puntos += puntos_ganados
+        if self.al_evento is not None:
+            self.al_evento("nivel", {"nivel": self.nivel, "tiempo": tiempo, "duracion": tiempo_nivel,
+                                     "estrellas": estrellas, "puntos": puntos_ganados})
         self.racha_actual += 1
         self.racha_maxima = max(self.racha_maxima, self.racha_actual)
         
@@ -332,11 +352,12 @@ class Game:
             self.desbloquear_logro("Racha de 5")
         
         self.nivel += 1
-        if self.nivel > 11:
+        if self.nivel > self.total_niveles:
             self.juego_completado = True
             self.estado = "completado"
-            if sum(self.estrellas_nivel) == 33:
+            if sum(self.estrellas_nivel) == 3 * self.total_niveles:
                 self.desbloquear_logro("PERFECCION TOTAL")
+                self.crear_particulas_exito(400)
         else:
             self.estado = "mostrando_instruccion"
 
@@ -348,9 +369,11 @@ class Game:
             
         if self.estado == "completado":
             self.mostrar_pantalla_final(frame)
+            self._actualizar_particulas(frame)
             return
         
         h, w = frame.shape[:2]
+        self.tam_frame = (h, w)
         
         # Panel superior - Puntos y estrellas
         self._dibujar_panel(frame, 5, 5, 250, 70, (40, 40, 40), (100, 200, 100))
@@ -363,10 +386,12 @@ class Game:
             self._texto_con_sombra(frame, estrellas_texto, (15, 55), 
                                    cv2.FONT_HERSHEY_DUPLEX, 0.8, (255, 215, 0), 2)
         
-        # Contador para niveles con alternancia
-        if self.nivel == 6:
+        programa = self.programa
+
+        # Contador para niveles con repeticiones
+        if programa.tipo == REPETICIONES:
             self._dibujar_panel(frame, 265, 5, 240, 40, (40, 40, 40), (255, 165, 0))
-            self._texto_con_sombra(frame, f"Repeticiones: {self.contador_alternos}/{self.repeticiones_nivel_6}", 
+            self._texto_con_sombra(frame, f"Repeticiones: {self.contador_alternos}/{programa.repeticiones}", 
                                    (275, 30), cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 200, 100), 2)
         
         # Racha actual
@@ -375,10 +400,9 @@ class Game:
             self._texto_con_sombra(frame, f"Racha: {self.racha_actual}", 
                                    (w - 195, 30), cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 150, 255), 2)
         
-        # Temporizador para niveles con duración (9 ahora es instantáneo)
-        if self.nivel in [3, 7, 10] and self.objetivo_activo:
-            duraciones = {3: self.tiempo_nivel_3, 7: self.tiempo_nivel_7, 10: self.tiempo_nivel_10}
-            self._dibujar_temporizador(frame, duraciones[self.nivel])
+        # Temporizador para niveles con duración
+        if programa.tipo == TEMPORIZADOR and self.objetivo_activo:
+            self._dibujar_temporizador(frame, programa.duracion)
         
         # Feedback temporal
         if time.time() - self.feedback_tiempo < 1.5:
@@ -388,10 +412,8 @@ class Game:
         self._actualizar_particulas(frame)
 
     def _dibujar_panel(self, frame, x, y, w, h, color_fondo, color_borde):
-        """Dibuja un panel decorativo"""
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (x, y), (x + w, y + h), color_fondo, -1)
-        cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+        """Dibuja un panel decorativo (la mezcla se limita al área del panel)"""
+        panel_translucido(frame, x, y, x + w, y + h, color_fondo, 0.7)
         cv2.rectangle(frame, (x, y), (x + w, y + h), color_borde, 2)
 
     def _dibujar_temporizador(self, frame, tiempo_objetivo):
@@ -439,43 +461,27 @@ class Game:
         if alpha > 0:
             escala = 1.5 + (1 - alpha) * 0.5
             color = tuple(int(c * alpha) for c in self.feedback_color)
+            # Escala y color cambian en cada frame: no se cachea
             self._texto_con_sombra(frame, self.feedback_texto, (w//2, h//2 - 100), 
-                                   cv2.FONT_HERSHEY_DUPLEX, escala, color, 3, centrado=True)
-
-    def crear_particulas_exito(self):
-        """Crea partículas de celebración"""
-        for _ in range(20):
-            self.particulas.append({
-                'x': random.randint(0, 640),
-                'y': random.randint(0, 480),
-                'vx': random.uniform(-3, 3),
-                'vy': random.uniform(-5, -1),
-                'vida': 60,
-                'color': (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
-            })
+                                   cv2.FONT_HERSHEY_DUPLEX, escala, color, 3, centrado=True,
+                                   cachear=False)
+
+    def crear_particulas_exito(self, cantidad=20):
+        """Crea partículas de celebración repartidas por todo el frame"""
+        h, w = self.tam_frame
+        self.particulas.emitir(cantidad, w, h)
 
     def _actualizar_particulas(self, frame):
         """Actualiza y dibuja partículas"""
-        particulas_activas = []
-        for p in self.particulas:
-            p['x'] += p['vx']
-            p['y'] += p['vy']
-            p['vy'] += 0.2  # Gravedad
-            p['vida'] -= 1
-            
-            if p['vida'] > 0:
-                alpha = p['vida'] / 60
-                size = int(4 * alpha)
-                if size > 0:
-                    cv2.circle(frame, (int(p['x']), int(p['y'])), size, p['color'], -1)
-                particulas_activas.append(p)
-        
-        self.particulas = particulas_activas
+        self.particulas.actualizar()
+        self.particulas.dibujar(frame)
 
     def desbloquear_logro(self, nombre):
         """Desbloquea un logro"""
         if nombre not in self.logros:
             self.logros.add(nombre)
+            if self.al_evento is not None:
+                self.al_evento("logro", {"nombre": nombre, "tiempo": time.time()})
             self.mostrar_feedback(f"Logro: {nombre}", (255, 215, 0))
 
     def cambiar_dificultad(self, nueva_dif):
@@ -484,23 +490,48 @@ class Game:
         self.configurar_dificultad()
 
     def reiniciar(self):
-        """Reinicia el juego manteniendo estadísticas"""
+        """Reinicia el juego manteniendo estadísticas (la partida anterior se cierra)"""
+        self.terminar_partida()
         racha_max = self.racha_maxima
         logros = self.logros.copy()
         dif = self.dificultad
         
-        self.__init__()
+        self.__init__(self.al_evento, self.niveles)
         self.racha_maxima = racha_max
         self.logros = logros
         self.dificultad = dif
         self.configurar_dificultad()
 
+    def volver_al_menu(self):
+        """Juego nuevo en el menú, cerrando la partida anterior"""
+        self.terminar_partida()
+        self.__init__(self.al_evento, self.niveles)
+
     def iniciar_juego(self):
-        """Inicia el juego desde el menú"""
+        """Inicia el juego desde el menú; cada partida es una sesión nueva del historial"""
+        self.terminar_partida()
         self.estado = "mostrando_instruccion"
+        self.partida_abierta = True
+        if self.al_evento is not None:
+            self.al_evento("inicio", {"dificultad": self.dificultad, "tiempo": time.time()})
 
-    def _texto_con_sombra(self, frame, texto, pos, fuente, escala, color, grosor, centrado=False):
-        """Dibuja texto con sombra"""
+    def terminar_partida(self):
+        """Emite "fin" con los totales de la partida empezada, si la hay"""
+        if not self.partida_abierta:
+            return
+        self.partida_abierta = False
+        if self.al_evento is not None:
+            self.al_evento("fin", {"tiempo": time.time(), "dificultad": self.dificultad, "puntos": self.puntos,
+                                   "nivel_final": min(self.nivel, self.total_niveles),
+                                   "estrellas": sum(self.estrellas_nivel), "racha_maxima": self.racha_maxima,
+                                   "logros": len(self.logros)})
+
+    def _texto_con_sombra(self, frame, texto, pos, fuente, escala, color, grosor, centrado=False,
+                          cachear=True):
+        """Dibuja texto con sombra (desde la caché de sprites salvo cachear=False)"""
+        if cachear:
+            SPRITES.texto(frame, texto, pos, fuente, escala, color, grosor, centrado)
+            return
         x, y = pos
         if centrado:
             (ancho_texto, alto_texto), _ = cv2.getTextSize(texto, fuente, escala, grosor)
@@ -1,440 +1,436 @@
-from utils import calcular_angulo
 import numpy as np
 
-UMBRAL_VISIBILIDAD = 0.5
-
-def landmarks_visibles(landmarks, indices):
-    """Comprueba visibilidad mínima de los landmarks requeridos."""
-    for idx in indices:
-        if landmarks[idx].visibility < UMBRAL_VISIBILIDAD:
-            return False
-    return True
+from niveles import NIVELES
+from rasgos import RasgosFrame
+from reglas import compilar_niveles, compilar_reglas
+from utils import mascara_visibilidad
+
+# Reglas declarativas de cada gesto (ver reglas.py para el vocabulario).
+# Añadir un ejercicio es añadir aquí su regla y su entrada en niveles.NIVELES.
+REGLAS_GESTOS = {
+    "brazo_derecho_arriba": {
+        "articulaciones": [12, 14, 16],
+        "condiciones": {"brazo_arriba": "angulo(12, 14, 16) < 45"},
+    },
+    "brazo_izquierdo_arriba": {
+        "articulaciones": [11, 13, 15],
+        "condiciones": {"brazo_arriba": "angulo(11, 13, 15) < 45"},
+    },
+    "rodilla_izquierda_flexionada": {
+        "articulaciones": [23, 25, 27],
+        "condiciones": {"rodilla_flexionada": "angulo(23, 25, 27) < 100"},
+    },
+    "rodilla_derecha_flexionada": {
+        "articulaciones": [24, 26, 28],
+        "condiciones": {"rodilla_flexionada": "angulo(24, 26, 28) < 100"},
+    },
+    "equilibrio_estable": {
+        "articulaciones": [27, 28],
+        "condiciones": {"pie_levantado": "y[28] < y[27] - 0.1 or y[27] < y[28] - 0.1"},
+    },
+    "extension_adelante": {
+        "articulaciones": [11, 13, 15, 12, 14, 16],
+        "condiciones": {
+            "brazos_rectos": "angulo(11, 13, 15) > 140 and angulo(12, 14, 16) > 140",
+            "manos_adelante": "z[15] < z[11] - 0.1 and z[16] < z[12] - 0.1",
+            "alturas_similares": "abs(y[15] - y[16]) < 0.1",
+        },
+    },
+    "inclinacion_lateral": {
+        "articulaciones": [11, 12, 23, 24],
+        "condiciones": {
+            "hombros_inclinados": "abs(y[11] - y[12]) > 0.08",
+            "caderas_niveladas": "abs(y[23] - y[24]) < 0.06",
+        },
+    },
+    "elevacion_rodilla": {
+        "articulaciones": [23, 25, 27, 24, 26, 28],
+        "condiciones": {
+            "izquierda": "y[25] < y[23] - 0.05",
+            "derecha": "y[26] < y[24] - 0.05",
+        },
+        "alternancia": {"lados": ["izquierda", "derecha"], "exclusiva": True},
+    },
+    "postura_ergonomica": {
+        "articulaciones": [11, 23, 25, 27],
+        "condiciones": {
+            "alineada": "abs(x[11] - x[23]) < 0.1 and abs(x[23] - x[25]) < 0.1 and abs(x[25] - x[27]) < 0.1",
+        },
+    },
+    "sentadilla": {
+        "articulaciones": [23, 25, 27, 24, 26, 28, 11, 12],
+        "rasgos": {
+            "rodilla_i": "angulo(23, 25, 27)",
+            "rodilla_d": "angulo(24, 26, 28)",
+            "cadera_media_y": "(y[23] + y[24]) / 2",
+            "rodilla_media_y": "(y[25] + y[26]) / 2",
+        },
+        "condiciones": {
+            # Ambas rodillas flexionadas (entre 70 y 120 grados)
+            "rodillas_flexionadas": "70 < rodilla_i < 120 and 70 < rodilla_d < 120",
+            # Caderas descendidas (altura de cadera cercana a altura de rodillas)
+            "caderas_bajas": "cadera_media_y > rodilla_media_y - 0.15",
+        },
+    },
+    "estocada": {
+        "articulaciones": [23, 25, 27, 24, 26, 28],
+        "condiciones": {
+            # Una rodilla flexionada (60-110°) y adelantada en profundidad
+            "izquierda": "60 < angulo(23, 25, 27) < 110 and z[25] > z[26] + 0.1",
+            "derecha": "60 < angulo(24, 26, 28) < 110 and z[26] > z[25] + 0.1",
+        },
+        "alternancia": {"lados": ["izquierda", "derecha"]},
+    },
+    "brazos_en_cruz": {
+        "articulaciones": [11, 13, 15, 12, 14, 16],
+        "condiciones": {
+            "brazos_rectos": "angulo(11, 13, 15) > 160 and angulo(12, 14, 16) > 160",
+            # Muñecas a la altura de hombros
+            "altura_similar": "abs(y[15] - y[11]) < 0.1 and abs(y[16] - y[12]) < 0.1",
+            # Brazos extendidos lateralmente (no hacia adelante)
+            "lateral": "abs(z[15] - z[11]) < 0.15 and abs(z[16] - z[12]) < 0.15",
+        },
+    },
+    "elevacion_talones": {
+        "articulaciones": [23, 25, 27, 24, 26, 28, 29, 30, 31, 32],
+        "condiciones": {
+            "piernas_rectas": "angulo(23, 25, 27) > 150 and angulo(24, 26, 28) > 150",
+            # Talones más arriba (menor Y) que los dedos, o tobillos muy cerca de la cadera
+            "de_puntillas": "(y[29] + y[30]) / 2 < (y[31] + y[32]) / 2 - 0.03"
+                            " or (y[23] + y[24]) / 2 - (y[27] + y[28]) / 2 > 0.35",
+        },
+    },
+    "rotacion_torso": {
+        "articulaciones": [11, 12, 23, 24],
+        "condiciones": {
+            # Hombro derecho más adelante / hombro izquierdo más adelante
+            "derecha": "z[12] - z[11] < -0.1",
+            "izquierda": "z[12] - z[11] > 0.1",
+        },
+        "alternancia": {"lados": ["derecha", "izquierda"]},
+    },
+    "tocar_dedos_pies": {
+        "articulaciones": [11, 12, 15, 16, 23, 24, 27, 28],
+        "condiciones": {
+            "manos_cerca_pies": "(y[15] + y[16]) / 2 > (y[27] + y[28]) / 2 - 0.2",
+            "torso_inclinado": "(y[11] + y[12]) / 2 > (y[23] + y[24]) / 2",
+        },
+    },
+    "postura_guerrero": {
+        "articulaciones": [11, 12, 13, 14, 15, 16, 23, 24, 25, 26],
+        "condiciones": {
+            "brazos_extendidos": "angulo(11, 13, 15) > 140 and angulo(12, 14, 16) > 140",
+            "una_pierna_flexionada": "inclinacion(23, 25) < 120 or inclinacion(24, 26) < 120",
+            # Una pierna adelante y otra atrás
+            "diferencia_profundidad": "abs(z[25] - z[26]) > 0.15",
+        },
+    },
+    # Versión 3D sobre world landmarks (metros); sus condiciones son los checks de depuración
+    "postura_guerrero_3d": {
+        "condiciones": {
+            "brazos_arriba": "y[15] < y[11] and y[16] < y[12]",
+            "pierna_flex": "y[27] > y[25] > y[23] or y[28] > y[26] > y[24]",
+            "profundidad": "abs(z[25] - z[26]) > 0.05",
+            "caderas_sep": "abs(x[23] - x[24]) > 0.15",
+        },
+        "medidas": {
+            "profundidad": ("abs(z[25] - z[26])", "m"),
+            "caderas_sep": ("abs(x[23] - x[24])", "m"),
+        },
+    },
+    "salto": {
+        "articulaciones": [27, 28, 25, 26],
+        "parametros": ["referencia"],
+        "condiciones": {
+            # Tobillos claramente por encima de la referencia, o rodillas levantadas
+            "en_el_aire": "(y[27] + y[28]) / 2 < referencia - 0.06"
+                          " or (y[25] + y[26]) / 2 < referencia - 0.04",
+        },
+        # Altura media de los tobillos de pie: valor inicial del parámetro
+        "medidas": {"referencia": "(y[27] + y[28]) / 2"},
+    },
+}
+
+REGLAS = compilar_reglas(REGLAS_GESTOS)
+# Detectores del entrenamiento por defecto; cada Game lleva los suyos en sus programas
+TABLA_NIVELES = compilar_niveles(NIVELES, REGLAS)
+_ATRIBUTOS_PARAMETRO = {e.parametro for e in TABLA_NIVELES if e is not None and e.parametro}
+REGLAS_WORLD = {e["world"] for e in NIVELES.values() if "world" in e}
+
+
+def landmarks_visibles(puntos, mascara, visibles=None):
+    """Comprueba visibilidad mínima de los landmarks requeridos con un único test de máscara.
+
+    visibles: máscara de visibilidad del frame ya calculada (se calcula si es None).
+    """
+    if visibles is None:
+        visibles = mascara_visibilidad(puntos)
+    return visibles & mascara == mascara
 
 
-def brazo_derecho_arriba(landmarks, espejo=False):
+def brazo_derecho_arriba(puntos, espejo=False, visibles=None):
     """Nivel 1: brazo levantado (ángulo en codo)."""
-    indices = [11, 13, 15] if espejo else [12, 14, 16]
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    hombro, codo, muñeca = [landmarks[i] for i in indices]
-    ang = calcular_angulo((hombro.x, hombro.y), (codo.x, codo.y), (muñeca.x, muñeca.y))
-    return ang < 45
+    regla = REGLAS["brazo_izquierdo_arriba" if espejo else "brazo_derecho_arriba"]
+    return regla.cumple(puntos, visibles)
 
 
-def rodilla_izquierda_flexionada(landmarks, espejo=False):
+def rodilla_izquierda_flexionada(puntos, espejo=False, visibles=None):
     """NIVEL 2: Flexión de rodilla izquierda"""
-    if espejo:
-        indices = [24, 26, 28]
-    else:
-        indices = [23, 25, 27]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    cadera, rodilla, tobillo = [landmarks[i] for i in indices]
-    ang = calcular_angulo((cadera.x, cadera.y), (rodilla.x, rodilla.y), (tobillo.x, tobillo.y))
-    return ang < 100
+    regla = REGLAS["rodilla_derecha_flexionada" if espejo else "rodilla_izquierda_flexionada"]
+    return regla.cumple(puntos, visibles)
 
 
-def equilibrio_estable(landmarks):
+def equilibrio_estable(puntos, visibles=None):
     """NIVEL 3: Equilibrio en una pierna"""
-    indices = [27, 28]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    tobillo_d = landmarks[28]
-    tobillo_i = landmarks[27]
-    
-    return tobillo_d.y < tobillo_i.y - 0.1 or tobillo_i.y < tobillo_d.y - 0.1
+    return REGLAS["equilibrio_estable"].cumple(puntos, visibles)
 
 
-def extension_adelante(landmarks):
+def extension_adelante(puntos, visibles=None):
     """NIVEL 4: Extensión de brazos hacia adelante"""
-    indices = [11, 13, 15, 12, 14, 16]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    hombro_i, codo_i, muñeca_i = [landmarks[i] for i in [11, 13, 15]]
-    hombro_d, codo_d, muñeca_d = [landmarks[i] for i in [12, 14, 16]]
-
-    ang_i = calcular_angulo((hombro_i.x, hombro_i.y), (codo_i.x, codo_i.y), (muñeca_i.x, muñeca_i.y))
-    ang_d = calcular_angulo((hombro_d.x, hombro_d.y), (codo_d.x, codo_d.y), (muñeca_d.x, muñeca_d.y))
-    brazos_rectos = ang_i > 140 and ang_d > 140
-
-    manos_adelante = muñeca_i.z < hombro_i.z - 0.1 and muñeca_d.z < hombro_d.z - 0.1
-    alturas_similares = abs(muñeca_i.y - muñeca_d.y) < 0.1
-
-    return brazos_rectos and manos_adelante and alturas_similares
+    return REGLAS["extension_adelante"].cumple(puntos, visibles)
 
 
-def inclinacion_lateral(landmarks):
+def inclinacion_lateral(puntos, visibles=None):
     """NIVEL 5: Inclinación lateral del torso"""
-    indices = [11, 12, 23, 24]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    hombro_i = landmarks[11]
-    hombro_d = landmarks[12]
-    cadera_i = landmarks[23]
-    cadera_d = landmarks[24]
-
-    diff_hombros = abs(hombro_i.y - hombro_d.y)
-    diff_caderas = abs(cadera_i.y - cadera_d.y)
-    
-    return diff_hombros > 0.08 and diff_caderas < 0.06
+    return REGLAS["inclinacion_lateral"].cumple(puntos, visibles)
 
 
-def elevacion_rodilla(landmarks, ultima_pierna="ninguna"):
+def elevacion_rodilla(puntos, ultima_pierna="ninguna", visibles=None):
     """NIVEL 6: Elevación alterna de rodillas"""
-    indices = [23, 25, 27, 24, 26, 28]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False, ultima_pierna
-    
-    cadera_i, rodilla_i, tobillo_i = [landmarks[i] for i in [23, 25, 27]]
-    cadera_d, rodilla_d, tobillo_d = [landmarks[i] for i in [24, 26, 28]]
-
-    elev_i = rodilla_i.y < cadera_i.y - 0.05
-    elev_d = rodilla_d.y < cadera_d.y - 0.05
-
-    if ultima_pierna == "ninguna":
-        if elev_i:
-            return True, "izquierda"
-        elif elev_d:
-            return True, "derecha"
-    elif ultima_pierna == "izquierda" and elev_d and not elev_i:
-        return True, "derecha"
-    elif ultima_pierna == "derecha" and elev_i and not elev_d:
-        return True, "izquierda"
-    
-    return False, ultima_pierna
+    return REGLAS["elevacion_rodilla"].alternar(puntos, ultima_pierna, visibles)
 
 
-def postura_ergonomica(landmarks):
+def postura_ergonomica(puntos, visibles=None):
     """NIVEL 7: Postura erguida y alineada"""
-    indices = [11, 23, 25, 27]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    hombro = landmarks[11]
-    cadera = landmarks[23]
-    rodilla = landmarks[25]
-    tobillo = landmarks[27]
-
-    difx1 = abs(hombro.x - cadera.x)
-    difx2 = abs(cadera.x - rodilla.x)
-    difx3 = abs(rodilla.x - tobillo.x)
-
-    return difx1 < 0.1 and difx2 < 0.1 and difx3 < 0.1
+    return REGLAS["postura_ergonomica"].cumple(puntos, visibles)
 
 
-def sentadilla(landmarks):
+def sentadilla(puntos, visibles=None):
     """NIVEL 8: Sentadilla (Squat)
     Detecta cuando ambas rodillas están flexionadas y las caderas bajadas.
     """
-    indices = [23, 25, 27, 24, 26, 28, 11, 12]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    cadera_i, rodilla_i, tobillo_i = [landmarks[i] for i in [23, 25, 27]]
-    cadera_d, rodilla_d, tobillo_d = [landmarks[i] for i in [24, 26, 28]]
-    hombro_i, hombro_d = landmarks[11], landmarks[12]
-    
-    # Ángulos de ambas rodillas
-    ang_i = calcular_angulo((cadera_i.x, cadera_i.y), (rodilla_i.x, rodilla_i.y), (tobillo_i.x, tobillo_i.y))
-    ang_d = calcular_angulo((cadera_d.x, cadera_d.y), (rodilla_d.x, rodilla_d.y), (tobillo_d.x, tobillo_d.y))
-    
-    # Ambas rodillas flexionadas (entre 70 y 120 grados)
-    rodillas_flexionadas = 70 < ang_i < 120 and 70 < ang_d < 120
-    
-    # Caderas descendidas (altura de cadera cercana a altura de rodillas)
-    cadera_media_y = (cadera_i.y + cadera_d.y) / 2
-    rodilla_media_y = (rodilla_i.y + rodilla_d.y) / 2
-    hombro_medio_y = (hombro_i.y + hombro_d.y) / 2
-    
-    caderas_bajas = cadera_media_y > rodilla_media_y - 0.15
-    
-    return rodillas_flexionadas and caderas_bajas
+    return REGLAS["sentadilla"].cumple(puntos, visibles)
 
 
-def estocada(landmarks, ultima_pierna="ninguna"):
+def estocada(puntos, ultima_pierna="ninguna", visibles=None):
     """NIVEL 9: Estocadas alternas (Lunges)
     Detecta cuando una pierna está adelante flexionada y la otra atrás.
     """
-    indices = [23, 25, 27, 24, 26, 28]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False, ultima_pierna
-    
-    cadera_i, rodilla_i, tobillo_i = [landmarks[i] for i in [23, 25, 27]]
-    cadera_d, rodilla_d, tobillo_d = [landmarks[i] for i in [24, 26, 28]]
-    
-    # Ángulos de rodillas
-    ang_i = calcular_angulo((cadera_i.x, cadera_i.y), (rodilla_i.x, rodilla_i.y), (tobillo_i.x, tobillo_i.y))
-    ang_d = calcular_angulo((cadera_d.x, cadera_d.y), (rodilla_d.x, rodilla_d.y), (tobillo_d.x, tobillo_d.y))
-    
-    # Detectar estocada: una rodilla flexionada (60-110°) y diferencia de profundidad
-    estocada_i = 60 < ang_i < 110 and rodilla_i.z > rodilla_d.z + 0.1
-    estocada_d = 60 < ang_d < 110 and rodilla_d.z > rodilla_i.z + 0.1
-    
-    # Sistema de alternancia
-    if ultima_pierna == "ninguna":
-        if estocada_i:
-            return True, "izquierda"
-        elif estocada_d:
-            return True, "derecha"
-    elif ultima_pierna == "izquierda" and estocada_d:
-        return True, "derecha"
-    elif ultima_pierna == "derecha" and estocada_i:
-        return True, "izquierda"
-    
-    return False, ultima_pierna
+    return REGLAS["estocada"].alternar(puntos, ultima_pierna, visibles)
 
 
-def brazos_en_cruz(landmarks):
+def brazos_en_cruz(puntos, visibles=None):
     """NIVEL 10: Brazos en cruz (T-Pose)
     Ambos brazos extendidos horizontalmente a los lados.
     """
-    indices = [11, 13, 15, 12, 14, 16]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    hombro_i, codo_i, muñeca_i = [landmarks[i] for i in [11, 13, 15]]
-    hombro_d, codo_d, muñeca_d = [landmarks[i] for i in [12, 14, 16]]
-    
-    # Brazos rectos
-    ang_i = calcular_angulo((hombro_i.x, hombro_i.y), (codo_i.x, codo_i.y), (muñeca_i.x, muñeca_i.y))
-    ang_d = calcular_angulo((hombro_d.x, hombro_d.y), (codo_d.x, codo_d.y), (muñeca_d.x, muñeca_d.y))
-    brazos_rectos = ang_i > 160 and ang_d > 160
-    
-    # Muñecas a la altura de hombros
-    altura_similar_i = abs(muñeca_i.y - hombro_i.y) < 0.1
-    altura_similar_d = abs(muñeca_d.y - hombro_d.y) < 0.1
-    
-    # Brazos extendidos lateralmente (no hacia adelante)
-    lateral_i = abs(muñeca_i.z - hombro_i.z) < 0.15
-    lateral_d = abs(muñeca_d.z - hombro_d.z) < 0.15
-    
-    return brazos_rectos and altura_similar_i and altura_similar_d and lateral_i and lateral_d
+    return REGLAS["brazos_en_cruz"].cumple(puntos, visibles)
 
 
-def elevacion_talones(landmarks):
+def elevacion_talones(puntos, visibles=None):
     """NIVEL 10: Elevación de talones (Calf Raises)
     Detecta cuando la persona se pone de puntillas.
     """
-    indices = [23, 25, 27, 24, 26, 28, 29, 30, 31, 32]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    cadera_i, rodilla_i, tobillo_i = [landmarks[i] for i in [23, 25, 27]]
-    cadera_d, rodilla_d, tobillo_d = [landmarks[i] for i in [24, 26, 28]]
-    
-    # Índices de los dedos de los pies y talones
-    talon_i, talon_d = landmarks[29], landmarks[30]
-    dedo_i, dedo_d = landmarks[31], landmarks[32]
-    
-    # Piernas rectas (más tolerante)
-    ang_i = calcular_angulo((cadera_i.x, cadera_i.y), (rodilla_i.x, rodilla_i.y), (tobillo_i.x, tobillo_i.y))
-    ang_d = calcular_angulo((cadera_d.x, cadera_d.y), (rodilla_d.x, rodilla_d.y), (tobillo_d.x, tobillo_d.y))
-    piernas_rectas = ang_i > 150 and ang_d > 150
-    
-    # Método mejorado: comparar talones con dedos de los pies
-    # Cuando te pones de puntillas, los talones suben más que los dedos
-    altura_talones = (talon_i.y + talon_d.y) / 2
-    altura_dedos = (dedo_i.y + dedo_d.y) / 2
-    
-    # Los talones deben estar MÁS ARRIBA (menor Y) que los dedos
-    talones_elevados = altura_talones < altura_dedos - 0.03
-    
-    # Alternativa: Los tobillos más altos de lo normal
-    tobillo_medio_y = (tobillo_i.y + tobillo_d.y) / 2
-    cadera_media_y = (cadera_i.y + cadera_d.y) / 2
-    
-    # Si el tobillo está muy cerca de la cadera (estirado), está de puntillas
-    cuerpo_estirado = (cadera_media_y - tobillo_medio_y) > 0.35
-    
-    return piernas_rectas and (talones_elevados or cuerpo_estirado)
+    return REGLAS["elevacion_talones"].cumple(puntos, visibles)
 
 
-def rotacion_torso(landmarks, ultimo_lado="ninguno"):
+def rotacion_torso(puntos, ultimo_lado="ninguno", visibles=None):
     """NIVEL 12: Rotación de torso alterna
     Detecta cuando los hombros rotan respecto a las caderas.
     """
-    indices = [11, 12, 23, 24]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False, ultimo_lado
-    
-    hombro_i, hombro_d = landmarks[11], landmarks[12]
-    cadera_i, cadera_d = landmarks[23], landmarks[24]
-    
-    # Calcular diferencia de profundidad (eje Z) entre hombros
-    diff_z_hombros = hombro_d.z - hombro_i.z
-    
-    # Rotación hacia la derecha: hombro derecho más adelante
-    rotacion_derecha = diff_z_hombros < -0.1
-    
-    # Rotación hacia la izquierda: hombro izquierdo más adelante
-    rotacion_izquierda = diff_z_hombros > 0.1
-    
-    # Sistema de alternancia
-    if ultimo_lado == "ninguno":
-        if rotacion_derecha:
-            return True, "derecha"
-        elif rotacion_izquierda:
-            return True, "izquierda"
-    elif ultimo_lado == "derecha" and rotacion_izquierda:
-        return True, "izquierda"
-    elif ultimo_lado == "izquierda" and rotacion_derecha:
-        return True, "derecha"
-    
-    return False, ultimo_lado
+    return REGLAS["rotacion_torso"].alternar(puntos, ultimo_lado, visibles)
 
 
-def tocar_dedos_pies(landmarks):
+def tocar_dedos_pies(puntos, visibles=None):
     """NIVEL 13: Tocar los dedos de los pies
     Detecta flexión hacia adelante para tocar los pies.
     """
-    indices = [11, 12, 15, 16, 23, 24, 27, 28]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    hombro_i, hombro_d = landmarks[11], landmarks[12]
-    muñeca_i, muñeca_d = landmarks[15], landmarks[16]
-    cadera_i, cadera_d = landmarks[23], landmarks[24]
-    tobillo_i, tobillo_d = landmarks[27], landmarks[28]
-    
-    # Manos cerca de los pies (altura similar)
-    altura_manos = (muñeca_i.y + muñeca_d.y) / 2
-    altura_pies = (tobillo_i.y + tobillo_d.y) / 2
-    
-    manos_cerca_pies = altura_manos > altura_pies - 0.2
-    
-    # Torso inclinado (hombros más abajo que caderas)
-    altura_hombros = (hombro_i.y + hombro_d.y) / 2
-    altura_caderas = (cadera_i.y + cadera_d.y) / 2
-    
-    torso_inclinado = altura_hombros > altura_caderas
-    
-    return manos_cerca_pies and torso_inclinado
+    return REGLAS["tocar_dedos_pies"].cumple(puntos, visibles)
 
 
-def postura_guerrero(landmarks):
+def postura_guerrero(puntos, visibles=None):
     """NIVEL 14: Postura del Guerrero (Yoga Warrior Pose)
     Una pierna adelante flexionada, brazos extendidos, torso erguido.
     """
-    indices = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    hombro_i, hombro_d = landmarks[11], landmarks[12]
-    codo_i, codo_d = landmarks[13], landmarks[14]
-    muñeca_i, muñeca_d = landmarks[15], landmarks[16]
-    cadera_i, cadera_d = landmarks[23], landmarks[24]
-    rodilla_i, rodilla_d = landmarks[25], landmarks[26]
-    
-    # Brazos extendidos
-    ang_brazo_i = calcular_angulo((hombro_i.x, hombro_i.y), (codo_i.x, codo_i.y), (muñeca_i.x, muñeca_i.y))
-    ang_brazo_d = calcular_angulo((hombro_d.x, hombro_d.y), (codo_d.x, codo_d.y), (muñeca_d.x, muñeca_d.y))
-    brazos_extendidos = ang_brazo_i > 140 and ang_brazo_d > 140
-    
-    # Una pierna flexionada
-    ang_pierna_i = calcular_angulo((cadera_i.x, cadera_i.y), (rodilla_i.x, rodilla_i.y), (cadera_i.x, rodilla_i.y))
-    ang_pierna_d = calcular_angulo((cadera_d.x, cadera_d.y), (rodilla_d.x, rodilla_d.y), (cadera_d.x, rodilla_d.y))
-    
-    una_pierna_flexionada = (ang_pierna_i < 120) or (ang_pierna_d < 120)
-    
-    # Diferencia de profundidad entre pies (una adelante, otra atrás)
-    diferencia_profundidad = abs(rodilla_i.z - rodilla_d.z) > 0.15
-    
-    return brazos_extendidos and una_pierna_flexionada and diferencia_profundidad
+    return REGLAS["postura_guerrero"].cumple(puntos, visibles)
 
 
-def postura_guerrero_3d(world_landmarks, debug=False):
+def postura_guerrero_3d(world, debug=False):
     """Detección mejorada 3D de la Postura del Guerrero usando `pose_world_landmarks`.
     Versión SIMPLIFICADA: solo checks esenciales basados en profundidad y altura.
     
+    world: array (33, 4) de world landmarks (ver utils.landmarks_a_array).
     debug: si es True, devuelve (resultado, estado_checks) para diagnosticar
     """
     # Asegurarse de que haya suficientes landmarks
-    try:
-        hombro_i = world_landmarks[11]
-        hombro_d = world_landmarks[12]
-        cadera_i = world_landmarks[23]
-        cadera_d = world_landmarks[24]
-        rodilla_i = world_landmarks[25]
-        rodilla_d = world_landmarks[26]
-        tobillo_i = world_landmarks[27]
-        tobillo_d = world_landmarks[28]
-        muneca_i = world_landmarks[15]
-        muneca_d = world_landmarks[16]
-    except Exception:
+    if world is None or len(world) < 29:
         return (False, {}) if debug else False
 
-    # Estado de checks para diagnóstico
-    checks = {}
-
-    # CHECK 1: Brazos levantados (altura de muñecas > altura de hombros)
-    munecas_levantadas = (muneca_i.y < hombro_i.y) and (muneca_d.y < hombro_d.y)
-    checks['brazos_arriba'] = (munecas_levantadas, "✓" if munecas_levantadas else "✗")
-
-    # CHECK 2: Una pierna flexionada (diferencia en Y entre cadera-rodilla-tobillo)
-    # Si el tobillo está más abajo que la cadera, la pierna está flexionada
-    pierna_i_flex = tobillo_i.y > rodilla_i.y > cadera_i.y
-    pierna_d_flex = tobillo_d.y > rodilla_d.y > cadera_d.y
-    una_pierna_flexionada = pierna_i_flex or pierna_d_flex
-    checks['pierna_flex'] = (una_pierna_flexionada, "✓" if una_pierna_flexionada else "✗")
-
-    # CHECK 3: Diferencia de profundidad significativa (una pierna adelante, otra atrás)
-    depth_diff = abs(rodilla_i.z - rodilla_d.z)
-    diferencia_profundidad = depth_diff > 0.05  # 5 cm de diferencia
-    checks['profundidad'] = (diferencia_profundidad, f"{depth_diff:.3f} m")
-
-    # CHECK 4: Postura separada (cadera ancha)
-    cadera_ancho = abs(cadera_i.x - cadera_d.x) > 0.15  # 15 cm entre caderas
-    checks['caderas_sep'] = (cadera_ancho, f"{abs(cadera_i.x - cadera_d.x):.3f} m")
-
-    resultado = munecas_levantadas and una_pierna_flexionada and diferencia_profundidad and cadera_ancho
-    
+    resultado, checks = REGLAS["postura_guerrero_3d"].depurar(world)
     if debug:
         return resultado, checks
     return resultado
 
 
-def salto_detectado(landmarks, altura_referencia):
+def salto_detectado(puntos, altura_referencia, visibles=None):
     """NIVEL 11: Salto
     Detecta cuando ambos pies se elevan del suelo.
     altura_referencia debe ser la altura media de los tobillos cuando está de pie.
     """
-    indices = [27, 28, 25, 26]
-    
-    if not landmarks_visibles(landmarks, indices):
-        return False
-    
-    tobillo_i, tobillo_d = landmarks[27], landmarks[28]
-    rodilla_i, rodilla_d = landmarks[25], landmarks[26]
-    
-    # Altura actual de los tobillos
-    altura_actual = (tobillo_i.y + tobillo_d.y) / 2
-    
-    # Altura actual de las rodillas
-    altura_rodillas = (rodilla_i.y + rodilla_d.y) / 2
-    
-    # Detección mejorada: 
-    # 1. Los tobillos deben estar significativamente más arriba (< 0.06m = 6cm)
-    # 2. Las rodillas también deben estar levantadas (flexión para saltar)
-    # 3. Umbral más relajado: 0.06 en lugar de 0.08
-    
-    tobillos_levantados = altura_actual < altura_referencia - 0.06
-    rodillas_flexionadas = altura_rodillas < altura_referencia - 0.04
-    
-    return tobillos_levantados or rodillas_flexionadas
+    return REGLAS["salto"].cumple(puntos, visibles, {"referencia": altura_referencia})
+
+
+def detectar_gesto(game, puntos, visibles=None, world=None, espejo=False, extrapolado=False):
+    """Evalúa la regla del nivel actual sobre la instantánea del frame.
+
+    puntos: array (33, 4) o RasgosFrame del frame. La regla es el detector del
+    programa del nivel actual (game.programa). Actualiza en `game` el último lado de las
+    alternancias y el parámetro de la regla (altura de referencia del salto),
+    salvo con extrapolado=True: los landmarks extrapolados no modifican el estado.
+    Devuelve (gesto_ok, checks_debug), donde checks_debug solo se rellena con
+    la variante sobre world landmarks.
+    """
+    programa = game.programa
+    entrada = programa.detector if programa is not None else None
+
+    # Los parámetros se fijan al entrar en su nivel y se olvidan al salir
+    for atributo in _ATRIBUTOS_PARAMETRO:
+        if entrada is None or entrada.parametro != atributo:
+            setattr(game, atributo, None)
+
+    if entrada is None:
+        return False, None
+
+    if world is not None and entrada.world is not None:
+        return entrada.world.depurar(world)
+
+    if visibles is None:
+        visibles = puntos["visibles"] if isinstance(puntos, RasgosFrame) else mascara_visibilidad(puntos)
+
+    regla = entrada.espejo if espejo and entrada.espejo is not None else entrada.regla
+
+    if entrada.estado is not None:
+        gesto_ok, lado = regla.alternar(puntos, getattr(game, entrada.estado), visibles)
+        if gesto_ok and not extrapolado:
+            setattr(game, entrada.estado, lado)
+        return gesto_ok, None
+
+    parametros = None
+    if entrada.parametro is not None:
+        nombre = regla.parametros[0]
+        valor = getattr(game, entrada.parametro)
+        if valor is None:
+            if extrapolado:
+                # La referencia se mide sobre un frame real
+                return False, None
+            valor = regla.medida(puntos, nombre)
+            setattr(game, entrada.parametro, valor)
+        if not valor:
+            return False, None
+        parametros = {nombre: valor}
+
+    return regla.cumple(puntos, visibles, parametros), None
+
+
+def detectar_gestos_lote(games, puntos, visibles=None, world=None, espejo=False):
+    """detectar_gesto para varias personas del mismo frame, una fila de `puntos` por juego.
+
+    puntos: array (P, 33, 4) con la persona i en la fila i; world: (P, 33, 4) o
+    None; visibles: máscaras (P,) ya calculadas. Las personas con el mismo
+    detector (mismo nivel) se evalúan juntas con una sola pasada vectorizada de su regla,
+    así que el coste crece con el número de niveles distintos, no de personas.
+    Actualiza el estado de cada juego igual que detectar_gesto y devuelve un
+    array bool (P,).
+    """
+    puntos = np.asarray(puntos)
+    if visibles is None:
+        visibles = mascara_visibilidad(puntos)
+    gestos = np.zeros(len(games), dtype=bool)
+
+    grupos = {}
+    for i, game in enumerate(games):
+        programa = game.programa
+        entrada = programa.detector if programa is not None else None
+        for atributo in _ATRIBUTOS_PARAMETRO:
+            if entrada is None or entrada.parametro != atributo:
+                setattr(game, atributo, None)
+        if entrada is not None:
+            grupos.setdefault(entrada, []).append(i)
+
+    for entrada, indices in grupos.items():
+        indices = np.array(indices, dtype=np.intp)
+        if world is not None and entrada.world is not None:
+            gestos[indices] = entrada.world.cumple_lote(world[indices])
+            continue
+
+        regla = entrada.espejo if espejo and entrada.espejo is not None else entrada.regla
+        puntos_grupo, visibles_grupo = puntos[indices], visibles[indices]
+
+        if entrada.estado is not None:
+            nombres = [lado for lado, _ in regla.lados]
+            ultimos = [nombres.index(getattr(games[i], entrada.estado))
+                       if getattr(games[i], entrada.estado) in nombres else -1 for i in indices]
+            gesto_ok, lados = regla.alternar_filas(puntos_grupo, ultimos, visibles_grupo)
+            for i, ok, lado in zip(indices, gesto_ok, lados):
+                if ok:
+                    setattr(games[i], entrada.estado, nombres[lado])
+            gestos[indices] = gesto_ok
+            continue
+
+        parametros = None
+        validos = True
+        if entrada.parametro is not None:
+            nombre = regla.parametros[0]
+            valores = np.array([getattr(games[i], entrada.parametro) for i in indices], dtype=np.float64)
+            sin_medir = np.isnan(valores)
+            if sin_medir.any():
+                # Cada persona fija su referencia en su primer frame del nivel
+                valores[sin_medir] = regla.medida(puntos_grupo[sin_medir], nombre)
+                for i, valor in zip(indices[sin_medir], valores[sin_medir]):
+                    setattr(games[i], entrada.parametro, float(valor))
+            parametros = {nombre: valores}
+            validos = valores != 0
+
+        gestos[indices] = regla.cumple_lote(puntos_grupo, visibles_grupo, parametros) & validos
+    return gestos
+
+
+def evaluar_sesion(puntos, world=None, visibles=None, validos=None):
+    """Evalúa todas las reglas sobre una sesión completa, sin bucles por frame.
+
+    puntos: array (T, 33, 4); world: array (T, 33, 4) o None; visibles: máscaras
+    (T,) ya calculadas; validos: bool (T,) opcional con los frames que tienen
+    landmarks (p. ej. HAY_PUNTOS de una grabación). Devuelve un dict nombre de
+    regla -> array bool (T,). En las alternancias el valor es True en los frames
+    que cuentan repetición (empezando sin último lado). Los parámetros toman como
+    valor su medida en el primer frame válido con los landmarks de la regla
+    visibles, igual que al entrar en el nivel; sin ese frame la regla no se
+    cumple en ninguno. Las reglas sobre world
+    landmarks solo se evalúan si se pasa `world`. Los ángulos de todas las
+    reglas se calculan una sola vez para toda la sesión (ver rasgos.py).
+    """
+    puntos = np.asarray(puntos)
+    if visibles is None:
+        visibles = mascara_visibilidad(puntos)
+    rasgos = RasgosFrame(puntos, visibles)
+
+    resultados = {}
+    for nombre, regla in REGLAS.items():
+        if nombre in REGLAS_WORLD:
+            if world is not None:
+                resultados[nombre] = regla.cumple_lote(world)
+        elif regla.lados:
+            resultados[nombre], _ = regla.alternar_lote(rasgos, visibles=visibles)
+        elif regla.parametros:
+            # Las grabaciones suelen empezar sin nadie delante (frames a cero)
+            medibles = np.asarray(regla.visible(rasgos, visibles), dtype=bool)
+            if validos is not None:
+                medibles = medibles & validos
+            primeros = np.flatnonzero(medibles)
+            if len(primeros) == 0:
+                resultados[nombre] = np.zeros(len(puntos), dtype=bool)
+                continue
+            parametros = {p: regla.medida(puntos[primeros[0]], p) for p in regla.parametros}
+            resultados[nombre] = regla.cumple_lote(rasgos, visibles, parametros)
+        else:
+            resultados[nombre] = regla.cumple_lote(rasgos, visibles)
+    return resultados
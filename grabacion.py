@@ -0,0 +1,188 @@
+"""Grabación y reproducción de flujos de landmarks.
+
+El grabador escribe cada frame (tiempo, landmarks normalizados y world
+landmarks) en un fichero preasignado y mapeado en memoria, sin copias ni
+serialización en el bucle del juego. El reproductor pasa las grabaciones por el
+mismo despacho de detectores y por Game.actualizar sin cámara, sin MediaPipe y
+sin ventana, tan rápido como permita la CPU.
+
+Uso:
+    python grabacion.py sesion1.lmk sesion2.lmk --dificultad normal
+    python grabacion.py sesion1.lmk --detectores
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from game_logic import Game
+from gestures import detectar_gesto, evaluar_sesion, REGLAS_WORLD
+from utils import mascara_visibilidad, NUM_LANDMARKS
+
+MAGIA = b"HTLMK001"
+TAMANO_CABECERA = 64
+CABECERA = np.dtype([
+    ("magia", "S8"),
+    ("frames", "<u8"),
+    ("capacidad", "<u8"),
+])
+REGISTRO = np.dtype([
+    ("tiempo", "<f8"),
+    ("flags", "u1"),  # bit 0: hay landmarks, bit 1: hay world landmarks
+    ("puntos", "<f4", (NUM_LANDMARKS, 4)),
+    ("world", "<f4", (NUM_LANDMARKS, 4)),
+])
+HAY_PUNTOS = 1
+HAY_WORLD = 2
+
+
+class GrabadorLandmarks:
+    """Graba landmarks por frame en un fichero preasignado mapeado en memoria."""
+
+    def __init__(self, ruta, capacidad=108000):
+        # Por defecto: una hora a 30 fps
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.frames = 0
+        self._aviso_lleno = False
+
+        with open(ruta, "wb") as f:
+            f.truncate(TAMANO_CABECERA + capacidad * REGISTRO.itemsize)
+        self._cabecera = np.memmap(ruta, dtype=CABECERA, mode="r+", shape=(1,))
+        self._cabecera["magia"] = MAGIA
+        self._cabecera["capacidad"] = capacidad
+        self._cabecera["frames"] = 0
+        self._datos = np.memmap(ruta, dtype=REGISTRO, mode="r+",
+                                offset=TAMANO_CABECERA, shape=(capacidad,))
+
+    def grabar(self, tiempo, puntos, world=None):
+        """Añade un frame. `puntos` y `world` son arrays (33, 4) o None."""
+        if self.frames >= self.capacidad:
+            if not self._aviso_lleno:
+                print(f"Grabación llena ({self.capacidad} frames): se dejan de grabar frames")
+                self._aviso_lleno = True
+            return
+
+        registro = self._datos[self.frames]
+        flags = 0
+        if puntos is not None:
+            registro["puntos"] = puntos
+            flags |= HAY_PUNTOS
+        if world is not None:
+            registro["world"] = world
+            flags |= HAY_WORLD
+        registro["tiempo"] = tiempo
+        registro["flags"] = flags
+
+        self.frames += 1
+        # El contador en cabecera mantiene la grabación legible aunque el proceso muera
+        self._cabecera["frames"] = self.frames
+
+    def cerrar(self):
+        """Vuelca a disco y recorta el fichero a los frames realmente grabados."""
+        if self._datos is None:
+            return
+        self._datos.flush()
+        self._cabecera.flush()
+        self._datos = None
+        self._cabecera = None
+        with open(self.ruta, "r+b") as f:
+            f.truncate(TAMANO_CABECERA + self.frames * REGISTRO.itemsize)
+
+
+def cargar_grabacion(ruta):
+    """Abre una grabación en solo lectura. Devuelve un array estructurado (T,) con REGISTRO."""
+    cabecera = np.fromfile(ruta, dtype=CABECERA, count=1)[0]
+    if cabecera["magia"] != MAGIA:
+        raise ValueError(f"{ruta} no es una grabación de landmarks")
+    frames = int(cabecera["frames"])
+    if frames == 0:
+        return np.zeros(0, dtype=REGISTRO)
+    return np.memmap(ruta, dtype=REGISTRO, mode="r", offset=TAMANO_CABECERA, shape=(frames,))
+
+
+def reproducir(datos, dificultad="normal", espejo=True):
+    """Pasa una grabación por el despacho de detectores y Game.actualizar.
+
+    Devuelve el Game resultante. Usa los tiempos grabados, así que el
+    resultado es reproducible e independiente de la velocidad de la CPU.
+    """
+    game = Game()
+    game.cambiar_dificultad(dificultad)
+    game.iniciar_juego()
+
+    tiempos = datos["tiempo"]
+    flags = datos["flags"]
+    puntos = datos["puntos"]
+    world = datos["world"]
+    # Máscaras de visibilidad de toda la sesión en una sola pasada vectorizada
+    visibles = mascara_visibilidad(puntos) if len(datos) else []
+
+    for t in range(len(datos)):
+        if game.estado == "completado":
+            break
+        if not flags[t] & HAY_PUNTOS:
+            continue
+        world_t = world[t] if flags[t] & HAY_WORLD else None
+        if game.estado in ["jugando", "mostrando_instruccion"]:
+            gesto_ok, _ = detectar_gesto(game, puntos[t], int(visibles[t]), world_t, espejo=espejo)
+            game.actualizar(gesto_ok, float(tiempos[t]))
+    return game
+
+
+def analizar(datos):
+    """Evalúa todos los detectores sobre cada frame de una grabación, en bloque.
+
+    Devuelve un dict nombre de regla -> array bool (T,). Los frames sin
+    landmarks (o sin world landmarks, para las reglas 3D) cuentan como False.
+    """
+    flags = datos["flags"]
+    hay_world = flags & HAY_WORLD != 0
+    hay_puntos = flags & HAY_PUNTOS != 0
+    resultados = evaluar_sesion(datos["puntos"], datos["world"] if hay_world.any() else None, validos=hay_puntos)
+    for nombre, disparos in resultados.items():
+        disparos &= hay_world if nombre in REGLAS_WORLD else hay_puntos
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce grabaciones de landmarks sin cámara")
+    parser.add_argument("grabaciones", nargs="+", help="ficheros grabados con apli.py --grabar")
+    parser.add_argument("--dificultad", default="normal", choices=["facil", "normal", "dificil"])
+    parser.add_argument("--sin-espejo", action="store_true", help="las grabaciones no están en modo espejo")
+    parser.add_argument("--detectores", action="store_true",
+                        help="en lugar de jugar, cuenta en qué frames se cumple cada detector")
+    args = parser.parse_args(argv)
+
+    if args.detectores:
+        for ruta in args.grabaciones:
+            datos = cargar_grabacion(ruta)
+            t0 = time.perf_counter()
+            resultados = analizar(datos)
+            duracion = time.perf_counter() - t0
+            print(f"{os.path.basename(ruta)}: {len(datos)} frames analizados en {duracion:.3f}s "
+                  f"({len(datos) / max(duracion, 1e-9):.0f} fps)")
+            for nombre, disparos in resultados.items():
+                print(f"  {nombre:<30} {int(disparos.sum()):>7} frames")
+        return
+
+    total_frames = 0
+    inicio = time.perf_counter()
+    for ruta in args.grabaciones:
+        datos = cargar_grabacion(ruta)
+        t0 = time.perf_counter()
+        game = reproducir(datos, args.dificultad, espejo=not args.sin_espejo)
+        duracion = time.perf_counter() - t0
+        total_frames += len(datos)
+        print(f"{os.path.basename(ruta)}: {len(datos)} frames en {duracion:.3f}s  "
+              f"({len(datos) / max(duracion, 1e-9):.0f} fps)  estado={game.estado}  "
+              f"nivel={game.nivel}  puntos={game.puntos}  estrellas={sum(game.estrellas_nivel)}")
+
+    total = time.perf_counter() - inicio
+    print(f"Total: {len(args.grabaciones)} sesiones, {total_frames} frames en {total:.3f}s "
+          f"({total_frames / max(total, 1e-9):.0f} fps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Historial persistente de partidas en SQLite (modo WAL).
+
+El bucle del juego nunca espera al disco: los eventos (inicio y fin de sesión,
+niveles completados, logros, repeticiones analizadas) se encolan en memoria y un hilo escritor los
+vuelca por lotes, una transacción por lote, cada `intervalo` segundos o en
+cuanto se acumulan `maximo_lote` eventos. Con journal_mode=WAL y
+synchronous=NORMAL cada lote es una escritura secuencial al log, sin fsync por
+evento, y las consultas de historial pueden leer mientras se escribe.
+
+Uso:
+    python historial.py historial.db --usuario ana
+"""
+import argparse
+import collections
+import itertools
+import sqlite3
+import threading
+import time
+import uuid
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    id TEXT PRIMARY KEY,
+    usuario TEXT NOT NULL,
+    dificultad TEXT,
+    inicio REAL NOT NULL,
+    fin REAL,
+    puntos INTEGER NOT NULL DEFAULT 0,
+    nivel_final INTEGER,
+    estrellas INTEGER NOT NULL DEFAULT 0,
+    racha_maxima INTEGER NOT NULL DEFAULT 0,
+    logros INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sesiones_usuario ON sesiones (usuario, inicio);
+
+CREATE TABLE IF NOT EXISTS niveles (
+    sesion TEXT NOT NULL,
+    usuario TEXT NOT NULL,
+    nivel INTEGER NOT NULL,
+    tiempo REAL NOT NULL,
+    duracion REAL NOT NULL,
+    estrellas INTEGER NOT NULL,
+    puntos INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS niveles_usuario ON niveles (usuario, nivel, duracion);
+CREATE INDEX IF NOT EXISTS niveles_sesion ON niveles (sesion);
+
+CREATE TABLE IF NOT EXISTS logros (
+    sesion TEXT NOT NULL,
+    usuario TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    tiempo REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logros_usuario ON logros (usuario, tiempo);
+
+CREATE TABLE IF NOT EXISTS repeticiones (
+    sesion TEXT NOT NULL,
+    usuario TEXT NOT NULL,
+    movimiento TEXT NOT NULL,
+    lado INTEGER,
+    tiempo REAL NOT NULL,
+    duracion REAL NOT NULL,
+    bajada REAL NOT NULL,
+    subida REAL NOT NULL,
+    minimo REAL NOT NULL,
+    rom REAL NOT NULL,
+    simetria REAL
+);
+CREATE INDEX IF NOT EXISTS repeticiones_usuario ON repeticiones (usuario, movimiento, tiempo);
+"""
+
+_INSERTAR_SESION = "INSERT INTO sesiones (id, usuario, dificultad, inicio) VALUES (?, ?, ?, ?)"
+_TERMINAR_SESION = ("UPDATE sesiones SET fin = ?, dificultad = ?, puntos = ?, nivel_final = ?, "
+                    "estrellas = ?, racha_maxima = ?, logros = ? WHERE id = ?")
+_INSERTAR_NIVEL = ("INSERT INTO niveles (sesion, usuario, nivel, tiempo, duracion, estrellas, puntos) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_INSERTAR_LOGRO = "INSERT INTO logros (sesion, usuario, nombre, tiempo) VALUES (?, ?, ?, ?)"
+_INSERTAR_REPETICION = ("INSERT INTO repeticiones (sesion, usuario, movimiento, lado, tiempo, duracion, bajada, "
+                        "subida, minimo, rom, simetria) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def conectar(ruta):
+    """Conexión a la base de datos en modo WAL, con el esquema creado."""
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+class RegistroSesion:
+    """Partidas de un usuario; se pasa como Game(al_evento=...) para registrar sus eventos.
+
+    Cada partida es una fila de `sesiones`: Game emite "inicio" al empezarla y
+    "fin" con sus totales al reiniciar, volver al menú o salir. También acepta
+    los eventos "repeticion" de analitica.AnaliticaRepeticiones. Los eventos
+    fuera de una partida se ignoran.
+    """
+
+    def __init__(self, almacen, usuario):
+        self.almacen = almacen
+        self.usuario = usuario
+        self.id = None  # Sesión de la partida en curso
+
+    def __call__(self, tipo, datos):
+        if tipo == "inicio":
+            self.id = uuid.uuid4().hex
+            self.almacen.encolar(_INSERTAR_SESION, (self.id, self.usuario, datos["dificultad"], datos["tiempo"]))
+        elif self.id is None:
+            return
+        elif tipo == "fin":
+            self.almacen.encolar(_TERMINAR_SESION, (datos["tiempo"], datos["dificultad"], datos["puntos"],
+                                                    datos["nivel_final"], datos["estrellas"],
+                                                    datos["racha_maxima"], datos["logros"], self.id))
+            self.id = None
+        elif tipo == "nivel":
+            self.almacen.encolar(_INSERTAR_NIVEL, (self.id, self.usuario, datos["nivel"], datos["tiempo"],
+                                                   datos["duracion"], datos["estrellas"], datos["puntos"]))
+        elif tipo == "logro":
+            self.almacen.encolar(_INSERTAR_LOGRO, (self.id, self.usuario, datos["nombre"], datos["tiempo"]))
+        elif tipo == "repeticion":
+            self.almacen.encolar(_INSERTAR_REPETICION, (
+                self.id, self.usuario, datos["movimiento"], datos.get("lado"), datos["tiempo"], datos["duracion"],
+                datos["bajada"], datos["subida"], datos["minimo"], datos["rom"], datos["simetria"]))
+
+
+class AlmacenSesiones:
+    """Cola de escrituras en memoria con un hilo que las vuelca por lotes a SQLite.
+
+    encolar() no toca el disco y se puede llamar desde cualquier hilo.
+    """
+
+    def __init__(self, ruta, intervalo=1.0, maximo_lote=512):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.maximo_lote = maximo_lote
+        self.escritos = 0
+        self.lotes = 0
+        self.errores = 0
+        self._cola = collections.deque()
+        self._hay_lote = threading.Event()
+        self._detener = threading.Event()
+        # El esquema se crea antes de empezar, fuera del bucle del juego
+        conectar(ruta).close()
+        self._hilo = threading.Thread(target=self._escribir, name="historial", daemon=True)
+        self._hilo.start()
+
+    def sesion(self, usuario):
+        return RegistroSesion(self, usuario)
+
+    def encolar(self, sql, fila):
+        self._cola.append((sql, fila))
+        if len(self._cola) >= self.maximo_lote:
+            self._hay_lote.set()
+
+    def _escribir(self):
+        conexion = conectar(self.ruta)
+        try:
+            while not self._detener.is_set():
+                self._hay_lote.wait(self.intervalo)
+                self._hay_lote.clear()
+                self._volcar(conexion)
+            while self._cola:
+                self._volcar(conexion)
+        finally:
+            conexion.close()
+
+    def _volcar(self, conexion):
+        lote = []
+        while self._cola and len(lote) < 4 * self.maximo_lote:
+            lote.append(self._cola.popleft())
+        if not lote:
+            return
+        try:
+            # Una sola transacción; las filas consecutivas de la misma sentencia van juntas
+            with conexion:
+                for sql, grupo in itertools.groupby(lote, key=lambda evento: evento[0]):
+                    conexion.executemany(sql, [fila for _, fila in grupo])
+        except sqlite3.Error as e:
+            # Un fallo de disco no debe tumbar la partida: se pierde el lote y se avisa
+            self.errores += 1
+            print(f"[Historial] No se pudieron guardar {len(lote)} eventos: {e}")
+            return
+        self.escritos += len(lote)
+        self.lotes += 1
+        if self._cola:
+            self._hay_lote.set()
+
+    def cerrar(self):
+        """Vuelca lo pendiente y detiene el hilo escritor."""
+        self._detener.set()
+        self._hay_lote.set()
+        self._hilo.join()
+
+
+def historial(ruta, usuario, limite=10):
+    """Últimas sesiones de un usuario, de la más reciente a la más antigua."""
+    conexion = conectar(ruta)
+    try:
+        return conexion.execute(
+            "SELECT inicio, fin, dificultad, puntos, nivel_final, estrellas, racha_maxima, logros "
+            "FROM sesiones WHERE usuario = ? ORDER BY inicio DESC LIMIT ?", (usuario, limite)).fetchall()
+    finally:
+        conexion.close()
+
+
+def mejores_tiempos(ruta, usuario):
+    """Por nivel: mejor tiempo, máximo de estrellas y veces completado por el usuario."""
+    conexion = conectar(ruta)
+    try:
+        return conexion.execute(
+            "SELECT nivel, MIN(duracion), MAX(estrellas), COUNT(*) FROM niveles "
+            "WHERE usuario = ? GROUP BY nivel ORDER BY nivel", (usuario,)).fetchall()
+    finally:
+        conexion.close()
+
+
+def repeticiones(ruta, usuario):
+    """Por movimiento: repeticiones, tempo medio, rango medio, mínimo absoluto y simetría media."""
+    conexion = conectar(ruta)
+    try:
+        return conexion.execute(
+            "SELECT movimiento, COUNT(*), AVG(duracion), AVG(rom), MIN(minimo), AVG(simetria) FROM repeticiones "
+            "WHERE usuario = ? GROUP BY movimiento ORDER BY movimiento", (usuario,)).fetchall()
+    finally:
+        conexion.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta el historial de partidas")
+    parser.add_argument("ruta", help="base de datos del historial (apli.py --historial)")
+    parser.add_argument("--usuario", default="invitado")
+    parser.add_argument("--limite", type=int, default=10, help="número de sesiones a mostrar")
+    args = parser.parse_args(argv)
+
+    print(f"Últimas sesiones de {args.usuario}:")
+    for inicio, fin, dificultad, puntos, nivel, estrellas, racha, logros in historial(args.ruta, args.usuario,
+                                                                                      args.limite):
+        duracion = f"{(fin - inicio) / 60:.1f} min" if fin else "sin terminar"
+        print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(inicio))}  {dificultad:<8} "
+              f"{duracion:>12}  nivel {nivel or '-':>2}  {puntos:>5} puntos  {estrellas:>2} estrellas  "
+              f"racha {racha}  logros {logros}")
+
+    print("\nMejores tiempos por nivel:")
+    for nivel, duracion, estrellas, veces in mejores_tiempos(args.ruta, args.usuario):
+        print(f"  Nivel {nivel:>2}: {duracion:6.1f}s  {'*' * estrellas:<3}  ({veces} veces)")
+
+    filas = repeticiones(args.ruta, args.usuario)
+    if filas:
+        print("\nRepeticiones por movimiento:")
+    for movimiento, veces, duracion, rom, minimo, sim in filas:
+        simetria = f"  simetría {sim:.0%}" if sim is not None else ""
+        print(f"  {movimiento:<18} {veces:>5} reps  tempo {duracion:4.1f}s  rango {rom:5.1f}  "
+              f"mínimo {minimo:5.1f}{simetria}")
+
+
+if __name__ == "__main__":
+    main()
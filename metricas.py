@@ -0,0 +1,148 @@
+"""Latencia por etapa del bucle principal: ventanas móviles, overlay y exportación.
+
+Cada etapa guarda sus últimas muestras en un buffer circular de tamaño fijo;
+los percentiles (p50/p95/p99) solo se calculan al exportar o al refrescar el
+overlay, así que medir una etapa cuesta una lectura de reloj y una escritura.
+La exportación periódica escribe JSON (ruta .json) o texto de Prometheus
+(cualquier otra extensión) de forma atómica, para que un agente externo
+pueda leer el fichero en cualquier momento.
+"""
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from sprites import dibujar_texto, panel_translucido
+
+PERCENTILES = (50, 95, 99)
+
+
+class VentanaLatencia:
+    """Últimas `capacidad` muestras de una etapa (segundos) más los acumulados totales."""
+
+    __slots__ = ("muestras", "total", "suma")
+
+    def __init__(self, capacidad=512):
+        self.muestras = np.zeros(capacidad, dtype=np.float64)
+        self.total = 0
+        self.suma = 0.0
+
+    def registrar(self, segundos):
+        self.muestras[self.total % len(self.muestras)] = segundos
+        self.total += 1
+        self.suma += segundos
+
+    def percentiles(self):
+        """(p50, p95, p99) de la ventana en segundos, o None si no hay muestras."""
+        n = min(self.total, len(self.muestras))
+        if not n:
+            return None
+        return tuple(np.percentile(self.muestras[:n], PERCENTILES))
+
+
+class Metricas:
+    """Instrumentación de las etapas del bucle.
+
+    Uso: t = time.perf_counter(); ...; t = metricas.medir("lectura", t); ...
+    medir devuelve el instante actual para encadenar etapas consecutivas. Cada
+    etapa debe medirse siempre desde el mismo hilo (las del pipeline desde sus hilos).
+    ruta: fichero de exportación (None para no exportar).
+    """
+
+    def __init__(self, ruta=None, intervalo=5.0, capacidad=512):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.capacidad = capacidad
+        self.etapas = {}
+        self.visible = False  # Overlay en pantalla (tecla T)
+        self._ultima_exportacion = time.monotonic()
+        self._inicio_frame = None
+        self._filas = []
+        self._refresco = 0.0
+
+    def medir(self, nombre, inicio):
+        """Registra la duración desde `inicio` (perf_counter) en la etapa y devuelve el instante actual."""
+        ahora = time.perf_counter()
+        etapa = self.etapas.get(nombre)
+        if etapa is None:
+            etapa = self.etapas[nombre] = VentanaLatencia(self.capacidad)
+        etapa.registrar(ahora - inicio)
+        return ahora
+
+    def fin_frame(self):
+        """Cierra el frame: registra su duración total y exporta si toca."""
+        ahora = time.perf_counter()
+        if self._inicio_frame is not None:
+            self.medir("frame", self._inicio_frame)
+        self._inicio_frame = ahora
+        if self.ruta is not None and time.monotonic() - self._ultima_exportacion >= self.intervalo:
+            self.exportar()
+
+    def resumen(self):
+        """Dict etapa -> {p50, p95, p99 (ms), total, suma (s)}."""
+        datos = {}
+        for nombre, etapa in list(self.etapas.items()):
+            percentiles = etapa.percentiles()
+            if percentiles is None:
+                continue
+            datos[nombre] = {f"p{q}": round(v * 1000, 3) for q, v in zip(PERCENTILES, percentiles)}
+            datos[nombre]["total"] = etapa.total
+            datos[nombre]["suma"] = round(etapa.suma, 6)
+        return datos
+
+    def texto_prometheus(self):
+        lineas = [
+            "# HELP hometrainer_etapa_segundos Latencia de cada etapa del bucle principal",
+            "# TYPE hometrainer_etapa_segundos summary",
+        ]
+        for nombre, etapa in list(self.etapas.items()):
+            percentiles = etapa.percentiles()
+            if percentiles is None:
+                continue
+            for q, valor in zip(PERCENTILES, percentiles):
+                lineas.append(f'hometrainer_etapa_segundos{{etapa="{nombre}",quantile="{q / 100}"}} {valor:.6g}')
+            lineas.append(f'hometrainer_etapa_segundos_sum{{etapa="{nombre}"}} {etapa.suma:.6g}')
+            lineas.append(f'hometrainer_etapa_segundos_count{{etapa="{nombre}"}} {etapa.total}')
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self):
+        """Escribe las métricas en self.ruta (JSON o Prometheus) sustituyendo el fichero de golpe."""
+        self._ultima_exportacion = time.monotonic()
+        if self.ruta.lower().endswith(".json"):
+            contenido = json.dumps({"tiempo": time.time(), "etapas_ms": self.resumen()}, indent=2)
+        else:
+            contenido = self.texto_prometheus()
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(contenido)
+        os.replace(temporal, self.ruta)
+
+    def tabla(self):
+        """Líneas de texto con p50/p95/p99 de cada etapa en ms."""
+        lineas = [f"{'etapa':<14}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)"]
+        for nombre, valores in self.resumen().items():
+            lineas.append(f"{nombre:<14}{valores['p50']:>8.2f}{valores['p95']:>8.2f}{valores['p99']:>8.2f}")
+        return lineas
+
+    def dibujar(self, frame):
+        """Overlay con la tabla de latencias (se recalcula dos veces por segundo)."""
+        if not self.visible:
+            return
+        ahora = time.monotonic()
+        if ahora - self._refresco >= 0.5:
+            self._refresco = ahora
+            self._filas = [("etapa (ms)", "p50", "p95", "p99")] + [
+                (nombre, f"{v['p50']:.2f}", f"{v['p95']:.2f}", f"{v['p99']:.2f}")
+                for nombre, v in self.resumen().items()
+            ]
+        h, w = frame.shape[:2]
+        alto = 18 * len(self._filas) + 10
+        x0, y0 = w - 320, h - alto - 50
+        panel_translucido(frame, x0, y0, w - 10, y0 + alto, (20, 20, 20), 0.75)
+        # Columnas en posiciones fijas: la fuente no es monoespaciada
+        for i, fila in enumerate(self._filas):
+            y = y0 + 20 + 18 * i
+            for texto, dx in zip(fila, (8, 130, 190, 250)):
+                dibujar_texto(frame, texto, (x0 + dx, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (200, 255, 200), 1)
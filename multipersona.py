@@ -0,0 +1,238 @@
+"""Modo multijugador: varias personas delante de la misma cámara, cada una con su partida.
+
+PoseMultiple envuelve el PoseLandmarker de MediaPipe Tasks (num_poses > 1),
+que entrega todas las poses del frame en una sola llamada. El orden de las
+poses cambia de un frame a otro, así que AsignadorIdentidades les da un
+identificador estable emparejándolas con las del frame anterior por la
+distancia entre centros del torso (emparejamiento voraz sobre una matriz de
+distancias P x P, despreciable frente a la inferencia). PartidaMultiple
+guarda un Game por identificador y evalúa los gestos de todas las personas
+en una sola pasada vectorizada por nivel (gestures.detectar_gestos_lote).
+"""
+import collections
+import time
+
+import cv2
+import numpy as np
+
+from game_logic import Game
+from gestures import detectar_gestos_lote
+from sprites import dibujar_texto, panel_translucido
+from utils import landmarks_a_array, NUM_LANDMARKS, VIS, X, Y
+
+# Hombros y caderas: el centro del torso es estable aunque se muevan brazos y piernas
+_TORSO = [11, 12, 23, 24]
+
+# Color de cada jugador (BGR), por identificador
+COLORES_JUGADOR = [(255, 200, 0), (0, 200, 255), (200, 0, 255), (0, 255, 120), (255, 80, 80), (80, 80, 255)]
+
+# Lo que queda de la partida de una persona que salió de la imagen
+ResumenJugador = collections.namedtuple("ResumenJugador", ["identificador", "nivel", "puntos", "racha_maxima"])
+
+
+class PoseMultiple:
+    """PoseLandmarker de MediaPipe Tasks en modo vídeo con hasta `num_poses` personas.
+
+    modelo: ruta del fichero .task del pose landmarker (lite/full/heavy).
+    """
+
+    def __init__(self, modelo, num_poses=2, min_confianza=0.5):
+        from mediapipe.tasks.python import BaseOptions, vision
+
+        self.num_poses = num_poses
+        opciones = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=modelo),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=num_poses,
+            min_pose_detection_confidence=min_confianza,
+            min_pose_presence_confidence=min_confianza,
+            min_tracking_confidence=min_confianza,
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(opciones)
+        self._ultimo_ms = -1
+        self._puntos = np.zeros((num_poses, NUM_LANDMARKS, 4), dtype=np.float32)
+        self._world = np.zeros((num_poses, NUM_LANDMARKS, 4), dtype=np.float32)
+
+    def detectar(self, frame_rgb):
+        """Devuelve (puntos, world), arrays (P, 33, 4) con las P personas detectadas.
+
+        Los arrays son vistas de buffers que se reutilizan en la siguiente llamada.
+        """
+        import mediapipe as mp
+
+        # El modo vídeo exige marcas de tiempo estrictamente crecientes
+        marca = max(int(time.perf_counter() * 1000), self._ultimo_ms + 1)
+        self._ultimo_ms = marca
+        imagen = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+        resultado = self.landmarker.detect_for_video(imagen, marca)
+
+        n = len(resultado.pose_landmarks)
+        for i, landmarks in enumerate(resultado.pose_landmarks):
+            landmarks_a_array(landmarks, self._puntos[i])
+        world = None
+        if len(resultado.pose_world_landmarks) == n:
+            for i, landmarks in enumerate(resultado.pose_world_landmarks):
+                landmarks_a_array(landmarks, self._world[i])
+            world = self._world[:n]
+        return self._puntos[:n], world
+
+    def descripcion(self):
+        return f"PoseLandmarker, hasta {self.num_poses} personas"
+
+    def close(self):
+        self.landmarker.close()
+
+
+def centros_torso(puntos):
+    """Centro (x, y) del torso de cada persona, ponderado por visibilidad: (P, 33, 4) -> (P, 2)."""
+    torso = puntos[:, _TORSO]
+    pesos = torso[..., VIS:VIS + 1]
+    total = pesos.sum(axis=1)
+    centros = (torso[..., [X, Y]] * pesos).sum(axis=1) / np.maximum(total, 1e-6)
+    # Torso sin visibilidad: media de todos los landmarks
+    sin_torso = total[:, 0] < 1e-6
+    centros[sin_torso] = puntos[sin_torso][..., [X, Y]].mean(axis=1)
+    return centros
+
+
+class AsignadorIdentidades:
+    """Identificadores estables por persona a partir de los centros del torso de cada frame.
+
+    distancia_maxima: desplazamiento máximo entre frames (coordenadas normalizadas)
+    para seguir siendo la misma persona. frames_perdida: frames sin ver a una
+    persona antes de retirar su identificador.
+    """
+
+    def __init__(self, distancia_maxima=0.2, frames_perdida=30):
+        self.distancia_maxima = distancia_maxima
+        self.frames_perdida = frames_perdida
+        self.ids = []
+        self.centros = np.zeros((0, 2))
+        self.perdidos = []
+        self._siguiente = 1
+
+    def asignar(self, centros):
+        """Devuelve (ids, retirados): el identificador de cada centro y los que dejan de existir."""
+        ids = [None] * len(centros)
+        usados = set()
+        if len(self.ids) and len(centros):
+            distancias = np.linalg.norm(self.centros[:, None] - centros[None], axis=-1)
+            # Voraz: primero las parejas más cercanas
+            for plano in np.argsort(distancias, axis=None):
+                pista, i = divmod(int(plano), len(centros))
+                if distancias[pista, i] > self.distancia_maxima:
+                    break
+                if pista in usados or ids[i] is not None:
+                    continue
+                usados.add(pista)
+                ids[i] = self.ids[pista]
+
+        nuevos_ids, nuevos_centros, nuevos_perdidos, retirados = [], [], [], []
+        for pista, identificador in enumerate(self.ids):
+            if pista in usados:
+                continue
+            if self.perdidos[pista] + 1 >= self.frames_perdida:
+                retirados.append(identificador)
+            else:
+                nuevos_ids.append(identificador)
+                nuevos_centros.append(self.centros[pista])
+                nuevos_perdidos.append(self.perdidos[pista] + 1)
+        for i, centro in enumerate(centros):
+            if ids[i] is None:
+                ids[i] = self._siguiente
+                self._siguiente += 1
+            nuevos_ids.append(ids[i])
+            nuevos_centros.append(centro)
+            nuevos_perdidos.append(0)
+
+        self.ids = nuevos_ids
+        self.centros = np.array(nuevos_centros).reshape(-1, 2)
+        self.perdidos = nuevos_perdidos
+        return ids, retirados
+
+
+class PartidaMultiple:
+    """Un Game por persona, con la detección de gestos de todas en una pasada por nivel.
+
+    max_finalizados: resúmenes de jugadores retirados que se conservan para el
+    marcador final (los más antiguos se descartan en sesiones largas).
+    """
+
+    def __init__(self, dificultad="normal", asignador=None, almacen=None, usuario="invitado", max_finalizados=50):
+        self.dificultad = dificultad
+        self.asignador = asignador or AsignadorIdentidades()
+        self.almacen = almacen  # historial.AlmacenSesiones opcional: una sesión por jugador
+        self.usuario = usuario
+        self.juegos = {}  # identificador -> Game
+        self.finalizados = collections.deque(maxlen=max_finalizados)  # ResumenJugador de los retirados
+        self.ids = []  # Identificador de cada fila del último frame
+
+    def cambiar_dificultad(self, dificultad):
+        """Dificultad de las partidas en curso y de las personas que entren después"""
+        self.dificultad = dificultad
+        for game in self.juegos.values():
+            game.cambiar_dificultad(dificultad)
+
+    def _juego(self, identificador):
+        game = self.juegos.get(identificador)
+        if game is None:
+            game = self.juegos[identificador] = Game()
+            game.cambiar_dificultad(self.dificultad)
+            if self.almacen is not None:
+                game.al_evento = self.almacen.sesion(f"{self.usuario}-J{identificador}")
+            game.iniciar_juego()
+        return game
+
+    def actualizar(self, puntos, visibles, world, tiempo, espejo=False):
+        """Asigna identidades a las poses del frame, detecta los gestos y actualiza cada partida."""
+        self.ids, retirados = self.asignador.asignar(centros_torso(puntos))
+        for identificador in retirados:
+            game = self.juegos.pop(identificador)
+            game.terminar_partida()
+            self.finalizados.append(_resumir(identificador, game))
+        if not self.ids:
+            return self.ids
+
+        juegos = [self._juego(identificador) for identificador in self.ids]
+        activos = [i for i, game in enumerate(juegos) if game.estado in ["jugando", "mostrando_instruccion"]]
+        if activos:
+            world_activos = world[activos] if world is not None else None
+            gestos = detectar_gestos_lote([juegos[i] for i in activos], puntos[activos], visibles[activos],
+                                          world_activos, espejo=espejo)
+            for i, gesto_ok in zip(activos, gestos):
+                juegos[i].actualizar(bool(gesto_ok), tiempo)
+        return self.ids
+
+    def dibujar(self, frame, puntos):
+        """Marcador de cada persona sobre su cabeza y partículas de sus niveles completados."""
+        h, w = frame.shape[:2]
+        for identificador, persona in zip(self.ids, puntos):
+            game = self.juegos[identificador]
+            game.tam_frame = (h, w)
+            color = COLORES_JUGADOR[(identificador - 1) % len(COLORES_JUGADOR)]
+            if game.estado == "completado":
+                texto = f"J{identificador}  COMPLETADO  {game.puntos} pts"
+            else:
+                texto = f"J{identificador}  Nivel {game.nivel}  {game.puntos} pts"
+            x = int(np.clip(persona[0, X] * w - 90, 0, max(w - 180, 0)))
+            y = int(np.clip(persona[0, Y] * h - 60, 0, max(h - 28, 0)))
+            panel_translucido(frame, x, y, x + 180, y + 26, (20, 20, 20), 0.6)
+            cv2.rectangle(frame, (x, y), (x + 180, y + 26), color, 2)
+            dibujar_texto(frame, texto, (x + 6, y + 18), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        for game in self.juegos.values():
+            game._actualizar_particulas(frame)
+
+    def terminar(self):
+        """Cierra en el historial las sesiones de los jugadores que siguen en la imagen."""
+        for game in self.juegos.values():
+            game.terminar_partida()
+
+    def resumen(self):
+        """Líneas con la puntuación de cada jugador (presentes y retirados)."""
+        todos = list(self.finalizados) + [_resumir(i, game) for i, game in self.juegos.items()]
+        return [f"Jugador {j.identificador}: nivel {j.nivel}, {j.puntos} puntos, racha máxima {j.racha_maxima}"
+                for j in sorted(todos)]
+
+
+def _resumir(identificador, game):
+    return ResumenJugador(identificador, min(game.nivel, game.total_niveles), game.puntos, game.racha_maxima)
@@ -0,0 +1,99 @@
+"""Registro de niveles: cada nivel es un programa inmutable compilado una vez por dificultad.
+
+Un nivel se describe como datos: la regla que lo detecta (y sus variantes, ver
+reglas.compilar_niveles), cómo se completa y con qué valores:
+
+    6: {"regla": "elevacion_rodilla", "estado": "ultima_pierna",
+        "tipo": "repeticiones", "repeticiones": {"facil": 2, "normal": 3, "dificil": 5},
+        "puntos": 150, "instruccion": "Eleva las rodillas alternando ({repeticiones} veces)"}
+
+Tipos de nivel:
+    instantaneo     se completa en el primer frame real con el gesto
+    temporizador    hay que mantener el gesto `duracion` segundos
+    repeticiones    hay que repetir el gesto (p. ej. una alternancia) `repeticiones` veces
+
+duracion y repeticiones pueden ser un valor o un dict por dificultad.
+compilar_programas resuelve todo lo que depende de la dificultad (valores,
+texto de la instrucción, título y progreso) en una tupla indexada por número
+de nivel, así que en cada frame el juego solo consulta programas[nivel].
+Un entrenamiento con cientos de niveles es un diccionario más largo.
+"""
+from collections import namedtuple
+
+from reglas import compilar_niveles
+
+INSTANTANEO = "instantaneo"
+TEMPORIZADOR = "temporizador"
+REPETICIONES = "repeticiones"
+TIPOS_NIVEL = (INSTANTANEO, TEMPORIZADOR, REPETICIONES)
+
+# Entrenamiento por defecto. guia: nombre de la guía visual (apli.GUIAS);
+# movimiento: movimiento de analitica.MOVIMIENTOS que se muestra en el HUD
+NIVELES = {
+    1: {"regla": "brazo_derecho_arriba", "espejo": "brazo_izquierdo_arriba",
+        "instruccion": "Levanta el brazo derecho", "guia": "brazo_arriba"},
+    2: {"regla": "rodilla_izquierda_flexionada", "espejo": "rodilla_derecha_flexionada",
+        "instruccion": "Flexiona la rodilla izquierda"},
+    3: {"regla": "equilibrio_estable", "tipo": TEMPORIZADOR, "duracion": {"facil": 2, "normal": 3, "dificil": 5},
+        "puntos": 150, "instruccion": "Manten el equilibrio {duracion}s"},
+    4: {"regla": "extension_adelante", "instruccion": "Extiende los brazos hacia adelante", "guia": "extension"},
+    5: {"regla": "inclinacion_lateral", "instruccion": "Inclinate lateralmente"},
+    6: {"regla": "elevacion_rodilla", "estado": "ultima_pierna", "tipo": REPETICIONES,
+        "repeticiones": {"facil": 2, "normal": 3, "dificil": 5}, "puntos": 150,
+        "instruccion": "Eleva las rodillas alternando ({repeticiones} veces)", "movimiento": "elevacion_rodilla"},
+    7: {"regla": "postura_ergonomica", "tipo": TEMPORIZADOR, "duracion": {"facil": 3, "normal": 5, "dificil": 8},
+        "puntos": 200, "instruccion": "Manten postura recta {duracion}s"},
+    8: {"regla": "sentadilla", "instruccion": "Realiza una sentadilla", "guia": "sentadilla",
+        "movimiento": "sentadilla"},
+    9: {"regla": "brazos_en_cruz", "puntos": 150, "instruccion": "Brazos en cruz (T-Pose)"},
+    10: {"regla": "postura_guerrero", "world": "postura_guerrero_3d", "tipo": TEMPORIZADOR,
+         "duracion": {"facil": 1, "normal": 2, "dificil": 4}, "puntos": 200,
+         "instruccion": "Postura del guerrero {duracion}s", "guia": "guerrero"},
+    11: {"regla": "salto", "parametro": "altura_referencia_tobillo", "puntos": 150, "instruccion": "Salta"},
+}
+
+ProgramaNivel = namedtuple("ProgramaNivel", [
+    "numero", "tipo", "duracion", "repeticiones", "puntos", "detector",
+    "instruccion", "titulo", "progreso", "guia", "movimiento",
+])
+
+
+def _resolver(valor, dificultad):
+    return valor[dificultad] if isinstance(valor, dict) else valor
+
+
+def compilar_programas(niveles, reglas, dificultad="normal"):
+    """Compila el registro en una tupla de ProgramaNivel indexada por número de nivel (1..N).
+
+    detector: la EntradaNivel de reglas.compilar_niveles con las reglas ya compiladas.
+    """
+    total = len(niveles)
+    if set(niveles) != set(range(1, total + 1)):
+        raise ValueError(f"Los niveles deben numerarse de 1 a {total} sin huecos")
+    detectores = compilar_niveles(niveles, reglas)
+
+    programas = [None] * (total + 1)
+    for nivel, entrada in niveles.items():
+        tipo = entrada.get("tipo", INSTANTANEO)
+        if tipo not in TIPOS_NIVEL:
+            raise ValueError(f"Nivel {nivel}: tipo desconocido {tipo!r}")
+        duracion = _resolver(entrada.get("duracion"), dificultad)
+        repeticiones = _resolver(entrada.get("repeticiones"), dificultad)
+        if tipo == TEMPORIZADOR and not duracion:
+            raise ValueError(f"Nivel {nivel}: un temporizador necesita duracion")
+        if tipo == REPETICIONES and not repeticiones:
+            raise ValueError(f"Nivel {nivel}: faltan las repeticiones")
+        programas[nivel] = ProgramaNivel(
+            numero=nivel,
+            tipo=tipo,
+            duracion=duracion,
+            repeticiones=repeticiones,
+            puntos=entrada.get("puntos", 100),
+            detector=detectores[nivel],
+            instruccion=entrada.get("instruccion", "").format(duracion=duracion, repeticiones=repeticiones),
+            titulo=f"NIVEL {nivel}/{total}",
+            progreso=nivel / total,
+            guia=entrada.get("guia"),
+            movimiento=entrada.get("movimiento"),
+        )
+    return tuple(programas)
@@ -0,0 +1,147 @@
+"""Sistema de partículas en estructura de arrays (SoA) con capacidad fija.
+
+Cada atributo (posición, velocidad, vida, color) es un array de NumPy
+preasignado; las partículas vivas ocupan siempre las primeras `activas`
+posiciones. La integración, el descarte de las que mueren y el dibujado se
+hacen en bloque, sin un objeto ni una llamada a OpenCV por partícula. Donde
+varias partículas se solapan queda la emitida más tarde, como si se dibujaran
+una a una en orden con cv2.circle.
+"""
+import cv2
+import numpy as np
+
+VIDA = 60
+GRAVEDAD = 0.2
+RADIO_MAXIMO = 4
+
+
+def _discos(radio_maximo):
+    """Desplazamientos (dy, dx) de los píxeles de cv2.circle relleno para cada radio."""
+    discos = [None]
+    lado = 2 * radio_maximo + 1
+    for radio in range(1, radio_maximo + 1):
+        lienzo = np.zeros((lado, lado), dtype=np.uint8)
+        cv2.circle(lienzo, (radio_maximo, radio_maximo), radio, 255, -1)
+        dy, dx = np.nonzero(lienzo)
+        discos.append((dy - radio_maximo, dx - radio_maximo))
+    return discos
+
+
+_DISCOS = _discos(RADIO_MAXIMO)
+_PIXEL = np.dtype((np.void, 3))  # Un píxel BGR como un único elemento, para copiarlo de una vez
+
+
+class SistemaParticulas:
+    """Pool de partículas con capacidad fija: las que no caben se descartan al emitir."""
+
+    def __init__(self, capacidad=1024):
+        self.capacidad = capacidad
+        self.activas = 0
+        self.x = np.zeros(capacidad, dtype=np.float32)
+        self.y = np.zeros(capacidad, dtype=np.float32)
+        self.vx = np.zeros(capacidad, dtype=np.float32)
+        self.vy = np.zeros(capacidad, dtype=np.float32)
+        self.vida = np.zeros(capacidad, dtype=np.int16)
+        self.color = np.zeros((capacidad, 3), dtype=np.uint8)
+        self._rng = np.random.default_rng()
+
+    def __len__(self):
+        return self.activas
+
+    def emitir(self, cantidad, ancho, alto, x0=0, y0=0):
+        """Emite hasta `cantidad` partículas repartidas por el rectángulo (x0, y0, ancho, alto)."""
+        n = min(cantidad, self.capacidad - self.activas)
+        if n <= 0:
+            return 0
+        rng = self._rng
+        nuevas = slice(self.activas, self.activas + n)
+        self.x[nuevas] = rng.integers(x0, x0 + ancho + 1, n)
+        self.y[nuevas] = rng.integers(y0, y0 + alto + 1, n)
+        self.vx[nuevas] = rng.uniform(-3, 3, n)
+        self.vy[nuevas] = rng.uniform(-5, -1, n)
+        self.vida[nuevas] = VIDA
+        self.color[nuevas] = rng.integers(100, 256, (n, 3))
+        self.activas += n
+        return n
+
+    def vaciar(self):
+        self.activas = 0
+
+    def actualizar(self):
+        """Avanza un frame: integra, aplica gravedad y compacta las partículas vivas."""
+        n = self.activas
+        if not n:
+            return
+        x, y, vx, vy, vida = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], self.vida[:n]
+        x += vx
+        y += vy
+        vy += GRAVEDAD
+        vida -= 1
+
+        vivas = np.flatnonzero(vida > 0)
+        if len(vivas) < n:
+            k = len(vivas)
+            for array in (self.x, self.y, self.vx, self.vy, self.vida, self.color):
+                array[:k] = array[vivas]
+            self.activas = k
+
+    def dibujar(self, frame):
+        """Dibuja todas las partículas como discos rellenos (tamaño según su vida).
+
+        Sobre vistas no contiguas (p. ej. un recorte del frame) se dibuja con
+        cv2.circle partícula a partícula.
+        """
+        n = self.activas
+        if not n:
+            return
+        if not frame.flags.c_contiguous:
+            self._dibujar_circulos(frame)
+            return
+        h, w = frame.shape[:2]
+        plano = frame.reshape(-1).view(_PIXEL)
+        radios = RADIO_MAXIMO * self.vida[:n].astype(np.int32) // VIDA
+        # Se truncan como int() (hacia cero) para coincidir con el dibujado por partícula
+        cx = self.x[:n].astype(np.int32)
+        cy = self.y[:n].astype(np.int32)
+        # Clave por píxel de cada disco: el píxel en los bits altos y la partícula en
+        # los bajos, para ordenar por píxel y, dentro de cada píxel, por orden de emisión
+        bits = n.bit_length()
+        claves = []
+        for radio in range(1, RADIO_MAXIMO + 1):
+            indices = np.flatnonzero(radios == radio)
+            if not len(indices):
+                continue
+            dy, dx = _DISCOS[radio]
+            px, py = cx[indices], cy[indices]
+            # Índices lineales de cada disco completo; solo se filtran píxel a píxel
+            # las partículas que tocan el borde del frame
+            interior = (px >= radio) & (px < w - radio) & (py >= radio) & (py < h - radio)
+            lineal = (py.astype(np.int64) * w + px)[:, None] + (dy * w + dx)
+            clave = (lineal << bits) | indices[:, None]
+            claves.append(clave[interior].ravel())
+            if not interior.all():
+                borde = ~interior
+                yy = py[borde, None] + dy
+                xx = px[borde, None] + dx
+                dentro = (yy >= 0) & (yy < h) & (xx >= 0) & (xx < w)
+                claves.append(clave[borde][dentro])
+        if not claves:
+            return
+
+        # En cada píxel gana la última partícula en orden de emisión: una sola ordenación
+        claves = np.concatenate(claves)
+        claves.sort()
+        pixel = claves >> bits
+        ultima = np.empty(len(claves), dtype=bool)
+        ultima[:-1] = pixel[1:] != pixel[:-1]
+        ultima[-1] = True
+        colores = self.color.reshape(-1).view(_PIXEL)
+        plano[pixel[ultima]] = colores.take(claves[ultima] & ((1 << bits) - 1))
+
+    def _dibujar_circulos(self, frame):
+        n = self.activas
+        radios = RADIO_MAXIMO * self.vida[:n].astype(np.int32) // VIDA
+        for x, y, radio, color in zip(self.x[:n].astype(np.int32).tolist(), self.y[:n].astype(np.int32).tolist(),
+                                      radios.tolist(), self.color[:n].tolist()):
+            if radio > 0:
+                cv2.circle(frame, (x, y), radio, color, -1)
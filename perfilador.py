@@ -0,0 +1,125 @@
+"""Perfilador por muestreo que se activa y desactiva con la partida en marcha.
+
+Un hilo toma cada `intervalo` segundos la pila de todos los hilos del proceso
+(sys._current_frames) durante un tiempo limitado y escribe el resultado en
+formato de pilas colapsadas ("hilo;modulo:funcion;... cuenta"), que abren
+directamente speedscope y flamegraph.pl. Mientras no está activo no hay hilo
+ni coste alguno; activo, el coste es una captura de pilas por muestra, sin
+hooks por llamada como cProfile.
+
+Las llamadas nativas (cv2, MediaPipe, NumPy) no tienen marco de Python propio:
+cuando el marco más interno está en una línea que llama a una de ellas, se
+añade una hoja "[nativo] cv2.imshow", "[nativo] pose.process", etc.
+"""
+import collections
+import linecache
+import os
+import re
+import sys
+import threading
+import time
+
+_LLAMADA_NATIVA = re.compile(r"\b((?:cv2|np|mp|self\.pose|pose)\.\w+)\(")
+
+
+class PerfiladorMuestreo:
+    """Muestrea las pilas de todos los hilos y las guarda como pilas colapsadas."""
+
+    def __init__(self, intervalo=0.005, directorio="."):
+        self.intervalo = intervalo
+        self.directorio = directorio
+        self.muestras = 0
+        self.ultima_ruta = None
+        self.perfiles = 0  # Ficheros escritos, para no repetir nombre en el mismo segundo
+        self._hilo = None
+        self._detener = threading.Event()
+        self._pilas = collections.Counter()
+        self._etiquetas = {}  # code -> "modulo:funcion"
+        self._nativas = {}  # (code, línea) -> "[nativo] ..." o None
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self, duracion=10.0):
+        """Empieza a muestrear durante `duracion` segundos (None = hasta parar())."""
+        if self.activo:
+            return
+        self._detener.clear()
+        self._pilas.clear()
+        self.muestras = 0
+        self._hilo = threading.Thread(target=self._bucle, args=(duracion,),
+                                      name="perfilador", daemon=True)
+        self._hilo.start()
+        print(f"[Perfil] Muestreando {'hasta detenerlo' if duracion is None else f'{duracion:.0f}s'}...")
+
+    def parar(self):
+        """Detiene el muestreo y espera a que se escriba el fichero. Devuelve su ruta."""
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+        return self.ultima_ruta
+
+    def alternar(self, duracion=10.0):
+        if self.activo:
+            self.parar()
+        else:
+            self.iniciar(duracion)
+
+    def _bucle(self, duracion):
+        propio = threading.get_ident()
+        fin = None if duracion is None else time.perf_counter() + duracion
+        while not self._detener.wait(self.intervalo):
+            self._muestrear(propio)
+            if fin is not None and time.perf_counter() >= fin:
+                break
+        self.ultima_ruta = self._escribir()
+
+    def _muestrear(self, propio):
+        nombres = {hilo.ident: hilo.name for hilo in threading.enumerate()}
+        for ident, marco in sys._current_frames().items():
+            if ident == propio:
+                continue
+            self._pilas[(nombres.get(ident, str(ident)),) + self._pila(marco)] += 1
+        self.muestras += 1
+
+    def _pila(self, marco):
+        """Etiquetas de la pila desde la raíz hasta la hoja (más la llamada nativa, si la hay)."""
+        etiquetas = []
+        nativa = self._nativa(marco.f_code, marco.f_lineno)
+        if nativa is not None:
+            etiquetas.append(nativa)
+        while marco is not None:
+            code = marco.f_code
+            etiqueta = self._etiquetas.get(code)
+            if etiqueta is None:
+                modulo = os.path.splitext(os.path.basename(code.co_filename))[0]
+                etiqueta = f"{modulo}:{getattr(code, 'co_qualname', code.co_name)}"
+                self._etiquetas[code] = etiqueta
+            etiquetas.append(etiqueta)
+            marco = marco.f_back
+        etiquetas.reverse()
+        return tuple(etiquetas)
+
+    def _nativa(self, code, linea):
+        clave = (code, linea)
+        if clave not in self._nativas:
+            llamada = _LLAMADA_NATIVA.search(linecache.getline(code.co_filename, linea))
+            self._nativas[clave] = f"[nativo] {llamada.group(1)}" if llamada else None
+        return self._nativas[clave]
+
+    def _escribir(self):
+        if not self._pilas:
+            print("[Perfil] Sin muestras")
+            return None
+        os.makedirs(self.directorio, exist_ok=True)
+        ahora = time.time()
+        self.perfiles += 1
+        nombre = f"perfil_{time.strftime('%Y%m%d_%H%M%S', time.localtime(ahora))}_{int(ahora % 1 * 1000):03d}"
+        ruta = os.path.join(self.directorio, f"{nombre}_{self.perfiles}.txt")
+        with open(ruta, "w", encoding="utf-8") as f:
+            for pila, cuenta in self._pilas.most_common():
+                f.write(f"{';'.join(pila)} {cuenta}\n")
+        print(f"[Perfil] {self.muestras} muestras guardadas en {ruta} (pilas colapsadas, speedscope)")
+        return ruta
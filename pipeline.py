@@ -0,0 +1,204 @@
+"""Modo pipeline: captura, inferencia y render en etapas solapadas.
+
+La captura corre en su propio hilo y solo conserva el frame más reciente; la
+inferencia (flip, cvtColor, pose.process e instantánea de landmarks) corre en
+otro hilo; el render y la ventana se quedan en el hilo principal, que es el
+único que puede usar HighGUI. Las etapas se comunican con buzones de una sola
+posición que descartan los frames obsoletos.
+"""
+import threading
+import time
+
+import cv2
+
+from buffers import a_rgb, espejar, leer
+from utils import landmarks_a_array, mascara_visibilidad
+
+
+class Buzon:
+    """Cola acotada de una sola posición: un nuevo elemento reemplaza al anterior."""
+
+    def __init__(self, al_descartar=None):
+        self._cond = threading.Condition()
+        self._item = None
+        self.lleno = False
+        self.cerrado = False
+        self.descartados = 0
+        self.al_descartar = al_descartar  # Recibe los elementos reemplazados sin consumir
+
+    def poner(self, item):
+        with self._cond:
+            if self.lleno:
+                self.descartados += 1
+                if self.al_descartar is not None:
+                    self.al_descartar(self._item)
+            self._item = item
+            self.lleno = True
+            self._cond.notify()
+
+    def tomar(self, timeout=None):
+        """Devuelve el elemento más reciente, o None si vence el timeout o se cierra."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.lleno or self.cerrado, timeout):
+                return None
+            item, self._item, self.lleno = self._item, None, False
+            return item
+
+    def cerrar(self):
+        with self._cond:
+            self.cerrado = True
+            self._cond.notify_all()
+
+
+class MedidorRitmo:
+    """Cuenta los frames procesados por una etapa y calcula su ritmo (fps)."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.total = 0
+        self.fps = 0.0
+        self._cuenta = 0
+        self._inicio = time.perf_counter()
+
+    def marcar(self):
+        self.total += 1
+        self._cuenta += 1
+        ahora = time.perf_counter()
+        transcurrido = ahora - self._inicio
+        if transcurrido >= 1.0:
+            self.fps = self._cuenta / transcurrido
+            self._cuenta = 0
+            self._inicio = ahora
+
+
+class HiloCaptura(threading.Thread):
+    """Lee la cámara sin pausa y publica siempre el último frame."""
+
+    def __init__(self, cap, salida, detener, metricas=None, buffers=None):
+        super().__init__(name="captura", daemon=True)
+        self.cap = cap
+        self.salida = salida
+        self.detener = detener
+        self.metricas = metricas
+        self.buffers = buffers
+        self.medidor = MedidorRitmo("captura")
+        self.fin_de_video = False
+
+    def run(self):
+        forma = None
+        while not self.detener.is_set():
+            t = time.perf_counter()
+            if self.buffers is not None:
+                ret, frame = leer(self.cap, self.buffers, forma)
+            else:
+                ret, frame = self.cap.read()
+            if not ret:
+                self.fin_de_video = True
+                break
+            forma = frame.shape
+            if self.metricas is not None:
+                self.metricas.medir("lectura", t)
+            self.salida.poner(frame)
+            self.medidor.marcar()
+        self.salida.cerrar()
+
+
+class HiloInferencia(threading.Thread):
+    """Prepara el frame, ejecuta la pose y publica (frame, puntos, visibles, world, tiempo)."""
+
+    def __init__(self, pose, entrada, salida, detener, modo_espejo=True, metricas=None, buffers=None):
+        super().__init__(name="inferencia", daemon=True)
+        self.pose = pose
+        self.entrada = entrada
+        self.salida = salida
+        self.detener = detener
+        self.modo_espejo = modo_espejo
+        self.metricas = metricas
+        self.buffers = buffers
+        self.medidor = MedidorRitmo("inferencia")
+
+    def run(self):
+        while not self.detener.is_set():
+            frame = self.entrada.tomar(timeout=0.1)
+            if frame is None:
+                if self.entrada.cerrado:
+                    break
+                continue
+
+            t = time.perf_counter()
+            if self.buffers is not None:
+                if self.modo_espejo:
+                    frame = espejar(frame, self.buffers)
+                frame_rgb = a_rgb(frame, self.buffers)
+            else:
+                if self.modo_espejo:
+                    frame = cv2.flip(frame, 1)
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if self.metricas is not None:
+                t = self.metricas.medir("espejo+cvtcolor", t)
+            result = self.pose.process(frame_rgb)
+            if self.buffers is not None:
+                self.buffers.devolver(frame_rgb)
+            if self.metricas is not None:
+                self.metricas.medir("pose", t)
+            tiempo = time.time()
+
+            # Instantáneas nuevas en cada frame: el render las lee desde otro hilo
+            puntos = visibles = world = None
+            if result.pose_landmarks:
+                puntos = landmarks_a_array(result.pose_landmarks.landmark)
+                visibles = mascara_visibilidad(puntos)
+                if getattr(result, "pose_world_landmarks", None):
+                    world = landmarks_a_array(result.pose_world_landmarks.landmark)
+
+            self.salida.poner((frame, puntos, visibles, world, tiempo))
+            self.medidor.marcar()
+        self.salida.cerrar()
+
+
+class Pipeline:
+    """Arranca y detiene los hilos de captura e inferencia."""
+
+    def __init__(self, cap, pose, modo_espejo=True, metricas=None, buffers=None):
+        """buffers: PoolBuffers opcional; el consumidor de siguiente() devuelve cada frame al pool."""
+        self.detener = threading.Event()
+        descartar_frame = descartar_resultado = None
+        if buffers is not None:
+            descartar_frame = buffers.devolver
+            descartar_resultado = lambda item: buffers.devolver(item[0])
+        self.buzon_captura = Buzon(descartar_frame)
+        self.buzon_inferencia = Buzon(descartar_resultado)
+        self.captura = HiloCaptura(cap, self.buzon_captura, self.detener, metricas, buffers)
+        self.inferencia = HiloInferencia(pose, self.buzon_captura, self.buzon_inferencia,
+                                         self.detener, modo_espejo, metricas, buffers)
+        self.render = MedidorRitmo("render")
+
+    def iniciar(self):
+        self.captura.start()
+        self.inferencia.start()
+
+    def siguiente(self, timeout=0.1):
+        """Último resultado de la inferencia, o None si no hay uno nuevo todavía."""
+        return self.buzon_inferencia.tomar(timeout)
+
+    def terminado(self):
+        return not self.inferencia.is_alive() and not self.buzon_inferencia.lleno
+
+    def parar(self):
+        self.detener.set()
+        self.buzon_captura.cerrar()
+        self.buzon_inferencia.cerrar()
+        self.captura.join(timeout=1.0)
+        self.inferencia.join(timeout=1.0)
+
+    def resumen(self):
+        """Texto con el ritmo de cada etapa y los frames obsoletos descartados."""
+        etapas = [self.captura.medidor, self.inferencia.medidor, self.render]
+        ritmos = "  ".join(f"{m.nombre}: {m.fps:5.1f} fps" for m in etapas)
+        texto = (f"{ritmos}  | descartados captura={self.buzon_captura.descartados} "
+                 f"inferencia={self.buzon_inferencia.descartados}")
+        # Nivel de calidad si la pose es adaptativa (ControladorCalidad)
+        descripcion = getattr(self.inferencia.pose, "descripcion", None)
+        if descripcion is not None:
+            texto += f"  | {descripcion()}"
+        return texto
@@ -0,0 +1,154 @@
+"""Rasgos derivados de los landmarks de un frame, calculados bajo demanda y compartidos.
+
+RasgosFrame envuelve la instantánea (33, 4) de un frame (o un lote (T, 33, 4))
+y calcula cada rasgo con nombre la primera vez que se pide, guardándolo para
+el resto del frame: detectores, guías visuales y análisis leen del mismo
+objeto en lugar de recalcular ángulos y puntos medios cada uno por su cuenta.
+
+Los ángulos de las reglas (angulo(a, b, c), inclinacion(a, b)) se registran en
+el catálogo ANGULOS al compilar cada regla; el rasgo "angulos_reglas" los
+calcula todos en una sola pasada vectorizada, así que evaluar varias reglas
+sobre un frame cuesta aproximadamente una extracción de rasgos.
+"""
+import numpy as np
+
+from utils import calcular_angulos_estandar, mascara_visibilidad, VIS
+
+
+def segmentos_angulo(termino):
+    """Extremos de los segmentos ba y bc de un término de ángulo.
+
+    Devuelve tuplas (landmark, signo, segmento, ejes): segmento 0 = ba, 1 = bc.
+    En inclinacion(a, b), bc es la horizontal (a.x - b.x, 0).
+    """
+    if termino[0] == "ang":
+        a, b, c = termino[1:]
+        return [(a, 1, 0, (0, 1)), (b, -1, 0, (0, 1)), (c, 1, 1, (0, 1)), (b, -1, 1, (0, 1))]
+    a, b = termino[1:]
+    return [(a, 1, 0, (0, 1)), (b, -1, 0, (0, 1)), (a, 1, 1, (0,)), (b, -1, 1, (0,))]
+
+
+def matriz_segmentos(terminos, fila_de):
+    """Matriz compleja (coordenadas, 2N) que da los segmentos ba | bc de N ángulos como x + iy.
+
+    fila_de: (landmark, eje) -> fila de la coordenada en el vector base.
+    """
+    n = len(terminos)
+    matriz = np.zeros((len(fila_de), 2 * n), dtype=np.complex128)
+    for k, termino in enumerate(terminos):
+        for i, signo, segmento, ejes in segmentos_angulo(termino):
+            for eje in ejes:
+                matriz[fila_de[(i, eje)], segmento * n + k] += signo * (1j if eje else 1)
+    return matriz
+
+
+def angulos_segmentos(z):
+    """Ángulos (grados) a partir de los segmentos z = ba | bc: devuelve (ángulos, indefinidos)."""
+    n = z.shape[-1] // 2
+    producto = z[..., :n].conj() * z[..., n:]
+    # Segmento nulo: el ángulo no existe y sus comparaciones no se cumplen
+    return np.abs(np.angle(producto, deg=True)), producto == 0
+
+
+class CatalogoAngulos:
+    """Todos los ángulos que usan las reglas compiladas, para calcularlos en una sola pasada."""
+
+    def __init__(self):
+        self.terminos = []
+        self._columna = {}
+        self._matriz = None
+
+    def registrar(self, terminos):
+        """Añade los términos que falten y devuelve su columna en el resultado de calcular."""
+        for termino in terminos:
+            if termino not in self._columna:
+                self._columna[termino] = len(self.terminos)
+                self.terminos.append(termino)
+                self._matriz = None
+        return np.array([self._columna[t] for t in terminos], dtype=np.intp)
+
+    def _compilar(self):
+        coords = sorted({(i, eje) for termino in self.terminos for i, _, _, ejes in segmentos_angulo(termino)
+                         for eje in ejes})
+        self._coord_idx = np.array([i for i, _ in coords], dtype=np.intp)
+        self._coord_eje = np.array([eje for _, eje in coords], dtype=np.intp)
+        self._matriz = matriz_segmentos(self.terminos, {c: fila for fila, c in enumerate(coords)})
+
+    def calcular(self, puntos):
+        """(ángulos, indefinidos) de todos los términos: arrays (..., N)."""
+        if self._matriz is None:
+            self._compilar()
+        base = np.asarray(puntos)[..., self._coord_idx, self._coord_eje].astype(np.float64)
+        return angulos_segmentos(base @ self._matriz)
+
+
+ANGULOS = CatalogoAngulos()
+
+# Rasgos con nombre: función (rasgos) -> valor
+RASGOS = {}
+
+
+def rasgo(nombre):
+    """Decorador que registra una función como rasgo con nombre."""
+    def registrar(funcion):
+        RASGOS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+class RasgosFrame:
+    """Caché de rasgos de un frame: rasgos[nombre] se calcula una vez y se reutiliza.
+
+    puntos: array (33, 4) o (T, 33, 4); visibles: máscara ya calculada (opcional).
+    Un RasgosFrame se puede pasar a las reglas en lugar del array de puntos.
+    """
+
+    __slots__ = ("puntos", "_cache")
+
+    def __init__(self, puntos, visibles=None):
+        self.puntos = np.asarray(puntos)
+        self._cache = {}
+        if visibles is not None:
+            self._cache["visibles"] = visibles
+
+    def __getitem__(self, nombre):
+        valor = self._cache.get(nombre)
+        if valor is None:
+            valor = self._cache[nombre] = RASGOS[nombre](self)
+        return valor
+
+    def calculados(self):
+        """Nombres de los rasgos ya calculados en este frame."""
+        return list(self._cache)
+
+
+def _punto_medio(a, b):
+    return lambda rasgos: (rasgos.puntos[..., a, :VIS] + rasgos.puntos[..., b, :VIS]) / 2
+
+
+@rasgo("visibles")
+def _visibles(rasgos):
+    return mascara_visibilidad(rasgos.puntos)
+
+
+@rasgo("angulos_reglas")
+def _angulos_reglas(rasgos):
+    """(ángulos, indefinidos) de todos los términos del catálogo ANGULOS."""
+    return ANGULOS.calcular(rasgos.puntos)
+
+
+@rasgo("angulos_estandar")
+def _angulos_estandar(rasgos):
+    """Ángulos de utils.TRIPLETAS en 2D, en el orden de NOMBRES_TRIPLETAS."""
+    return calcular_angulos_estandar(rasgos.puntos)
+
+
+# Puntos medios (x, y, z) de los pares izquierda/derecha
+PARES_CENTRO = {
+    "centro_hombros": (11, 12),
+    "centro_munecas": (15, 16),
+    "centro_caderas": (23, 24),
+    "centro_rodillas": (25, 26),
+    "centro_tobillos": (27, 28),
+}
+RASGOS.update({nombre: _punto_medio(a, b) for nombre, (a, b) in PARES_CENTRO.items()})
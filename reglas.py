@@ -0,0 +1,482 @@
+"""Motor de reglas declarativas para los detectores de gestos.
+
+Cada regla se escribe como datos: articulaciones requeridas, rasgos derivados
+y condiciones con umbrales, todo como expresiones de texto sobre las
+coordenadas de los landmarks:
+
+    "sentadilla": {
+        "articulaciones": [23, 25, 27, 24, 26, 28, 11, 12],
+        "rasgos": {"rodilla_i": "angulo(23, 25, 27)"},
+        "condiciones": {
+            "rodilla_flexionada": "70 < rodilla_i < 120",
+            "caderas_bajas": "(y[23] + y[24]) / 2 > (y[25] + y[26]) / 2 - 0.15",
+        },
+    }
+
+Vocabulario de las expresiones:
+    x[i], y[i], z[i]      coordenada del landmark i
+    angulo(a, b, c)       ángulo 2D (grados) en b
+    inclinacion(a, b)     ángulo 2D (grados) en b entre b→a y la horizontal
+    abs(expr)             valor absoluto de una expresión lineal
+    +, -, * y / por constantes, comparaciones encadenadas, and, or
+    nombres de rasgos y de parámetros declarados en la regla
+
+Al compilar, cada comparación se reduce a un predicado "w · base + w0 > 0",
+donde la base son las coordenadas usadas, los ángulos y los valores absolutos,
+y los parámetros entran en la constante w0. Las alternativas (or) y las
+condiciones (and) se resuelven también con productos matriciales, así que el
+coste por frame no depende de cuántos predicados tenga la regla, y la misma
+regla se evalúa igual sobre un frame (33, 4) que sobre lotes (..., 33, 4).
+"""
+import ast
+from collections import namedtuple
+
+import numpy as np
+
+from rasgos import ANGULOS, RasgosFrame, angulos_segmentos, matriz_segmentos
+from utils import mascara_indices, mascara_visibilidad
+
+_EJES = {"x": 0, "y": 1, "z": 2}
+_UNO = ("uno",)
+
+
+# === Expresiones lineales: dict término -> coeficiente ===
+
+def _sumar(a, b, signo=1.0):
+    resultado = dict(a)
+    for termino, coef in b.items():
+        resultado[termino] = resultado.get(termino, 0.0) + signo * coef
+    return resultado
+
+
+def _escalar(a, factor):
+    return {termino: coef * factor for termino, coef in a.items()}
+
+
+def _constante(a):
+    """Valor de una expresión si es constante, o None."""
+    if all(termino == _UNO for termino in a):
+        return a.get(_UNO, 0.0)
+    return None
+
+
+def _entero(nodo):
+    if not (isinstance(nodo, ast.Constant) and isinstance(nodo.value, int)):
+        raise ValueError(f"Se esperaba un índice de landmark: {ast.unparse(nodo)}")
+    return nodo.value
+
+
+class _Compilador:
+    """Traduce las expresiones de una regla a formas lineales y a DNF."""
+
+    def __init__(self, rasgos, parametros):
+        self.parametros = list(parametros)
+        self.rasgos = {}
+        for nombre, expresion in rasgos.items():
+            self.rasgos[nombre] = self.lineal(expresion)
+
+    def lineal(self, expresion):
+        return self._lineal(ast.parse(expresion, mode="eval").body)
+
+    def _lineal(self, nodo):
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (int, float)):
+            return {_UNO: float(nodo.value)}
+
+        if isinstance(nodo, ast.Name):
+            if nodo.id in self.rasgos:
+                return dict(self.rasgos[nodo.id])
+            if nodo.id in self.parametros:
+                return {("param", nodo.id): 1.0}
+            raise ValueError(f"Nombre desconocido en regla: {nodo.id}")
+
+        if isinstance(nodo, ast.Subscript) and isinstance(nodo.value, ast.Name) and nodo.value.id in _EJES:
+            return {("coord", _entero(nodo.slice), _EJES[nodo.value.id]): 1.0}
+
+        if isinstance(nodo, ast.UnaryOp) and isinstance(nodo.op, (ast.USub, ast.UAdd)):
+            operando = self._lineal(nodo.operand)
+            return _escalar(operando, -1.0) if isinstance(nodo.op, ast.USub) else operando
+
+        if isinstance(nodo, ast.BinOp):
+            izq, der = self._lineal(nodo.left), self._lineal(nodo.right)
+            if isinstance(nodo.op, ast.Add):
+                return _sumar(izq, der)
+            if isinstance(nodo.op, ast.Sub):
+                return _sumar(izq, der, -1.0)
+            if isinstance(nodo.op, ast.Mult):
+                if _constante(izq) is not None:
+                    return _escalar(der, _constante(izq))
+                if _constante(der) is not None:
+                    return _escalar(izq, _constante(der))
+            if isinstance(nodo.op, ast.Div) and _constante(der) is not None:
+                return _escalar(izq, 1.0 / _constante(der))
+            raise ValueError(f"Operación no lineal en regla: {ast.unparse(nodo)}")
+
+        if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Name):
+            funcion, args = nodo.func.id, nodo.args
+            if funcion == "angulo" and len(args) == 3:
+                return {("ang",) + tuple(_entero(a) for a in args): 1.0}
+            if funcion == "inclinacion" and len(args) == 2:
+                return {("inc",) + tuple(_entero(a) for a in args): 1.0}
+            if funcion == "abs" and len(args) == 1:
+                interior = self._lineal(args[0])
+                if any(termino[0] == "abs" for termino in interior):
+                    raise ValueError(f"abs anidado no soportado: {ast.unparse(nodo)}")
+                return {("abs", tuple(sorted(interior.items()))): 1.0}
+
+        raise ValueError(f"Expresión no soportada en regla: {ast.unparse(nodo)}")
+
+    def dnf(self, expresion):
+        """Condición -> lista de alternativas (OR), cada una lista de predicados (AND).
+
+        Un predicado es (forma_lineal, estricto) y se cumple si forma > 0 (o >= 0).
+        """
+        return self._dnf(ast.parse(expresion, mode="eval").body)
+
+    def _dnf(self, nodo):
+        if isinstance(nodo, ast.BoolOp):
+            partes = [self._dnf(valor) for valor in nodo.values]
+            if isinstance(nodo.op, ast.Or):
+                return [alternativa for parte in partes for alternativa in parte]
+            resultado = [[]]
+            for parte in partes:
+                resultado = [a + b for a in resultado for b in parte]
+            return resultado
+
+        if isinstance(nodo, ast.Compare):
+            predicados = []
+            izq = self._lineal(nodo.left)
+            for op, derecho in zip(nodo.ops, nodo.comparators):
+                der = self._lineal(derecho)
+                if isinstance(op, (ast.Gt, ast.GtE)):
+                    predicados.append((_sumar(izq, der, -1.0), isinstance(op, ast.Gt)))
+                elif isinstance(op, (ast.Lt, ast.LtE)):
+                    predicados.append((_sumar(der, izq, -1.0), isinstance(op, ast.Lt)))
+                else:
+                    raise ValueError(f"Comparación no soportada en regla: {ast.unparse(nodo)}")
+                izq = der
+            return [predicados]
+
+        raise ValueError(f"Condición no soportada en regla: {ast.unparse(nodo)}")
+
+
+class Regla:
+    """Regla de gesto compilada a matrices para evaluación vectorizada.
+
+    Donde se piden `puntos` vale también un RasgosFrame, que comparte los ángulos
+    entre todas las reglas evaluadas sobre el mismo frame.
+    """
+
+    def __init__(self, nombre, spec):
+        self.nombre = nombre
+        self.articulaciones = list(spec.get("articulaciones", []))
+        self.mascara = mascara_indices(self.articulaciones)
+        self.parametros = list(spec.get("parametros", []))
+        compilador = _Compilador(spec.get("rasgos", {}), self.parametros)
+
+        # Condiciones -> alternativas -> predicados
+        self.nombres_condiciones = list(spec["condiciones"])
+        predicados, alternativas, condicion_de = [], [], []
+        for i, nombre_condicion in enumerate(self.nombres_condiciones):
+            for alternativa in compilador.dnf(spec["condiciones"][nombre_condicion]):
+                indices = []
+                for predicado in alternativa:
+                    indices.append(len(predicados))
+                    predicados.append(predicado)
+                alternativas.append(indices)
+                condicion_de.append(i)
+
+        # Medidas: expresiones con nombre que se pueden consultar (depuración, parámetros)
+        self.medidas = {}
+        formas_medidas = []
+        for nombre_medida, definicion in spec.get("medidas", {}).items():
+            expresion, unidad = definicion if isinstance(definicion, tuple) else (definicion, None)
+            self.medidas[nombre_medida] = (len(formas_medidas), unidad)
+            formas_medidas.append(compilador.lineal(expresion))
+
+        formas = [forma for forma, _ in predicados] + formas_medidas
+        self._compilar_base(formas)
+
+        n_pred = len(predicados)
+        pesos, pesos_param, constantes = self._matriz(formas)
+        self._W, self._w0 = np.ascontiguousarray(pesos[:, :n_pred]), constantes[:n_pred]
+        self._W_param = pesos_param[:, :n_pred]
+        self._W_medidas, self._w0_medidas = pesos[:, n_pred:], constantes[n_pred:]
+        self._W_param_medidas = pesos_param[:, n_pred:]
+        # Predicados que dependen de cada ángulo: se anulan si el ángulo es indefinido
+        self._dependencias = None
+        if self._M_vectores is not None:
+            self._dependencias = self._W[self._columnas_angulos] != 0
+            if self._M_abs is not None:
+                usa_abs = self._W[self._columnas_abs] != 0
+                self._dependencias |= (self._M_abs[self._columnas_angulos] != 0) @ usa_abs
+        no_estricto = np.array([not estricto for _, estricto in predicados], dtype=bool)
+        self._no_estricto = no_estricto if no_estricto.any() else None
+
+        # Una alternativa se cumple si se cumplen todos sus predicados (conteo == tamaño)
+        # y una condición si se cumple alguna de sus alternativas
+        self._A = np.zeros((n_pred, len(alternativas)))
+        for q, indices in enumerate(alternativas):
+            self._A[indices, q] = 1.0
+        self._tam = self._A.sum(axis=0)
+        self._C = np.zeros((len(alternativas), len(self.nombres_condiciones)))
+        self._C[np.arange(len(alternativas)), condicion_de] = 1.0
+        if len(alternativas) == len(self.nombres_condiciones):
+            self._C = None  # una alternativa por condición: la matriz es la identidad
+
+        # Alternancia: condiciones que representan cada lado, en orden de preferencia
+        alternancia = spec.get("alternancia")
+        self.lados = []
+        self.exclusiva = False
+        if alternancia is not None:
+            self.lados = [(lado, self.nombres_condiciones.index(lado)) for lado in alternancia["lados"]]
+            self.exclusiva = alternancia.get("exclusiva", False)
+
+    def _compilar_base(self, formas):
+        """Ordena los términos usados en la base: coordenadas, ángulos y valores absolutos."""
+        terminos = set()
+        for forma in formas:
+            for termino in forma:
+                terminos.add(termino)
+                if termino[0] == "abs":
+                    terminos.update(t for t, _ in termino[1])
+        terminos.discard(_UNO)
+
+        angulos = sorted(t for t in terminos if t[0] in ("ang", "inc"))
+        coords = {t for t in terminos if t[0] == "coord"}
+        for termino in angulos:
+            coords.update(("coord", i, eje) for i in termino[1:] for eje in (0, 1))
+        coords = sorted(coords)
+        self._terminos_abs = sorted(t for t in terminos if t[0] == "abs")
+        base = coords + angulos
+        self._indice = {t: i for i, t in enumerate(base + self._terminos_abs)}
+        self._columnas_angulos = np.arange(len(coords), len(base))
+        self._columnas_abs = np.arange(len(base), len(self._indice))
+
+        self._coord_idx = np.array([t[1] for t in coords], dtype=np.intp)
+        self._coord_eje = np.array([t[2] for t in coords], dtype=np.intp)
+
+        # Los dos segmentos de cada ángulo, ba y bc, son lineales en las coordenadas:
+        # se obtienen con un producto matricial como números complejos x + iy, y el
+        # ángulo es el argumento de conj(ba) * bc. Con un RasgosFrame los ángulos
+        # salen del catálogo compartido por todas las reglas
+        self._M_vectores = None
+        if angulos:
+            fila_de = {(t[1], t[2]): self._indice[t] for t in coords}
+            self._M_vectores = matriz_segmentos(angulos, fila_de)
+            self._columnas_catalogo = ANGULOS.registrar(angulos)
+
+        self._M_abs = None
+        if self._terminos_abs:
+            interiores = [dict(t[1]) for t in self._terminos_abs]
+            pesos, self._M_param_abs, self._c_abs = self._matriz(interiores, columnas=len(base))
+            self._M_abs = np.ascontiguousarray(pesos)
+
+    def _matriz(self, formas, columnas=None):
+        """Formas lineales -> (pesos (columnas, F), pesos de parámetros (K, F), constantes (F,))."""
+        pesos = np.zeros((columnas or len(self._indice), len(formas)))
+        pesos_param = np.zeros((len(self.parametros), len(formas)))
+        constantes = np.zeros(len(formas))
+        for columna, forma in enumerate(formas):
+            for termino, coef in forma.items():
+                if termino == _UNO:
+                    constantes[columna] += coef
+                elif termino[0] == "param":
+                    pesos_param[self.parametros.index(termino[1]), columna] += coef
+                else:
+                    pesos[self._indice[termino], columna] += coef
+        return pesos, pesos_param, constantes
+
+    def _constantes(self, parametros, pesos_param, constantes):
+        """Suma a las constantes la contribución de los parámetros (escalares o arrays por frame)."""
+        if not self.parametros:
+            return constantes
+        for k, nombre in enumerate(self.parametros):
+            if not pesos_param[k].any():
+                continue
+            valor = np.nan if parametros is None else parametros.get(nombre, np.nan)
+            constantes = constantes + np.asarray(valor, dtype=np.float64)[..., None] * pesos_param[k]
+        return constantes
+
+    def _base(self, puntos, parametros=None):
+        """Vector base (..., n) y máscara (..., n_angulos) de ángulos indefinidos (o None).
+
+        puntos: array (..., 33, 4) o RasgosFrame (los ángulos se toman de su caché).
+        """
+        rasgos = puntos if isinstance(puntos, RasgosFrame) else None
+        puntos = rasgos.puntos if rasgos is not None else np.asarray(puntos)
+        base = puntos[..., self._coord_idx, self._coord_eje].astype(np.float64)
+        indefinidos = None
+        if self._M_vectores is not None:
+            if rasgos is not None:
+                angulos, indefinidos = rasgos["angulos_reglas"]
+                angulos = angulos[..., self._columnas_catalogo]
+                indefinidos = indefinidos[..., self._columnas_catalogo]
+            else:
+                angulos, indefinidos = angulos_segmentos(base @ self._M_vectores)
+            base = np.concatenate([base, angulos], axis=-1)
+        if self._M_abs is not None:
+            c_abs = self._constantes(parametros, self._M_param_abs, self._c_abs)
+            base = np.concatenate([base, np.abs(base @ self._M_abs + c_abs)], axis=-1)
+        return base, indefinidos
+
+    def _evaluar(self, base, indefinidos, parametros=None):
+        valores = base @ self._W + self._constantes(parametros, self._W_param, self._w0)
+        predicados = valores > 0
+        if self._no_estricto is not None:
+            predicados |= self._no_estricto & (valores == 0)
+        if indefinidos is not None and indefinidos.any():
+            predicados &= ~(indefinidos @ self._dependencias)
+        alternativas = predicados @ self._A >= self._tam
+        if self._C is None:
+            return alternativas
+        return alternativas @ self._C > 0
+
+    def condiciones(self, puntos, parametros=None):
+        """Estado de cada condición, en el orden de nombres_condiciones: bool (..., R)."""
+        base, indefinidos = self._base(puntos, parametros)
+        return self._evaluar(base, indefinidos, parametros)
+
+    def visible(self, puntos, visibles=None):
+        if not self.mascara:
+            return True
+        if visibles is None:
+            visibles = puntos["visibles"] if isinstance(puntos, RasgosFrame) else mascara_visibilidad(puntos)
+        return visibles & self.mascara == self.mascara
+
+    def cumple(self, puntos, visibles=None, parametros=None):
+        """True si los landmarks requeridos son visibles y se cumplen todas las condiciones."""
+        if not self.visible(puntos, visibles):
+            return False
+        return bool(self.condiciones(puntos, parametros).all())
+
+    def cumple_lote(self, puntos, visibles=None, parametros=None):
+        """Versión por lotes de cumple: puntos (T, 33, 4) -> bool (T,).
+
+        Los parámetros pueden ser escalares o arrays (T,) con un valor por frame.
+        """
+        return self.visible(puntos, visibles) & self.condiciones(puntos, parametros).all(axis=-1)
+
+    def alternar(self, puntos, ultimo, visibles=None):
+        """Detección alterna: devuelve (gesto_ok, lado) a partir del último lado detectado.
+
+        Al principio vale el primer lado activo según el orden de `lados`; después solo
+        cuenta el lado contrario (y, si la alternancia es exclusiva, sin el último activo).
+        """
+        if not self.visible(puntos, visibles):
+            return False, ultimo
+        estado = self.condiciones(puntos)
+        indices = dict(self.lados)
+        for lado, i in self.lados:
+            if lado == ultimo or not estado[i]:
+                continue
+            if ultimo in indices and self.exclusiva and estado[indices[ultimo]]:
+                continue
+            return True, lado
+        return False, ultimo
+
+    def alternar_lote(self, puntos, ultimo=None, visibles=None):
+        """Versión por lotes de alternar, con el estado resuelto por un barrido vectorizado.
+
+        Devuelve (gesto_ok, lado), ambos (T,): lado es el índice en `lados` del último
+        lado detectado tras cada frame (-1 mientras no haya ninguno). Solo admite dos lados.
+        """
+        if len(self.lados) != 2:
+            raise ValueError(f"{self.nombre}: el barrido por lotes necesita exactamente dos lados")
+        estado = self.condiciones(puntos) & np.asarray(self.visible(puntos, visibles))[..., None]
+        activo_0 = estado[:, self.lados[0][1]]
+        activo_1 = estado[:, self.lados[1][1]]
+        nombres = [lado for lado, _ in self.lados]
+        inicial = nombres.index(ultimo) if ultimo in nombres else -1
+
+        # Un frame con un solo lado activo fija el estado en ese lado. Un frame con
+        # ambos activos lo invierte (o, si la alternancia es exclusiva, lo deja
+        # igual); sin lado previo, en ambos casos gana el primer lado.
+        posiciones = np.arange(len(activo_0))
+        fija = activo_0 != activo_1
+        ambos = np.cumsum(activo_0 & activo_1)
+        ultimo_fijo = np.maximum.accumulate(np.where(fija, posiciones, -1))
+        hay_fijo = ultimo_fijo >= 0
+        desde = np.where(hay_fijo, ultimo_fijo, 0)
+        previo = np.where(hay_fijo, activo_1[desde], inicial).astype(np.int8)
+        ambos_despues = ambos - np.where(hay_fijo, ambos[desde], 0)
+
+        if self.exclusiva:
+            lado = np.where((previo < 0) & (ambos_despues > 0), 0, previo)
+        else:
+            invertido = np.where(previo < 0, (ambos_despues - 1) % 2, previo ^ (ambos_despues % 2))
+            lado = np.where(ambos_despues > 0, invertido, previo)
+        lado = lado.astype(np.int8)
+        gesto_ok = lado != np.concatenate([[inicial], lado[:-1]])
+        return gesto_ok, lado
+
+    def alternar_filas(self, puntos, ultimos, visibles=None):
+        """alternar sobre varias personas a la vez, cada fila con su propio último lado.
+
+        puntos: (P, 33, 4); ultimos: índices (P,) en `lados` (-1 sin lado previo).
+        Devuelve (gesto_ok, lado), ambos (P,), con la misma semántica que alternar.
+        """
+        ultimos = np.asarray(ultimos, dtype=np.intp)
+        filas = np.arange(len(ultimos))
+        estado = self.condiciones(puntos)[:, [i for _, i in self.lados]]
+        hay_ultimo = ultimos >= 0
+        previo = np.where(hay_ultimo, ultimos, 0)
+        candidatos = estado.copy()
+        # El último lado no cuenta otra vez y, si es exclusiva, bloquea mientras siga activo
+        candidatos[filas[hay_ultimo], ultimos[hay_ultimo]] = False
+        if self.exclusiva:
+            candidatos &= ~(hay_ultimo & estado[filas, previo])[:, None]
+        gesto_ok = candidatos.any(axis=1) & np.asarray(self.visible(puntos, visibles))
+        lado = np.where(gesto_ok, candidatos.argmax(axis=1), ultimos)
+        return gesto_ok, lado
+
+    def medida(self, puntos, nombre, parametros=None):
+        """Valor de una medida declarada en la regla."""
+        columna, _ = self.medidas[nombre]
+        base, _ = self._base(puntos, parametros)
+        constantes = self._constantes(parametros, self._W_param_medidas, self._w0_medidas)
+        valor = base @ self._W_medidas[:, columna] + constantes[..., columna]
+        return float(valor) if np.ndim(valor) == 0 else valor
+
+    def depurar(self, puntos, visibles=None, parametros=None):
+        """Devuelve (resultado, checks) con checks[condición] = (ok, texto) para mostrar en pantalla."""
+        if not self.visible(puntos, visibles):
+            return False, {}
+        base, indefinidos = self._base(puntos, parametros)
+        estado = self._evaluar(base, indefinidos, parametros)
+        valores = base @ self._W_medidas + self._constantes(parametros, self._W_param_medidas, self._w0_medidas)
+        checks = {}
+        for i, nombre in enumerate(self.nombres_condiciones):
+            ok = bool(estado[i])
+            if nombre in self.medidas:
+                columna, unidad = self.medidas[nombre]
+                checks[nombre] = (ok, f"{valores[columna]:.3f} {unidad or ''}".rstrip())
+            else:
+                checks[nombre] = (ok, "✓" if ok else "✗")
+        return bool(estado.all()), checks
+
+
+def compilar_reglas(specs):
+    """Compila un diccionario nombre -> spec en nombre -> Regla."""
+    return {nombre: Regla(nombre, spec) for nombre, spec in specs.items()}
+
+
+EntradaNivel = namedtuple("EntradaNivel", ["regla", "espejo", "world", "estado", "parametro"])
+
+
+def compilar_niveles(niveles, reglas):
+    """Compila la tabla de niveles en una lista indexada por número de nivel.
+
+    Cada nivel indica su regla y, opcionalmente, la variante en espejo, la
+    variante sobre world landmarks, el atributo del juego que guarda el último
+    lado de una alternancia y el atributo con el parámetro de la regla.
+    """
+    tabla = [None] * (max(niveles) + 1)
+    for nivel, entrada in niveles.items():
+        tabla[nivel] = EntradaNivel(
+            regla=reglas[entrada["regla"]],
+            espejo=reglas[entrada["espejo"]] if "espejo" in entrada else None,
+            world=reglas[entrada["world"]] if "world" in entrada else None,
+            estado=entrada.get("estado"),
+            parametro=entrada.get("parametro"),
+        )
+    return tabla
@@ -0,0 +1,123 @@
+"""Inferencia sobre un recorte que sigue a la persona (ROI de seguimiento).
+
+SeguimientoROI envuelve un Pose (o un ControladorCalidad) con la misma
+interfaz process/close. A partir de los landmarks del frame anterior calcula
+una caja con margen alrededor de la persona, pasa al modelo solo ese recorte
+y devuelve los landmarks en coordenadas normalizadas del frame completo.
+Si se pierde a la persona en el recorte, el mismo frame se vuelve a procesar
+completo y el seguimiento se reanuda con la siguiente detección.
+
+El recorte solo se mueve cuando la persona se acerca a su borde o cuando
+sobra mucho espacio: un recorte estable evita que los filtros de suavizado
+de MediaPipe vean saltos de coordenadas en cada frame.
+"""
+import numpy as np
+
+from utils import UMBRAL_VISIBILIDAD
+
+
+class SeguimientoROI:
+    """Pose que procesa solo la región de la persona detectada en el frame anterior.
+
+    margen: relleno alrededor de la caja de landmarks, en fracción de su lado mayor.
+    min_visibles: landmarks visibles necesarios para seguir recortando.
+    """
+
+    def __init__(self, pose, margen=0.3, min_visibles=8, lado_minimo=96):
+        self.pose = pose
+        self.margen = margen
+        self.min_visibles = min_visibles
+        self.lado_minimo = lado_minimo
+        self.recorte = None  # (x0, y0, x1, y1) en píxeles del frame completo, o None
+        self.perdidas = 0
+        self.pixeles_entrada = 0
+        self.pixeles_frame = 0
+        self._buffer = None
+
+    def descripcion(self):
+        """Fracción de píxeles procesados y, si la hay, la descripción del Pose envuelto."""
+        fraccion = self.pixeles_entrada / max(self.pixeles_frame, 1)
+        texto = f"recorte {fraccion:.0%} de los píxeles, {self.perdidas} pérdidas"
+        interior = getattr(self.pose, "descripcion", None)
+        return f"{interior()}, {texto}" if interior is not None else texto
+
+    def process(self, frame_rgb):
+        """Equivalente a Pose.process: landmarks normalizados respecto al frame completo."""
+        h, w = frame_rgb.shape[:2]
+        self.pixeles_frame += h * w
+
+        recorte = self.recorte
+        if recorte is not None:
+            result = self.pose.process(self._recortar(frame_rgb, recorte))
+            if result.pose_landmarks:
+                self._a_frame_completo(result.pose_landmarks.landmark, recorte, w, h)
+            else:
+                # Seguimiento perdido: se repite la detección sobre el frame completo
+                self.perdidas += 1
+                recorte = None
+        if recorte is None:
+            self.pixeles_entrada += h * w
+            result = self.pose.process(frame_rgb)
+
+        self.recorte = self._siguiente_recorte(result, w, h)
+        return result
+
+    def _recortar(self, frame_rgb, recorte):
+        """Copia el recorte a un buffer contiguo reutilizado (MediaPipe no acepta vistas)."""
+        x0, y0, x1, y1 = recorte
+        region = frame_rgb[y0:y1, x0:x1]
+        if self._buffer is None or self._buffer.shape != region.shape:
+            self._buffer = np.empty_like(region)
+        np.copyto(self._buffer, region)
+        self.pixeles_entrada += region.shape[0] * region.shape[1]
+        return self._buffer
+
+    @staticmethod
+    def _a_frame_completo(landmarks, recorte, w, h):
+        """Pasa landmarks normalizados al recorte a coordenadas normalizadas del frame."""
+        x0, y0, x1, y1 = recorte
+        ancho, alto = x1 - x0, y1 - y0
+        for lm in landmarks:
+            lm.x = (x0 + lm.x * ancho) / w
+            lm.y = (y0 + lm.y * alto) / h
+            # La z de MediaPipe está en la escala del ancho de la imagen de entrada
+            lm.z = lm.z * ancho / w
+
+    def _siguiente_recorte(self, result, w, h):
+        """Recorte para el próximo frame, o None para volver a procesar el frame completo."""
+        if not result.pose_landmarks:
+            return None
+        puntos = np.array([(lm.x, lm.y, lm.visibility) for lm in result.pose_landmarks.landmark])
+        visibles = puntos[puntos[:, 2] >= UMBRAL_VISIBILIDAD, :2]
+        if len(visibles) < self.min_visibles:
+            return None
+
+        xs = np.clip(visibles[:, 0], 0.0, 1.0) * w
+        ys = np.clip(visibles[:, 1], 0.0, 1.0) * h
+        caja = (xs.min(), ys.min(), xs.max(), ys.max())
+        lado = max(caja[2] - caja[0], caja[3] - caja[1], self.lado_minimo)
+
+        # Se conserva el recorte actual mientras la persona quede dentro con medio margen
+        # y el recorte no sea mucho mayor de lo necesario
+        actual = self.recorte
+        if actual is not None:
+            necesario = self._expandir(caja, lado * self.margen / 2, w, h)
+            objetivo = self._expandir(caja, lado * self.margen, w, h)
+            contiene = (actual[0] <= necesario[0] and actual[1] <= necesario[1]
+                        and actual[2] >= necesario[2] and actual[3] >= necesario[3])
+            if contiene and self._area(actual) <= 2.0 * self._area(objetivo):
+                return actual
+        return self._expandir(caja, lado * self.margen, w, h)
+
+    @staticmethod
+    def _expandir(caja, relleno, w, h):
+        x0, y0, x1, y1 = caja
+        return (max(int(x0 - relleno), 0), max(int(y0 - relleno), 0),
+                min(int(np.ceil(x1 + relleno)), w), min(int(np.ceil(y1 + relleno)), h))
+
+    @staticmethod
+    def _area(caja):
+        return (caja[2] - caja[0]) * (caja[3] - caja[1])
+
+    def close(self):
+        self.pose.close()
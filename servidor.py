@@ -0,0 +1,367 @@
+"""Servidor de sesiones remotas: los quioscos envían landmarks y el servidor juega.
+
+Los clientes ligeros de cada estación solo ejecutan cámara y MediaPipe y envían
+por TCP un registro por frame con el mismo formato binario que las grabaciones
+(grabacion.REGISTRO). El servidor atiende todas las conexiones en un único
+bucle asyncio: cada conexión solo deja en su sesión el último registro
+recibido, y un tick periódico evalúa de una vez los detectores de todas las
+sesiones con frame nuevo (gestures.detectar_gestos_lote), actualiza el Game de
+cada una y devuelve a cada cliente solo los campos del HUD que han cambiado.
+
+Protocolo (por conexión):
+    cliente -> servidor: una línea JSON de saludo ({"dificultad": "normal", "espejo": true})
+                         seguida de registros REGISTRO de tamaño fijo
+    servidor -> cliente: una línea JSON con los cambios del HUD ({"nivel": 3, "puntos": 250})
+
+Uso:
+    python servidor.py --puerto 8765
+    python servidor.py --cliente sesion1.lmk          # reproduce una grabación como un quiosco
+    python servidor.py --carga 2000 --duracion 20     # generador de carga
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+from game_logic import Game
+from gestures import detectar_gestos_lote
+from grabacion import cargar_grabacion, HAY_PUNTOS, HAY_WORLD, REGISTRO
+from metricas import VentanaLatencia
+from utils import mascara_visibilidad, NUM_LANDMARKS, VIS
+
+# Por encima de estos bytes pendientes de enviar a un cliente lento se deja de
+# escribirle; los cambios se acumulan y salen juntos cuando se ponga al día
+LIMITE_ESCRITURA = 64 * 1024
+
+
+CAMPOS_HUD = ("estado", "nivel", "puntos", "racha", "estrellas", "alternos", "objetivo_activo", "feedback")
+
+
+def estado_hud(game):
+    """Valores de CAMPOS_HUD, los campos del HUD que se envían a los clientes."""
+    return (game.estado, game.nivel, game.puntos, game.racha_actual, sum(game.estrellas_nivel),
+            game.contador_alternos, game.objetivo_activo, game.feedback_texto)
+
+
+class Sesion:
+    """Partida de un cliente remoto y el último registro que ha enviado."""
+
+    __slots__ = ("id", "game", "espejo", "escritor", "pendiente", "enviado", "cerrada")
+
+    def __init__(self, identificador, escritor, dificultad="normal", espejo=True):
+        self.id = identificador
+        self.game = Game()
+        self.game.cambiar_dificultad(dificultad)
+        self.game.iniciar_juego()
+        self.espejo = espejo
+        self.escritor = escritor
+        self.pendiente = None  # bytes del último registro sin procesar
+        self.enviado = (None,) * len(CAMPOS_HUD)  # Último estado del HUD enviado al cliente
+        self.cerrada = False
+
+    def enviar_cambios(self):
+        estado = estado_hud(self.game)
+        if estado == self.enviado or self.escritor.transport.get_write_buffer_size() > LIMITE_ESCRITURA:
+            return
+        cambios = {clave: valor for clave, valor, anterior in zip(CAMPOS_HUD, estado, self.enviado)
+                   if valor != anterior}
+        self.escritor.write(json.dumps(cambios, separators=(",", ":")).encode() + b"\n")
+        self.enviado = estado
+
+
+class ServidorLandmarks:
+    """Multiplexa las sesiones de todos los clientes sobre un bucle asyncio.
+
+    tick: segundos entre evaluaciones; los registros que llegan entre dos ticks
+    sustituyen al anterior de su sesión (como el buzón del pipeline).
+    """
+
+    def __init__(self, tick=1 / 30):
+        self.tick = tick
+        self.sesiones = {}
+        self.latencia = VentanaLatencia(4096)  # Duración de cada tick
+        self.ticks = 0
+        self.registros = 0
+        self.descartados = 0  # Registros sustituidos antes de procesarse
+        self.retrasos = 0  # Ticks que empezaron tarde por el anterior
+        self._pendientes = []
+        self._ids = itertools.count(1)
+
+    async def _atender(self, lector, escritor):
+        try:
+            saludo = json.loads(await lector.readline() or b"{}")
+        except ValueError:
+            escritor.close()
+            return
+        sesion = Sesion(next(self._ids), escritor, saludo.get("dificultad", "normal"), saludo.get("espejo", True))
+        self.sesiones[sesion.id] = sesion
+        try:
+            while True:
+                registro = await lector.readexactly(REGISTRO.itemsize)
+                self.registros += 1
+                if sesion.pendiente is None:
+                    self._pendientes.append(sesion)
+                else:
+                    self.descartados += 1
+                sesion.pendiente = registro
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            sesion.cerrada = True
+            del self.sesiones[sesion.id]
+            escritor.close()
+
+    def procesar_tick(self):
+        """Evalúa en bloque las sesiones con registro nuevo y envía los cambios del HUD."""
+        sesiones = [s for s in self._pendientes if not s.cerrada]
+        self._pendientes = []
+        if not sesiones:
+            return
+        datos = np.frombuffer(b"".join(s.pendiente for s in sesiones), dtype=REGISTRO)
+        for sesion in sesiones:
+            sesion.pendiente = None
+
+        # Una pasada por combinación de espejo y world landmarks; dentro de cada una,
+        # detectar_gestos_lote agrupa además por nivel
+        visibles = mascara_visibilidad(datos["puntos"])
+        tiempos = datos["tiempo"].tolist()
+        grupos = {}
+        for i, (sesion, flags) in enumerate(zip(sesiones, datos["flags"].tolist())):
+            if flags & HAY_PUNTOS and sesion.game.estado in ["jugando", "mostrando_instruccion"]:
+                grupos.setdefault((sesion.espejo, bool(flags & HAY_WORLD)), []).append(i)
+        for (espejo, hay_world), indices in grupos.items():
+            world = datos["world"][indices] if hay_world else None
+            gestos = detectar_gestos_lote([sesiones[i].game for i in indices], datos["puntos"][indices],
+                                          visibles[indices], world, espejo=espejo)
+            for i, gesto_ok in zip(indices, gestos.tolist()):
+                sesiones[i].game.actualizar(gesto_ok, tiempos[i])
+
+        for sesion in sesiones:
+            sesion.enviar_cambios()
+
+    async def _bucle_ticks(self):
+        siguiente = time.perf_counter()
+        while True:
+            siguiente += self.tick
+            espera = siguiente - time.perf_counter()
+            if espera < 0:
+                # El tick anterior se pasó de su plazo: no se intenta recuperar
+                self.retrasos += 1
+                siguiente -= espera
+            await asyncio.sleep(max(espera, 0))
+            inicio = time.perf_counter()
+            self.procesar_tick()
+            self.latencia.registrar(time.perf_counter() - inicio)
+            self.ticks += 1
+
+    async def servir(self, host="0.0.0.0", puerto=8765, detener=None, intervalo_informe=5.0, al_escuchar=None):
+        """Atiende conexiones hasta que se cancela o `detener()` devuelve True."""
+        servidor = await asyncio.start_server(self._atender, host, puerto, backlog=1024)
+        if al_escuchar is not None:
+            al_escuchar()
+        ticks = asyncio.create_task(self._bucle_ticks())
+        ultimo_informe = time.monotonic()
+        try:
+            while detener is None or not detener():
+                await asyncio.sleep(0.2)
+                if intervalo_informe and time.monotonic() - ultimo_informe >= intervalo_informe:
+                    print(self.resumen())
+                    ultimo_informe = time.monotonic()
+        finally:
+            ticks.cancel()
+            servidor.close()
+
+    def estadisticas(self):
+        percentiles = self.latencia.percentiles() or (0.0, 0.0, 0.0)
+        return {
+            "sesiones": len(self.sesiones),
+            "ticks": self.ticks,
+            "registros": self.registros,
+            "descartados": self.descartados,
+            "retrasos": self.retrasos,
+            "tick_p50_ms": percentiles[0] * 1000,
+            "tick_p99_ms": percentiles[2] * 1000,
+        }
+
+    def resumen(self):
+        e = self.estadisticas()
+        return (f"[Servidor] {e['sesiones']} sesiones  {e['ticks']} ticks  tick p50 {e['tick_p50_ms']:.2f} ms  "
+                f"p99 {e['tick_p99_ms']:.2f} ms  {e['registros']} registros ({e['descartados']} sustituidos)")
+
+
+async def _leer_cambios(lector, al_cambio=None):
+    """Consume las líneas de cambios que envía el servidor. Devuelve cuántas ha leído."""
+    lineas = 0
+    while True:
+        try:
+            linea = await lector.readline()
+        except ConnectionError:
+            linea = b""
+        if not linea:
+            return lineas
+        lineas += 1
+        if al_cambio is not None:
+            al_cambio(json.loads(linea))
+
+
+async def cliente_grabacion(ruta, host="127.0.0.1", puerto=8765, dificultad="normal", espejo=True):
+    """Cliente de prueba: reproduce una grabación al ritmo grabado como si fuera un quiosco."""
+    datos = cargar_grabacion(ruta)
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    escritor.write(json.dumps({"dificultad": dificultad, "espejo": espejo}).encode() + b"\n")
+    cambios = asyncio.create_task(_leer_cambios(lector, lambda c: print(f"[HUD] {c}")))
+
+    inicio = time.perf_counter()
+    for t in range(len(datos)):
+        espera = float(datos["tiempo"][t] - datos["tiempo"][0]) - (time.perf_counter() - inicio)
+        if espera > 0:
+            await asyncio.sleep(espera)
+        escritor.write(datos[t:t + 1].tobytes())
+        await escritor.drain()
+    # Margen para recibir los cambios del último tick
+    await asyncio.sleep(0.5)
+    escritor.close()
+    await cambios
+
+
+def registros_sinteticos(cantidad=64, semilla=0):
+    """Registros con poses sintéticas (una base aleatoria con ruido) para el generador de carga."""
+    rng = np.random.default_rng(semilla)
+    base = rng.random((NUM_LANDMARKS, 4)).astype(np.float32)
+    registros = np.zeros(cantidad, dtype=REGISTRO)
+    registros["flags"] = HAY_PUNTOS
+    registros["puntos"] = base + rng.normal(0, 0.05, (cantidad, NUM_LANDMARKS, 4)).astype(np.float32)
+    registros["puntos"][..., VIS] = 0.9
+    return registros
+
+
+async def generar_carga(sesiones, host="127.0.0.1", puerto=8765, duracion=10.0, fps=30.0):
+    """Abre `sesiones` conexiones y envía un registro sintético por sesión y frame.
+
+    Devuelve el número de líneas de cambios recibidas.
+    """
+    conexiones = []
+    lectores = []
+    saludo = json.dumps({"dificultad": "normal", "espejo": True}).encode() + b"\n"
+    for _ in range(sesiones):
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        escritor.write(saludo)
+        conexiones.append(escritor)
+        lectores.append(asyncio.create_task(_leer_cambios(lector)))
+
+    plantillas = registros_sinteticos()
+    desfases = np.arange(sesiones)
+    tam = REGISTRO.itemsize
+    inicio = time.perf_counter()
+    for frame in itertools.count():
+        siguiente = inicio + frame / fps
+        if siguiente - inicio >= duracion:
+            break
+        await asyncio.sleep(max(siguiente - time.perf_counter(), 0))
+        # Todos los registros del frame en un único array; cada sesión recibe su tramo
+        lote = plantillas[(frame + desfases) % len(plantillas)]
+        lote["tiempo"] = time.time()
+        vista = memoryview(lote.tobytes())
+        for i, escritor in enumerate(conexiones):
+            if escritor.transport.get_write_buffer_size() < LIMITE_ESCRITURA:
+                escritor.write(vista[i * tam:(i + 1) * tam])
+
+    for escritor in conexiones:
+        escritor.close()
+    return sum(await asyncio.gather(*lectores))
+
+
+def _subir_limite_ficheros():
+    """Miles de sesiones necesitan miles de sockets abiertos."""
+    try:
+        import resource
+    except ImportError:
+        return
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if blando < duro:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (duro, duro))
+
+
+def _proceso_servidor(host, puerto, tick, listo, detener, resultados):
+    """Servidor en un proceso aparte para que la carga no consuma su CPU."""
+    _subir_limite_ficheros()
+    servidor = ServidorLandmarks(tick)
+
+    async def ejecutar():
+        await servidor.servir(host, puerto, detener.is_set, intervalo_informe=0, al_escuchar=listo.set)
+
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    asyncio.run(ejecutar())
+    estadisticas = servidor.estadisticas()
+    estadisticas["segundos"] = time.perf_counter() - inicio
+    estadisticas["cpu"] = time.process_time() - inicio_cpu
+    resultados.put(estadisticas)
+
+
+def prueba_carga(sesiones, duracion=10.0, fps=30.0, tick=1 / 30, puerto=8765):
+    """Lanza el servidor en otro proceso, lo carga con `sesiones` clientes y devuelve sus estadísticas."""
+    _subir_limite_ficheros()
+    listo, detener = multiprocessing.Event(), multiprocessing.Event()
+    resultados = multiprocessing.Queue()
+    proceso = multiprocessing.Process(target=_proceso_servidor,
+                                      args=("127.0.0.1", puerto, tick, listo, detener, resultados))
+    proceso.start()
+    listo.wait()
+    try:
+        cambios = asyncio.run(generar_carga(sesiones, "127.0.0.1", puerto, duracion, fps))
+    finally:
+        detener.set()
+    estadisticas = resultados.get()
+    proceso.join()
+    estadisticas["cambios_recibidos"] = cambios
+    # Núcleos ocupados por el servidor = CPU consumida / tiempo real
+    nucleos = estadisticas["cpu"] / max(estadisticas["segundos"], 1e-9)
+    estadisticas["sesiones_por_nucleo"] = sesiones / max(nucleos, 1e-9)
+    return estadisticas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de landmarks para quioscos remotos")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--tick", type=float, default=1 / 30, metavar="S",
+                        help="segundos entre evaluaciones de las sesiones (por defecto 1/30)")
+    parser.add_argument("--cliente", metavar="GRABACION",
+                        help="en lugar de servir, conecta como quiosco y reproduce una grabación (.lmk)")
+    parser.add_argument("--carga", type=int, metavar="SESIONES",
+                        help="generador de carga: servidor local con SESIONES clientes sintéticos")
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos de la prueba de carga")
+    parser.add_argument("--fps", type=float, default=30.0, help="frames por segundo de cada cliente sintético")
+    args = parser.parse_args(argv)
+
+    if args.cliente:
+        host = "127.0.0.1" if args.host == "0.0.0.0" else args.host
+        asyncio.run(cliente_grabacion(args.cliente, host, args.puerto))
+        return
+
+    if args.carga:
+        e = prueba_carga(args.carga, args.duracion, args.fps, args.tick, args.puerto)
+        print(f"Sesiones: {args.carga} a {args.fps:.0f} fps durante {args.duracion:.0f}s")
+        print(f"Registros: {e['registros']} ({e['descartados']} sustituidos)  "
+              f"cambios de HUD recibidos: {e['cambios_recibidos']}")
+        print(f"Ticks: {e['ticks']}  retrasados: {e['retrasos']}  "
+              f"p50 {e['tick_p50_ms']:.2f} ms  p99 {e['tick_p99_ms']:.2f} ms")
+        print(f"CPU del servidor: {e['cpu']:.1f}s en {e['segundos']:.1f}s  "
+              f"->  {e['sesiones_por_nucleo']:.0f} sesiones por núcleo")
+        return
+
+    servidor = ServidorLandmarks(args.tick)
+    print(f"Servidor de landmarks en {args.host}:{args.puerto} (tick {args.tick * 1000:.1f} ms)")
+    try:
+        asyncio.run(servidor.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    print(servidor.resumen())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Textos pre-renderizados (sprites) y paneles translúcidos para HUD, instrucciones y guías.
+
+Un sprite se rasteriza una vez sobre negro y otra sobre blanco: la primera
+imagen es el color ya multiplicado por su opacidad y la diferencia entre ambas
+es la transmisión del fondo, así que los bordes suavizados y la sombra se
+superponen igual que si se dibujaran sobre el frame. Los sprites se guardan en
+una caché LRU acotada indexada por texto, fuente, escala, color, grosor y
+sombra; un texto solo se vuelve a rasterizar cuando cambia su contenido.
+
+Los paneles translúcidos se mezclan solo dentro de su rectángulo, sin copiar
+ni mezclar el frame completo: el coste depende del área del panel.
+"""
+from collections import OrderedDict, namedtuple
+
+import cv2
+import numpy as np
+
+Sprite = namedtuple("Sprite", ["color", "transmision", "dx", "dy", "ancho"])
+
+
+def rasterizar(dibujar, alto, ancho):
+    """Ejecuta dibujar(lienzo) sobre negro y sobre blanco. Devuelve (color, transmision)."""
+    negro = np.zeros((alto, ancho, 3), dtype=np.uint8)
+    blanco = np.full((alto, ancho, 3), 255, dtype=np.uint8)
+    dibujar(negro)
+    dibujar(blanco)
+    return negro, cv2.subtract(blanco, negro)
+
+
+def superponer(frame, color, transmision, x, y):
+    """Superpone (color, transmision) con la esquina en (x, y), recortando a los bordes del frame."""
+    h, w = frame.shape[:2]
+    alto, ancho = color.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + ancho, w), min(y + alto, h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    roi = frame[y0:y1, x0:x1]
+    sy, sx = y0 - y, x0 - x
+    cv2.multiply(roi, transmision[sy:sy + y1 - y0, sx:sx + x1 - x0], roi, scale=1 / 255)
+    cv2.add(roi, color[sy:sy + y1 - y0, sx:sx + x1 - x0], roi)
+
+
+def panel_translucido(frame, x0, y0, x1, y1, color, alpha):
+    """Equivalente a rellenar (x0, y0)-(x1, y1) en una copia del frame y mezclarla con
+    cv2.addWeighted(copia, alpha, frame, 1 - alpha), pero solo dentro del rectángulo."""
+    h, w = frame.shape[:2]
+    # cv2.rectangle incluye las dos esquinas
+    x0, y0 = max(x0, 0), max(y0, 0)
+    x1, y1 = min(x1 + 1, w), min(y1 + 1, h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    roi = frame[y0:y1, x0:x1]
+    cv2.addWeighted(_fondo_liso(y1 - y0, x1 - x0, tuple(color)), alpha, roi, 1 - alpha, 0, roi)
+
+
+_FONDOS = OrderedDict()
+
+
+def _fondo_liso(alto, ancho, color, capacidad=32):
+    """Rectángulo de color liso reutilizado entre frames (los paneles tienen tamaño fijo)."""
+    clave = (alto, ancho, color)
+    fondo = _FONDOS.get(clave)
+    if fondo is None:
+        fondo = np.empty((alto, ancho, 3), dtype=np.uint8)
+        fondo[:] = color
+        _FONDOS[clave] = fondo
+        if len(_FONDOS) > capacidad:
+            _FONDOS.popitem(last=False)
+    else:
+        _FONDOS.move_to_end(clave)
+    return fondo
+
+
+def _crear_sprite(texto, fuente, escala, color, grosor, sombra):
+    (ancho, alto), base = cv2.getTextSize(texto, fuente, escala, grosor)
+    # Margen holgado: los trazos (sobre todo en fuentes cursivas) sobresalen de getTextSize
+    margen = alto + 2 * grosor + 8
+    origen = (margen, margen + alto)
+
+    def dibujar(lienzo):
+        if sombra:
+            cv2.putText(lienzo, texto, (origen[0] + 2, origen[1] + 2), fuente, escala, (0, 0, 0), grosor + 1)
+        cv2.putText(lienzo, texto, origen, fuente, escala, color, grosor)
+
+    color_sprite, transmision = rasterizar(dibujar, alto + base + 2 * margen + 2, ancho + 2 * margen + 2)
+
+    # Recorte al área realmente dibujada
+    usados = transmision < 255
+    filas = np.flatnonzero(usados.any(axis=(1, 2)))
+    columnas = np.flatnonzero(usados.any(axis=(0, 2)))
+    if not len(filas):
+        return Sprite(color_sprite[:0, :0], transmision[:0, :0], 0, 0, ancho)
+    y0, y1, x0, x1 = filas[0], filas[-1] + 1, columnas[0], columnas[-1] + 1
+    return Sprite(np.ascontiguousarray(color_sprite[y0:y1, x0:x1]),
+                  np.ascontiguousarray(transmision[y0:y1, x0:x1]),
+                  x0 - origen[0], y0 - origen[1], ancho)
+
+
+class CacheSprites:
+    """Caché LRU de sprites de texto con capacidad fija."""
+
+    def __init__(self, capacidad=512):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._sprites = OrderedDict()
+
+    def sprite(self, texto, fuente, escala, color, grosor, sombra=True):
+        clave = (texto, fuente, escala, tuple(color), grosor, sombra)
+        sprite = self._sprites.get(clave)
+        if sprite is not None:
+            self._sprites.move_to_end(clave)
+            self.aciertos += 1
+            return sprite
+        self.fallos += 1
+        sprite = _crear_sprite(texto, fuente, escala, tuple(color), grosor, sombra)
+        self._sprites[clave] = sprite
+        if len(self._sprites) > self.capacidad:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def texto(self, frame, texto, pos, fuente, escala, color, grosor, centrado=False, sombra=True):
+        """Equivalente a cv2.putText (con sombra opcional) usando el sprite cacheado."""
+        sprite = self.sprite(texto, fuente, escala, color, grosor, sombra)
+        x, y = pos
+        if centrado:
+            x = x - sprite.ancho // 2
+        superponer(frame, sprite.color, sprite.transmision, x + sprite.dx, y + sprite.dy)
+
+
+SPRITES = CacheSprites()
+
+
+def dibujar_texto(frame, texto, pos, fuente, escala, color, grosor, centrado=False, sombra=False):
+    """Dibuja un texto a través de la caché global de sprites."""
+    SPRITES.texto(frame, texto, pos, fuente, escala, color, grosor, centrado, sombra)
@@ -0,0 +1,140 @@
+"""Analítica de repeticiones: ventanas móviles, segmentación y simetría."""
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from analitica import (
+    AnaliticaRepeticiones, AnalisisMovimiento, Estadistica, MOVIMIENTOS, SegmentadorRepeticiones,
+    VentanaMovil,
+)
+from utils import NOMBRES_TRIPLETAS
+
+DT = 0.05  # 20 fps
+
+
+@pytest.mark.parametrize("capacidad", [1, 2, 5, 20])
+def test_ventana_movil_igual_que_statistics(capacidad):
+    rng = random.Random(capacidad)
+    ventana = VentanaMovil(capacidad)
+    valores = []
+    assert ventana.minimo is None and ventana.maximo is None
+    for _ in range(500):
+        # Valores repetidos para ejercitar los empates de las colas monótonas
+        valor = rng.choice([rng.uniform(-100, 100), float(rng.randint(0, 3))])
+        ventana.agregar(valor)
+        valores.append(valor)
+        recientes = valores[-capacidad:]
+        assert len(ventana) == len(recientes)
+        assert ventana.media == pytest.approx(statistics.mean(recientes), abs=1e-9)
+        esperada = statistics.variance(recientes) if len(recientes) > 1 else 0.0
+        assert ventana.varianza == pytest.approx(esperada, rel=1e-6, abs=1e-6)
+        assert ventana.minimo == min(recientes)
+        assert ventana.maximo == max(recientes)
+
+
+def test_estadistica_igual_que_statistics():
+    rng = random.Random(0)
+    estadistica = Estadistica()
+    valores = [rng.gauss(120, 15) for _ in range(1000)]
+    for valor in valores:
+        estadistica.agregar(valor)
+    assert estadistica.n == len(valores)
+    assert estadistica.media == pytest.approx(statistics.mean(valores))
+    assert estadistica.varianza == pytest.approx(statistics.variance(valores))
+    assert (estadistica.minimo, estadistica.maximo) == (min(valores), max(valores))
+
+
+def rampa(t, puntos):
+    """Interpolación lineal de una señal dada por (tiempo, valor)."""
+    return float(np.interp(t, *zip(*puntos)))
+
+
+def frames_angulos(perfiles, duracion):
+    """(tiempo, ángulos estándar) con cada ángulo de `perfiles` siguiendo su rampa."""
+    for k in range(int(round(duracion / DT)) + 1):
+        t = k * DT
+        angulos = [170.0] * len(NOMBRES_TRIPLETAS)
+        for nombre, puntos in perfiles.items():
+            angulos[NOMBRES_TRIPLETAS.index(nombre)] = rampa(t, puntos)
+        yield t, angulos
+
+
+def test_segmentador_sentadilla_sintetica():
+    # Arriba a 170 hasta t=1, baja a 90 en t=2 y vuelve a 170 en t=3.5
+    senal = [(0, 170), (1, 170), (2, 90), (3.5, 170), (5, 170)]
+    segmentador = SegmentadorRepeticiones(110, 150)
+    repeticiones = []
+    for k in range(int(5 / DT) + 1):
+        t = k * DT
+        valor = rampa(t, senal)
+        repeticion = segmentador.actualizar(t, valor, (valor,))
+        if repeticion is not None:
+            repeticiones.append(repeticion)
+
+    assert len(repeticiones) == 1
+    repeticion = repeticiones[0]
+    # Último frame arriba (>= 150) al bajar: t=1.25; mínimo en t=2; vuelta a 150 en t=3.125
+    assert repeticion["duracion"] == pytest.approx(3.15 - 1.25, abs=1e-9)
+    assert repeticion["bajada"] == pytest.approx(0.75, abs=1e-9)
+    assert repeticion["subida"] == pytest.approx(1.15, abs=1e-9)
+    assert repeticion["minimo"] == pytest.approx(90)
+    assert repeticion["rom"] == pytest.approx(80)
+    assert repeticion["simetria"] is None
+
+
+def test_sentadilla_asimetrica():
+    perfiles = {
+        "rodilla_izquierda": [(0, 170), (1, 170), (2, 90), (3.5, 170)],
+        "rodilla_derecha": [(0, 170), (1, 170), (2, 100), (3.5, 170)],
+    }
+    movimiento = AnalisisMovimiento("sentadilla", MOVIMIENTOS["sentadilla"])
+    repeticiones = []
+    for ciclo in range(3):
+        for t, angulos in frames_angulos(perfiles, 4):
+            repeticiones += movimiento.actualizar(ciclo * 4 + t, angulos)
+
+    assert len(repeticiones) == movimiento.repeticiones == 3
+    for repeticion in repeticiones:
+        assert repeticion["minimo"] == pytest.approx(95)
+        assert repeticion["rom"] == pytest.approx(75)
+        # Rango izquierdo 80, derecho 70
+        assert repeticion["simetria"] == pytest.approx(70 / 80)
+    assert movimiento.sesion["rom"].media == pytest.approx(75)
+    assert movimiento.ventana["duracion"].varianza == pytest.approx(0, abs=1e-12)
+
+
+def test_simetria_alterna():
+    # Cadera izquierda baja a 100 (rango 70) y, después, la derecha a 115 (rango 55)
+    perfiles = {
+        "cadera_izquierda": [(0, 170), (0.5, 170), (1, 100), (1.5, 170), (4, 170)],
+        "cadera_derecha": [(0, 170), (2, 170), (2.5, 115), (3, 170), (4, 170)],
+    }
+    movimiento = AnalisisMovimiento("elevacion_rodilla", MOVIMIENTOS["elevacion_rodilla"])
+    repeticiones = []
+    for ciclo in range(3):
+        for t, angulos in frames_angulos(perfiles, 4):
+            repeticiones += movimiento.actualizar(ciclo * 4 + t, angulos)
+
+    assert [r["lado"] for r in repeticiones] == [0, 1] * 3
+    assert [r["rom"] for r in repeticiones] == pytest.approx([70, 55] * 3)
+    # Sin repeticiones del otro lado aún no hay simetría
+    assert repeticiones[0]["simetria"] is None
+    for repeticion in repeticiones[1:]:
+        assert repeticion["simetria"] == pytest.approx(55 / 70)
+
+
+def test_solo_se_segmenta_el_movimiento_del_nivel():
+    perfiles = {
+        "rodilla_izquierda": [(0, 170), (1, 170), (2, 90), (3.5, 170)],
+        "rodilla_derecha": [(0, 170), (1, 170), (2, 90), (3.5, 170)],
+    }
+    eventos = []
+    analitica = AnaliticaRepeticiones(al_evento=lambda tipo, datos: eventos.append(datos["movimiento"]))
+    for nombre in (None, "elevacion_rodilla", "sentadilla"):
+        for t, angulos in frames_angulos(perfiles, 4):
+            analitica.actualizar({"visibles": (1 << 33) - 1, "angulos_estandar": np.array(angulos)}, t, nombre)
+    assert eventos == ["sentadilla"]
+    assert analitica.movimientos["elevacion_rodilla"].repeticiones == 0
+    assert analitica.movimientos["sentadilla"].ultima["rom"] == pytest.approx(80)
@@ -0,0 +1,158 @@
+"""Registro de niveles (niveles.compilar_programas) y su recorrido en Game."""
+import random
+
+import pytest
+
+from game_logic import Game
+from gestures import REGLAS
+from niveles import compilar_programas, INSTANTANEO, NIVELES, REPETICIONES, TEMPORIZADOR
+
+
+def test_niveles_sin_huecos():
+    niveles = {1: NIVELES[1], 3: NIVELES[3]}
+    with pytest.raises(ValueError, match="sin huecos"):
+        compilar_programas(niveles, REGLAS)
+    with pytest.raises(ValueError, match="sin huecos"):
+        compilar_programas({0: NIVELES[1], 1: NIVELES[2]}, REGLAS)
+
+
+def test_tipo_desconocido():
+    with pytest.raises(ValueError, match="tipo desconocido"):
+        compilar_programas({1: dict(NIVELES[1], tipo="cronometro")}, REGLAS)
+
+
+def test_temporizador_sin_duracion():
+    nivel = {"regla": "equilibrio_estable", "tipo": TEMPORIZADOR}
+    with pytest.raises(ValueError, match="duracion"):
+        compilar_programas({1: nivel}, REGLAS)
+    # Un dict por dificultad sin la dificultad pedida tampoco vale
+    with pytest.raises(KeyError):
+        compilar_programas({1: dict(nivel, duracion={"facil": 2})}, REGLAS, "dificil")
+
+
+def test_repeticiones_sin_valor():
+    nivel = {"regla": "elevacion_rodilla", "estado": "ultima_pierna", "tipo": REPETICIONES}
+    with pytest.raises(ValueError, match="repeticiones"):
+        compilar_programas({1: nivel}, REGLAS)
+    with pytest.raises(ValueError, match="repeticiones"):
+        compilar_programas({1: dict(nivel, repeticiones={"normal": 0})}, REGLAS)
+
+
+@pytest.mark.parametrize("dificultad, duraciones, repeticiones", [
+    ("facil", {3: 2, 7: 3, 10: 1}, 2),
+    ("normal", {3: 3, 7: 5, 10: 2}, 3),
+    ("dificil", {3: 5, 7: 8, 10: 4}, 5),
+])
+def test_valores_por_dificultad(dificultad, duraciones, repeticiones):
+    programas = compilar_programas(NIVELES, REGLAS, dificultad)
+    assert programas[0] is None
+    assert len(programas) == len(NIVELES) + 1
+    for nivel, duracion in duraciones.items():
+        assert programas[nivel].tipo == TEMPORIZADOR
+        assert programas[nivel].duracion == duracion
+        assert f"{duracion}s" in programas[nivel].instruccion
+    assert programas[6].repeticiones == repeticiones
+    assert f"({repeticiones} veces)" in programas[6].instruccion
+    assert programas[1].tipo == INSTANTANEO and programas[1].puntos == 100
+    assert programas[1].detector.espejo is REGLAS["brazo_izquierdo_arriba"]
+    assert programas[11].titulo == "NIVEL 11/11" and programas[11].progreso == 1.0
+
+
+# === Recorrido de referencia: la cadena de `if nivel ==` anterior al registro ===
+DURACIONES = {"facil": {3: 2, 7: 3, 10: 1}, "normal": {3: 3, 7: 5, 10: 2}, "dificil": {3: 5, 7: 8, 10: 4}}
+REPETICIONES_NIVEL_6 = {"facil": 2, "normal": 3, "dificil": 5}
+PUNTOS_TEMPORIZADOR = {3: 150, 7: 200, 10: 200}
+
+
+class CadenaOriginal:
+    """Progresión de niveles del juego original (sin dibujo, feedback ni logros)."""
+
+    def __init__(self, dificultad):
+        self.dificultad = dificultad
+        self.nivel = 1
+        self.estado = "mostrando_instruccion"
+        self.puntos = 0
+        self.contador_alternos = 0
+        self.objetivo_activo = False
+        self.tiempo_gesto = 0
+        self.tiempo_inicio_nivel = 0
+        self.estrellas_nivel = []
+
+    def actualizar(self, gesto_detectado, tiempo, extrapolado=False):
+        if self.estado == "completado":
+            return
+        if self.estado == "mostrando_instruccion":
+            self.estado = "jugando"
+            self.tiempo_inicio_nivel = tiempo
+            self.tiempo_gesto = 0
+            self.objetivo_activo = False
+
+        confirmado = gesto_detectado and not extrapolado
+        if self.nivel in [1, 2, 4, 5, 8] and confirmado:
+            self._completar_nivel(tiempo, 100)
+        elif self.nivel == 6 and confirmado:
+            self.contador_alternos += 1
+            if self.contador_alternos >= REPETICIONES_NIVEL_6[self.dificultad]:
+                self._completar_nivel(tiempo, 150)
+                self.contador_alternos = 0
+        elif self.nivel in [3, 7, 10]:
+            if not gesto_detectado:
+                self.objetivo_activo = False
+            elif not self.objetivo_activo:
+                self.objetivo_activo = True
+                self.tiempo_gesto = tiempo
+            elif tiempo - self.tiempo_gesto >= DURACIONES[self.dificultad][self.nivel] and not extrapolado:
+                self._completar_nivel(tiempo, PUNTOS_TEMPORIZADOR[self.nivel])
+                self.objetivo_activo = False
+        elif self.nivel in [9, 11] and confirmado:
+            self._completar_nivel(tiempo, 150)
+
+    def _completar_nivel(self, tiempo, puntos_base):
+        tiempo_nivel = tiempo - self.tiempo_inicio_nivel
+        estrellas, multiplicador = (3, 1.5) if tiempo_nivel < 3 else (2, 1.2) if tiempo_nivel < 6 else (1, 1.0)
+        self.estrellas_nivel.append(estrellas)
+        self.puntos += int(puntos_base * multiplicador)
+        self.nivel += 1
+        self.estado = "completado" if self.nivel > 11 else "mostrando_instruccion"
+
+
+def estado(juego):
+    return (juego.nivel, juego.estado, juego.puntos, juego.contador_alternos, juego.objetivo_activo,
+            tuple(juego.estrellas_nivel))
+
+
+@pytest.mark.parametrize("dificultad", ["facil", "normal", "dificil"])
+def test_game_recorre_los_niveles_como_la_cadena_original(dificultad):
+    rng = random.Random(dificultad)
+    completadas = 0
+    for _ in range(50):
+        game, referencia = Game(), CadenaOriginal(dificultad)
+        game.cambiar_dificultad(dificultad)
+        game.iniciar_juego()
+        tiempo, gesto = 0.0, False
+        for _ in range(3000):
+            tiempo += rng.choice([0.03, 0.1, 0.5])
+            # Rachas con y sin gesto, para que también se completen los temporizadores
+            gesto = gesto != (rng.random() < 0.1)
+            extrapolado = rng.random() < 0.2
+            game.actualizar(gesto, tiempo, extrapolado)
+            referencia.actualizar(gesto, tiempo, extrapolado)
+            assert estado(game) == estado(referencia)
+            if game.estado == "completado":
+                completadas += 1
+                break
+    assert completadas > 0
+
+
+def test_registro_propio():
+    niveles = {
+        1: {"regla": "sentadilla", "puntos": 10},
+        2: {"regla": "estocada", "estado": "ultima_pierna", "tipo": REPETICIONES, "repeticiones": 2},
+    }
+    game = Game(niveles=niveles)
+    assert game.total_niveles == 2
+    game.iniciar_juego()
+    for tiempo, gesto in enumerate([False, True, True, False, True]):
+        game.actualizar(gesto, float(tiempo))
+    assert game.estado == "completado"
+    assert game.puntos == int(10 * 1.5) + int(100 * 1.5)
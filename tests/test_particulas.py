@@ -0,0 +1,34 @@
+"""Dibujado en bloque de SistemaParticulas frente a cv2.circle partícula a partícula."""
+import numpy as np
+import pytest
+
+from particulas import SistemaParticulas
+
+
+def sistema(semilla):
+    """Dos ráfagas solapadas, la primera ya avanzada (discos más pequeños) y saliéndose del frame."""
+    particulas = SistemaParticulas()
+    particulas._rng = np.random.default_rng(semilla)
+    particulas.emitir(300, 200, 150, -10, -10)
+    for _ in range(semilla % 40):
+        particulas.actualizar()
+    particulas.emitir(200, 180, 120)
+    return particulas
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_dibujar_igual_que_circulos_en_orden(semilla):
+    particulas = sistema(semilla)
+    esperado = np.zeros((120, 160, 3), dtype=np.uint8)
+    particulas._dibujar_circulos(esperado)
+    frame = np.zeros_like(esperado)
+    particulas.dibujar(frame)
+    assert np.array_equal(frame, esperado)
+
+    # Un recorte no contiguo también se dibuja (y solo dentro del recorte)
+    grande = np.zeros((300, 400, 3), dtype=np.uint8)
+    recorte = grande[50:170, 100:260]
+    particulas.dibujar(recorte)
+    assert np.array_equal(recorte, esperado)
+    recorte[:] = 0
+    assert not grande.any()
@@ -0,0 +1,192 @@
+"""Las reglas compiladas (gestures.REGLAS) frente a los detectores originales."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import gestos_referencia as referencia
+import gestures
+import grabacion
+from gestures import REGLAS
+from utils import mascara_visibilidad
+
+FRAMES = 3000
+
+
+def como_landmarks(puntos):
+    """Array (33, 4) -> lista de landmarks con .x .y .z .visibility, como los de MediaPipe."""
+    return [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v)) for x, y, z, v in puntos]
+
+
+def frames_aleatorios(semilla, n=FRAMES):
+    """Frames aleatorios con casos límite: segmentos nulos y visibilidades junto al umbral."""
+    rng = np.random.default_rng(semilla)
+    puntos = rng.normal(0.5, 0.15, (n, 33, 4)).astype(np.float32)
+    puntos[..., 3] = rng.uniform(0.3, 1.0, (n, 33))
+    puntos[::7, :, 3] = rng.choice([0.49, 0.5, 0.51], (len(puntos[::7]), 33))
+    puntos[::11, 25] = puntos[::11, 23]   # muslo izquierdo de longitud cero
+    puntos[::13, 14] = puntos[::13, 16]   # antebrazo derecho de longitud cero
+    puntos[::17, 26, :3] = puntos[::17, 28, :3]
+    return puntos
+
+
+def casos(puntos):
+    """Pares (original, regla compilada) de todos los detectores sobre un frame."""
+    lm = como_landmarks(puntos)
+    visibles = mascara_visibilidad(puntos)
+    pares = [
+        (referencia.brazo_derecho_arriba(lm), gestures.brazo_derecho_arriba(puntos, visibles=visibles)),
+        (referencia.brazo_derecho_arriba(lm, True), gestures.brazo_derecho_arriba(puntos, True, visibles)),
+        (referencia.rodilla_izquierda_flexionada(lm), gestures.rodilla_izquierda_flexionada(puntos)),
+        (referencia.rodilla_izquierda_flexionada(lm, True), gestures.rodilla_izquierda_flexionada(puntos, True)),
+        (referencia.equilibrio_estable(lm), gestures.equilibrio_estable(puntos, visibles)),
+        (referencia.extension_adelante(lm), gestures.extension_adelante(puntos)),
+        (referencia.inclinacion_lateral(lm), gestures.inclinacion_lateral(puntos)),
+        (referencia.postura_ergonomica(lm), gestures.postura_ergonomica(puntos)),
+        (referencia.sentadilla(lm), gestures.sentadilla(puntos, visibles)),
+        (referencia.brazos_en_cruz(lm), gestures.brazos_en_cruz(puntos)),
+        (referencia.elevacion_talones(lm), gestures.elevacion_talones(puntos)),
+        (referencia.tocar_dedos_pies(lm), gestures.tocar_dedos_pies(puntos)),
+        (referencia.postura_guerrero(lm), gestures.postura_guerrero(puntos)),
+        (referencia.salto_detectado(lm, 0.6), gestures.salto_detectado(puntos, 0.6)),
+    ]
+    for ultima in ("ninguna", "izquierda", "derecha"):
+        pares.append((referencia.elevacion_rodilla(lm, ultima), gestures.elevacion_rodilla(puntos, ultima)))
+        pares.append((referencia.estocada(lm, ultima), gestures.estocada(puntos, ultima, visibles)))
+    for ultimo in ("ninguno", "izquierda", "derecha"):
+        pares.append((referencia.rotacion_torso(lm, ultimo), gestures.rotacion_torso(puntos, ultimo)))
+    return pares
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_reglas_igual_que_detectores_originales():
+    for k, puntos in enumerate(frames_aleatorios(0)):
+        for i, (original, compilada) in enumerate(casos(puntos)):
+            assert original == compilada, f"frame {k}, caso {i}"
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_umbral_exacto_de_visibilidad():
+    puntos = frames_aleatorios(1, 1)[0]
+    for visibilidad in (0.49, 0.5, 0.51):
+        puntos[[12, 14, 16], 3] = visibilidad
+        puntos[[12, 14, 16], :2] = [[0.5, 0.5], [0.5, 0.3], [0.5, 0.5]]
+        assert referencia.brazo_derecho_arriba(como_landmarks(puntos)) == gestures.brazo_derecho_arriba(puntos)
+        assert gestures.brazo_derecho_arriba(puntos) == (visibilidad >= 0.5)
+
+
+def postura(cambios=None):
+    """De pie, de frente y con los brazos caídos; `cambios`: {índice: (x, y, z)} a sustituir."""
+    puntos = np.zeros((33, 4), dtype=np.float32)
+    puntos[:, 3] = 1.0
+    puntos[[11, 13, 15], :3] = [(0.6, 0.3, 0), (0.62, 0.45, 0), (0.63, 0.6, 0)]
+    puntos[[12, 14, 16], :3] = [(0.4, 0.3, 0), (0.38, 0.45, 0), (0.37, 0.6, 0)]
+    puntos[[23, 25, 27], :3] = [(0.55, 0.55, 0), (0.56, 0.72, 0), (0.55, 0.9, 0)]
+    puntos[[24, 26, 28], :3] = [(0.45, 0.55, 0), (0.44, 0.72, 0), (0.45, 0.9, 0)]
+    puntos[[29, 30, 31, 32], :3] = [(0.55, 0.92, 0), (0.45, 0.92, 0), (0.57, 0.93, 0), (0.43, 0.93, 0)]
+    for indice, punto in (cambios or {}).items():
+        puntos[indice, :3] = punto
+    return puntos
+
+
+@pytest.mark.parametrize("detector, puntos", [
+    ("brazos_en_cruz", postura({13: (0.75, 0.3, 0), 15: (0.9, 0.31, 0), 14: (0.25, 0.3, 0), 16: (0.1, 0.31, 0)})),
+    ("extension_adelante", postura({13: (0.6, 0.31, -0.15), 15: (0.6, 0.32, -0.3),
+                                    14: (0.4, 0.31, -0.15), 16: (0.4, 0.32, -0.3)})),
+    ("elevacion_talones", postura({29: (0.55, 0.88, 0), 30: (0.45, 0.88, 0)})),
+])
+def test_posturas_construidas(detector, puntos):
+    assert getattr(gestures, detector)(puntos)
+    assert getattr(referencia, detector)(como_landmarks(puntos))
+    # Sin la postura ninguno de los dos detecta el gesto
+    assert not getattr(gestures, detector)(postura())
+    assert not getattr(referencia, detector)(como_landmarks(postura()))
+
+
+def test_guerrero_3d_con_checks():
+    rng = np.random.default_rng(2)
+    for _ in range(FRAMES):
+        world = rng.normal(0, 0.3, (33, 4)).astype(np.float32)
+        original, checks_original = referencia.postura_guerrero_3d(como_landmarks(world), True)
+        compilada, checks = gestures.postura_guerrero_3d(world, True)
+        assert original == compilada
+        assert {k: ok for k, (ok, _) in checks_original.items()} == {k: ok for k, (ok, _) in checks.items()}
+    assert gestures.postura_guerrero_3d(None, True) == (False, {})
+
+
+def secuencia_alternancia(semilla, n=FRAMES):
+    """Frames que pasan por reposo, un lado, el otro y ambos, para ejercitar las alternancias."""
+    rng = np.random.default_rng(semilla)
+    puntos = frames_aleatorios(semilla, n)
+    # Rodillas por encima o por debajo de las caderas y profundidades de hombros/rodillas cruzadas
+    puntos[:, 23:25, 1] = 0.5
+    puntos[:, 25:27, 1] = rng.choice([0.3, 0.6], (n, 2))
+    puntos[:, 11:13, 2] = rng.choice([-0.2, 0.0, 0.2], (n, 2))
+    return puntos
+
+
+@pytest.mark.parametrize("nombre", ["elevacion_rodilla", "estocada", "rotacion_torso"])
+@pytest.mark.parametrize("inicial", [None, 0, 1])
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_alternar_lote_igual_que_frame_a_frame(nombre, inicial):
+    regla = REGLAS[nombre]
+    nombres = [lado for lado, _ in regla.lados]
+    puntos = secuencia_alternancia(3)
+    visibles = mascara_visibilidad(puntos)
+
+    ultimo = nombres[inicial] if inicial is not None else None
+    gesto_ok, lados = regla.alternar_lote(puntos, ultimo, visibles)
+    for t in range(len(puntos)):
+        ok, ultimo = regla.alternar(puntos[t], ultimo, int(visibles[t]))
+        assert gesto_ok[t] == ok, f"frame {t}"
+        assert lados[t] == (nombres.index(ultimo) if ultimo in nombres else -1), f"frame {t}"
+    assert gesto_ok.any()
+
+
+@pytest.mark.parametrize("nombre", ["elevacion_rodilla", "estocada", "rotacion_torso"])
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_alternar_filas_igual_que_alternar(nombre):
+    regla = REGLAS[nombre]
+    nombres = [lado for lado, _ in regla.lados]
+    puntos = secuencia_alternancia(4, 300)
+    ultimos = np.random.default_rng(4).integers(-1, 2, len(puntos))
+    gesto_ok, lados = regla.alternar_filas(puntos, ultimos)
+    for p, previo in enumerate(ultimos):
+        ok, lado = regla.alternar(puntos[p], nombres[previo] if previo >= 0 else None)
+        assert gesto_ok[p] == ok
+        assert lados[p] == (nombres.index(lado) if lado in nombres else -1)
+
+
+def test_alternar_lote_exige_dos_lados():
+    with pytest.raises(ValueError):
+        REGLAS["sentadilla"].alternar_lote(secuencia_alternancia(5, 10))
+
+
+def sesion_salto():
+    """Cinco frames de pie y cinco en el aire (tobillos y rodillas 0.1 más arriba).
+
+    Las rodillas van casi a la altura de los tobillos: la regla también se cumple
+    con las rodillas 0.04 por encima de la referencia.
+    """
+    de_pie = postura({25: (0.56, 0.88, 0), 26: (0.44, 0.88, 0)})
+    en_el_aire = postura({i: (de_pie[i, 0], de_pie[i, 1] - 0.1, 0) for i in (25, 26, 27, 28)})
+    return np.stack([de_pie] * 5 + [en_el_aire] * 5)
+
+
+def test_salto_en_sesion_con_primer_frame_vacio():
+    puntos = sesion_salto()
+    esperado = [False] * 5 + [True] * 5
+    assert gestures.evaluar_sesion(puntos)["salto"].tolist() == esperado
+
+    # El grabador deja a cero los frames sin persona: la referencia sale del primero con landmarks
+    datos = np.zeros(len(puntos), dtype=grabacion.REGISTRO)
+    datos["puntos"] = puntos
+    datos["flags"] = grabacion.HAY_PUNTOS
+    datos[0] = 0
+    assert gestures.evaluar_sesion(datos["puntos"])["salto"].tolist() == esperado
+    assert grabacion.analizar(datos)["salto"].tolist() == esperado
+
+    # Sin ningún frame con los tobillos y rodillas visibles no hay salto
+    datos["puntos"][..., 3] = 0.0
+    assert not gestures.evaluar_sesion(datos["puntos"])["salto"].any()
+    assert not grabacion.analizar(datos[:0])["salto"].any()
@@ -1,7 +1,86 @@
 import numpy as np
 
+# Tripletas estándar (a, b, c): el ángulo se mide en la articulación central b
+TRIPLETAS = {
+    "codo_izquierdo": (11, 13, 15),
+    "codo_derecho": (12, 14, 16),
+    "rodilla_izquierda": (23, 25, 27),
+    "rodilla_derecha": (24, 26, 28),
+    "cadera_izquierda": (11, 23, 25),
+    "cadera_derecha": (12, 24, 26),
+}
+NOMBRES_TRIPLETAS = tuple(TRIPLETAS)
+INDICES_TRIPLETAS = np.array([TRIPLETAS[n] for n in NOMBRES_TRIPLETAS], dtype=np.intp)
+
+# Pares (izquierda, derecha) listos para indexar el resultado de calcular_angulos
+CODOS = INDICES_TRIPLETAS[[0, 1]]
+RODILLAS = INDICES_TRIPLETAS[[2, 3]]
+
+
 def calcular_angulo(a, b, c):
     a, b, c = np.array(a), np.array(b), np.array(c)
     ba, bc = a - b, c - b
     coseno = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
     return np.degrees(np.arccos(np.clip(coseno, -1.0, 1.0)))
+
+
+def calcular_angulos(tripletas):
+    """Ángulos (grados) de un lote de tripletas con forma (..., N, 3, D), D = 2 o 3.
+
+    Devuelve un array (..., N). Las tripletas degeneradas (segmento nulo) dan NaN.
+    """
+    t = np.asarray(tripletas, dtype=np.float64)
+    ba = t[..., 0, :] - t[..., 1, :]
+    bc = t[..., 2, :] - t[..., 1, :]
+    producto = np.einsum("...i,...i->...", ba, bc)
+    normas = np.sqrt(np.einsum("...i,...i->...", ba, ba) * np.einsum("...i,...i->...", bc, bc))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coseno = producto / normas
+    return np.degrees(np.arccos(np.clip(coseno, -1.0, 1.0)))
+
+
+def calcular_angulos_estandar(puntos, dims=2):
+    """Ángulos de todas las TRIPLETAS a partir de un array de puntos (..., 33, C).
+
+    El orden del resultado sigue NOMBRES_TRIPLETAS.
+    """
+    puntos = np.asarray(puntos)
+    return calcular_angulos(puntos[..., INDICES_TRIPLETAS, :dims])
+
+
+# === Instantánea de landmarks por frame ===
+NUM_LANDMARKS = 33
+X, Y, Z, VIS = range(4)  # Columnas del array de landmarks
+UMBRAL_VISIBILIDAD = 0.5
+# Bit de cada landmark en las máscaras de visibilidad (ver mascara_visibilidad)
+BITS_LANDMARKS = np.left_shift(np.uint64(1), np.arange(NUM_LANDMARKS, dtype=np.uint64))
+
+
+def landmarks_a_array(landmarks, out=None):
+    """Copia los landmarks de MediaPipe a un array contiguo (33, 4) float32: x, y, z, visibilidad.
+
+    Si se pasa `out`, se reutiliza ese buffer en lugar de reservar uno nuevo.
+    """
+    valores = [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks]
+    if out is None:
+        return np.array(valores, dtype=np.float32)
+    out[:] = valores
+    return out
+
+
+def mascara_indices(indices):
+    """Máscara de bits con los landmarks indicados (bit i = landmark i)."""
+    mascara = 0
+    for idx in indices:
+        mascara |= 1 << idx
+    return mascara
+
+
+def mascara_visibilidad(puntos, umbral=UMBRAL_VISIBILIDAD):
+    """Máscara de bits de los landmarks visibles de un array (..., 33, 4).
+
+    Para un único frame devuelve un int; para lotes, un array uint64 (...,).
+    """
+    visibles = np.asarray(puntos)[..., VIS] >= umbral
+    mascara = np.bitwise_or.reduce(np.where(visibles, BITS_LANDMARKS, np.uint64(0)), axis=-1)
+    return int(mascara) if mascara.ndim == 0 else mascara